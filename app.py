@@ -1,21 +1,28 @@
-import json
 import os
 import time
 
 import customtkinter as ctk
 
+import instrumentation
+import startup_profile
+from events import Tick, StateChange, SessionComplete
+from journal import Journal, EngineJournal
+from settings_store import SettingsStore
+from snapshot import load_snapshot, save_snapshot
 from timer_engine import TimerEngine, TimerState, SessionType
-from models import Database
-from tray import TrayManager
-import notifications
-from ui.timer_display import TimerDisplay
+from ui.render_stats import render_counter
+from ui.timer_display import TimerDisplay, SESSION_COLORS
 from ui.controls import Controls
+from ui.futures import when_done
 from ui.task_entry import TaskEntry
 from ui.settings_panel import SettingsPanel
-from ui.stats_panel import StatsPanel
+
+# The database, tray (pystray/PIL), notifications (plyer) and the stats panel
+# are imported where they are first needed so the window paints sooner.
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 SETTINGS_PATH = os.path.join(APP_DIR, "settings.json")
+JOURNAL_PATH = os.path.join(APP_DIR, "journal.bin")
 ICON_PATH = os.path.join(APP_DIR, "assets", "icon.ico")
 
 DEFAULT_SETTINGS = {
@@ -25,8 +32,27 @@ DEFAULT_SETTINGS = {
     "always_on_top": False,
     "sound_enabled": True,
     "theme": "dark",
+    # Tick cadence while the window is hidden in the tray; only the tooltip
+    # is visible then, so it does not need to change every second. Ignored
+    # while the status API is running, whose clients expect every second.
+    "background_tick_seconds": 10,
+    # Raw sessions older than this many months are summarised per day and
+    # task, then deleted; 0 keeps everything.
+    "retention_months": 0,
+    # Serve the timer state and stats on http://127.0.0.1:<port>/ for desk
+    # displays and editor plugins; 0 disables the server.
+    "status_api_port": 0,
 }
 
+# Progress-ring steps in the tray icon, i.e. icon swaps per session
+TRAY_RING_FRAMES = 12
+
+# Database compaction/vacuum: first run after startup, then periodically;
+# postponed while a session is running.
+MAINTENANCE_DELAY_MS = 5 * 60 * 1000
+MAINTENANCE_INTERVAL_MS = 6 * 60 * 60 * 1000
+MAINTENANCE_RETRY_MS = 60 * 1000
+
 SESSION_NAMES = {
     SessionType.WORK: "Work",
     SessionType.SHORT_BREAK: "Short Break",
@@ -37,9 +63,11 @@ SESSION_NAMES = {
 class PomodoroApp(ctk.CTk):
     def __init__(self):
         super().__init__()
+        startup_profile.mark("Tk root created")
 
-        # Load settings
-        self.settings = self._load_settings()
+        # Load settings; edits are kept in memory and written in the background
+        self.settings_store = SettingsStore(SETTINGS_PATH, DEFAULT_SETTINGS)
+        self.settings = self.settings_store.data
         ctk.set_appearance_mode(self.settings.get("theme", "dark"))
         ctk.set_default_color_theme("blue")
 
@@ -52,47 +80,200 @@ class PomodoroApp(ctk.CTk):
             self.iconbitmap(ICON_PATH)
 
         self.attributes("-topmost", self.settings.get("always_on_top", False))
+        startup_profile.mark("window configured")
 
         # Core components
-        self.db = Database()
+        self._db = None
+        self._unrecorded = []  # sessions completed before the database was opened
+        self.tray = None
+        self.stats_panel = None
+        self.status_server = None
+        # Consumers subscribe to engine.events once they exist
         self.engine = TimerEngine(
-            on_tick=self._on_tick,
-            on_complete=self._on_complete,
+            on_tick=None,
+            on_complete=None,
             schedule_fn=self.after,
             cancel_fn=self.after_cancel,
         )
-        # Set durations directly (don't trigger on_tick before UI exists)
+        # Set durations directly (don't publish events before UI exists)
         self.engine.durations[SessionType.WORK] = self.settings["work_duration"]
         self.engine.durations[SessionType.SHORT_BREAK] = self.settings["short_break_duration"]
         self.engine.durations[SessionType.LONG_BREAK] = self.settings["long_break_duration"]
         self.engine._remaining = self.settings["work_duration"]
 
+        # Pick up where the last run left off; the database is reconciled
+        # in the background after the first paint.
+        self._stats = None
+        snapshot = load_snapshot()
+        if snapshot:
+            self._stats = snapshot["stats"]
+            try:
+                self.engine.session_type = SessionType(snapshot["engine"]["session_type"])
+                self.engine.completed_pomodoros = int(snapshot["engine"]["completed_pomodoros"])
+            except (ValueError, TypeError):
+                pass
+            self.engine._remaining = self.engine.durations[self.engine.session_type]
+        startup_profile.mark("snapshot loaded")
+
         # Build UI
         self._build_ui()
+        events = self.engine.events
+        events.subscribe(self._show_time, (Tick, StateChange), name="timer display")
+        events.subscribe(lambda e: self.controls.set_state(e.state), (StateChange,), name="controls")
+        events.subscribe(self._on_complete, (SessionComplete,), name="session complete")
+        startup_profile.mark("UI built")
+
+        # Resume the exact session a crash (or quit) interrupted; the journal
+        # is newer than the snapshot's engine position. Journalling starts
+        # first, so completing a session that ran out meanwhile is recorded
+        # and not completed again after the next crash.
+        self.journal = Journal(JOURNAL_PATH)
+        recovered = self.journal.recover()
+        EngineJournal(self.engine, self.journal, task=self.task_entry.get_task)
+        try:
+            self.journal.open()
+        except OSError:
+            pass  # runs unjournalled; appends are no-ops
+        if recovered:
+            # The session's task, which a session completed by restore() is
+            # recorded with
+            if recovered[1]["task"]:
+                self.task_entry.set_task(recovered[1]["task"])
+            self.engine.restore(recovered[1])
+        startup_profile.mark("journal recovered")
+
+        # Extra sections for --profile / --metrics-file; ignored otherwise
+        instrumentation.add_source("event_subscribers", self.engine.events.report)
+        instrumentation.add_source("render_calls_per_minute", render_counter.per_minute)
 
-        # System tray
+        # Window close minimizes to tray
+        self.protocol("WM_DELETE_WINDOW", self._minimize_to_tray)
+
+        # Keyboard shortcut: Space to toggle start/pause
+        self.bind("<space>", lambda e: self._toggle_start_pause())
+
+        # Initial display
+        self._show_time(self._current_tick())
+        self.controls.set_state(self.engine.state)
+
+        # Everything else waits until the timer has been drawn
+        self.after_idle(self._after_first_paint)
+
+    @property
+    def db(self):
+        if self._db is None:
+            from models import Database
+            self._db = Database()
+        return self._db
+
+    def _after_first_paint(self):
+        # Drain any layout/redraw work Tk queued after this callback
+        self.update_idletasks()
+        startup_profile.mark("first paint")
+        self._start_tray()
+        startup_profile.mark("tray started")
+        self.db  # opens and migrates the database
+        for session in self._unrecorded:
+            self.db.record_session(**session)
+        self._unrecorded = []
+        # Ready before the first keystroke wants suggestions
+        self.db.warm_task_index()
+        startup_profile.mark("database opened")
+        if self.settings.get("sound_enabled", True):
+            import notifications
+            notifications.preload_sound()
+        self._refresh_stats()
+        self._start_status_server()
+        self.after(MAINTENANCE_DELAY_MS, self._maintain_db)
+        startup_profile.finish()
+
+    def _maintain_db(self):
+        if self.engine.state == TimerState.RUNNING:
+            self.after(MAINTENANCE_RETRY_MS, self._maintain_db)
+            return
+        # Runs on the database writer thread
+        self.db.maintain(self.settings.get("retention_months", 0))
+        self.after(MAINTENANCE_INTERVAL_MS, self._maintain_db)
+
+    def _refresh_stats(self):
+        """Show the last known stats now and fetch fresh ones off the Tk thread."""
+        if self.stats_panel and self._stats:
+            self.stats_panel.render(self._stats)
+        from ui.stats_panel import summary_options
+        when_done(self, self.db.get_stats_summary_async(**summary_options()), self._apply_stats)
+        if self.stats_panel:
+            self.stats_panel.refresh_tasks()
+
+    def _apply_stats(self, future):
+        if future.exception() is not None:
+            return
+        self._stats = future.result()
+        if self.stats_panel:
+            self.stats_panel.render(self._stats)
+        self._save_snapshot()
+
+    def _save_snapshot(self):
+        if self._stats is None:
+            return
+        try:
+            save_snapshot(self._stats, self.engine.session_type.value,
+                          self.engine.completed_pomodoros)
+        except OSError:
+            pass
+
+    def _start_tray(self):
+        from tray import TrayManager
         self.tray = TrayManager(
             show_window_cb=self._restore_from_tray,
             quit_cb=self._quit_app,
             start_pause_cb=self._toggle_start_pause,
             reset_cb=self.engine.reset,
             root=self,
+            colors=tuple(SESSION_COLORS.values()),
+            ring_frames=TRAY_RING_FRAMES,
+            # Throttled by the subscription below instead, which lets
+            # transitions through at once
+            update_interval_ms=0,
         )
         self.tray.start()
-
-        # Window close minimizes to tray
-        self.protocol("WM_DELETE_WINDOW", self._minimize_to_tray)
-
-        # Keyboard shortcut: Space to toggle start/pause
-        self.bind("<space>", lambda e: self._toggle_start_pause())
-
-        # Initial display
-        self._on_tick(self.engine.remaining, self.engine.session_type)
-        self.stats_panel.refresh()
+        # The tooltip and icon ring cannot show more than one change a second;
+        # the first tick after a quiet second and every transition go out at once
+        self.engine.events.subscribe(self._update_tray, (Tick, StateChange), name="tray", max_rate=1)
+        self._update_tray(self._current_tick())
+
+    def _start_status_server(self):
+        port = self.settings.get("status_api_port", 0)
+        if not port:
+            return
+        from status_server import StatusServer
+        server = StatusServer(stats_fn=self.db.get_stats_summary_async, port=port)
+        try:
+            server.start()
+        except OSError as e:
+            # Windowed builds have no console, so tell the user the usual way
+            import notifications
+            notifications.send_toast("Status API not started",
+                                     f"Port {port}: {e.strerror or e}", key="status_api")
+            return
+        self.status_server = server
+        # In case the window was hidden before the server came up
+        self.engine.set_tick_interval(1)
+        # Deferred: encoding the state waits until the tick has been handled
+        self.engine.events.subscribe(self._publish_status, (Tick, StateChange),
+                                     name="status api", deferred=True)
+        self._publish_status(StateChange(self.engine.state, None, self.engine.session_type,
+                                         None, self.engine.remaining))
+
+    def _publish_status(self, event):
+        # One call per tick whatever the number of clients; the server does the rest
+        from status_server import timer_state
+        self.status_server.publish(timer_state(self.engine, self.task_entry.get_task()),
+                                   transition=isinstance(event, StateChange))
 
     def _build_ui(self):
         # Task entry at top
-        self.task_entry = TaskEntry(self)
+        # Suggestions come from the database, which is opened on first use
+        self.task_entry = TaskEntry(self, suggest=lambda prefix: self.db.suggest_tasks(prefix))
         self.task_entry.pack(fill="x")
 
         # Timer display
@@ -141,76 +322,110 @@ class PomodoroApp(ctk.CTk):
             on_settings_changed=self._on_settings_changed,
         )
 
-        # Stats panel
-        self.stats_panel = StatsPanel(self.panel_container, db=self.db)
-
         # Show settings by default
         self._active_panel = None
         self._show_panel("settings")
 
+    def _get_stats_panel(self):
+        # Built on first open
+        if self.stats_panel is None:
+            from ui.stats_panel import StatsPanel
+            self.stats_panel = StatsPanel(self.panel_container, db=self.db)
+        return self.stats_panel
+
     def _show_panel(self, panel_name):
         if self._active_panel == panel_name:
             # Toggle off
             self.settings_panel.pack_forget()
-            self.stats_panel.pack_forget()
+            if self.stats_panel:
+                self.stats_panel.pack_forget()
             self._active_panel = None
             self.settings_tab_btn.configure(fg_color="transparent")
             self.stats_tab_btn.configure(fg_color="transparent")
             return
 
         self.settings_panel.pack_forget()
-        self.stats_panel.pack_forget()
+        if self.stats_panel:
+            self.stats_panel.pack_forget()
 
         if panel_name == "settings":
             self.settings_panel.pack(fill="both", expand=True, pady=5)
             self.settings_tab_btn.configure(fg_color=("gray75", "gray25"))
             self.stats_tab_btn.configure(fg_color="transparent")
         elif panel_name == "stats":
-            self.stats_panel.refresh()
+            self._get_stats_panel()
+            self._refresh_stats()
             self.stats_panel.pack(fill="both", expand=True, pady=5)
             self.stats_tab_btn.configure(fg_color=("gray75", "gray25"))
             self.settings_tab_btn.configure(fg_color="transparent")
 
         self._active_panel = panel_name
 
-    def _on_tick(self, remaining, session_type):
+    def _current_tick(self):
+        return Tick(self.engine.remaining, self.engine.session_type, self.engine.state)
+
+    def _show_time(self, event):
         self.timer_display.update_display(
-            remaining, session_type,
-            self.engine.total_duration,
+            event.remaining, event.session_type,
+            self.engine.durations[event.session_type],
             self.engine.completed_pomodoros,
         )
-        self.controls.set_state(self.engine.state)
 
-        # Update tray tooltip
+    def _update_tray(self, event):
+        remaining, session_type = event.remaining, event.session_type
         minutes = remaining // 60
         seconds = remaining % 60
         name = SESSION_NAMES.get(session_type, "Work")
         self.tray.update_tooltip(f"{name} - {minutes:02d}:{seconds:02d}")
+        total = self.engine.durations[session_type]
+        self.tray.update_icon(
+            SESSION_COLORS.get(session_type, "#e74c3c"),
+            remaining / total if total > 0 else 0,
+        )
 
-    def _on_complete(self, session_type):
-        name = SESSION_NAMES.get(session_type, "Session")
+    def _on_complete(self, event):
+        session_type = event.session_type
 
         # Record work sessions
-        if session_type == SessionType.WORK and self.engine.started_at:
-            task = self.task_entry.get_task()
-            self.db.record_session(
-                session_type="work",
-                duration_seconds=self.engine.total_duration,
-                task_label=task,
-                started_at=self.engine.started_at,
-            )
-            self.stats_panel.refresh()
+        if session_type == SessionType.WORK and event.started_at:
+            session = {
+                "session_type": "work",
+                "duration_seconds": event.duration,
+                "task_label": self.task_entry.get_task(),
+                "started_at": event.started_at,
+                "completed_at": event.completed_at,
+            }
+            if self._db is None:
+                # Completed by crash recovery during startup; recorded once
+                # the database is open, so the first paint does not wait
+                self._unrecorded.append(session)
+            else:
+                self.db.record_session(**session)
+                self._refresh_stats()
+                if self.status_server:
+                    self.status_server.invalidate_stats()
+
+        # Runs once the engine has advanced to the next session
+        self.after_idle(self._save_snapshot)
+
+        # A session that ran out while the app was not running is recorded
+        # as of its end, but a toast and alarm now would only confuse
+        if event.recovered:
+            return
 
         # Notifications
+        import notifications
         if session_type == SessionType.WORK:
             notifications.send_toast(
                 "Pomodoro Complete!",
-                f"Great work! Time for a break. (#{self.engine.completed_pomodoros})"
+                f"Great work! Time for a break. (#{event.completed_pomodoros})",
+                key="session",
             )
         else:
             notifications.send_toast(
                 "Break Over!",
-                "Time to get back to work!"
+                "Time to get back to work!",
+                key="session",
             )
 
         if self.settings.get("sound_enabled", True):
@@ -225,43 +440,50 @@ class PomodoroApp(ctk.CTk):
             self.engine.resume()
 
     def _on_settings_changed(self, new_settings):
-        self.settings.update(new_settings)
-        self.engine.set_durations(
+        old_on_top = self.settings.get("always_on_top", False)
+        self.settings_store.update(new_settings)
+
+        durations = (
             new_settings["work_duration"],
             new_settings["short_break_duration"],
             new_settings["long_break_duration"],
         )
-        self.attributes("-topmost", new_settings.get("always_on_top", False))
-        self._save_settings()
+        current = tuple(self.engine.durations[t] for t in
+                        (SessionType.WORK, SessionType.SHORT_BREAK, SessionType.LONG_BREAK))
+        if durations != current:
+            self.engine.set_durations(*durations)
+
+        on_top = new_settings.get("always_on_top", False)
+        if on_top != old_on_top:
+            self.attributes("-topmost", on_top)
 
     def _minimize_to_tray(self):
         self.withdraw()
+        # Status API clients are promised a tick every second
+        if not self.status_server:
+            self.engine.set_tick_interval(self.settings.get("background_tick_seconds", 10))
 
     def _restore_from_tray(self):
+        self.engine.set_tick_interval(1)
         self.deiconify()
         self.lift()
         self.focus_force()
 
     def _quit_app(self):
-        self.tray.stop()
-        self.db.close()
-        self.destroy()
-
-    def _load_settings(self):
-        if os.path.exists(SETTINGS_PATH):
-            try:
-                with open(SETTINGS_PATH, "r") as f:
-                    loaded = json.load(f)
-                    merged = dict(DEFAULT_SETTINGS)
-                    merged.update(loaded)
-                    return merged
-            except Exception:
-                pass
-        return dict(DEFAULT_SETTINGS)
-
-    def _save_settings(self):
+        # A deliberate quit pauses, so the session comes back paused
+        self.engine.pause()
+        self.journal.close()
+        if self.tray:
+            self.tray.stop()
+        if self.status_server:
+            self.status_server.stop()
+        # Blocks until the background writer has committed every queued session
+        if self._db:
+            self._stats = self._db.get_stats_summary()
+            self._save_snapshot()
+            self._db.close()
         try:
-            with open(SETTINGS_PATH, "w") as f:
-                json.dump(self.settings, f, indent=2)
-        except Exception:
-            pass
+            self.settings_store.close()
+        except OSError:
+            pass  # nowhere left to report it; the previous file is intact
+        self.destroy()
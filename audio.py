@@ -0,0 +1,214 @@
+"""Alert sound playback on a persistent worker thread.
+
+Sounds are decoded to raw PCM once and kept in memory. play() only
+enqueues a request; a single long-lived worker hands the PCM to the
+backend, so the Tk thread never waits on the disk or the audio device.
+
+Backends:
+    WinsoundBackend  Windows; plays the in-memory WAV image via winsound
+    AplayBackend     Linux; streams raw PCM into a persistent ``aplay`` pipe
+    NullBackend      discards audio (tests, headless machines)
+
+Each play records the trigger-to-first-sample latency: the time from the
+play() call until the backend has handed the first chunk to the device.
+"""
+import io
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+from collections import deque
+
+# Size of the first write to a streaming backend; small so that the first
+# sample reaches the device quickly.
+FIRST_CHUNK_SECONDS = 0.01
+
+
+class Sound:
+    def __init__(self, pcm, sample_rate, channels, sample_width=2):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self._wav = None
+
+    @classmethod
+    def from_wav(cls, path):
+        with wave.open(path, "rb") as wf:
+            return cls(wf.readframes(wf.getnframes()), wf.getframerate(),
+                       wf.getnchannels(), wf.getsampwidth())
+
+    @property
+    def frame_size(self):
+        return self.channels * self.sample_width
+
+    def wav_bytes(self):
+        if self._wav is None:
+            buf = io.BytesIO()
+            with wave.open(buf, "wb") as wf:
+                wf.setnchannels(self.channels)
+                wf.setsampwidth(self.sample_width)
+                wf.setframerate(self.sample_rate)
+                wf.writeframes(self.pcm)
+            self._wav = buf.getvalue()
+        return self._wav
+
+
+class NullBackend:
+    def __init__(self):
+        self.played = []
+
+    def play(self, sound, on_first_sample):
+        on_first_sample()
+        self.played.append(sound)
+
+    def close(self):
+        pass
+
+
+class WinsoundBackend:
+    def __init__(self):
+        import winsound
+        self._winsound = winsound
+
+    def play(self, sound, on_first_sample):
+        # SND_MEMORY cannot be combined with SND_ASYNC; this already runs on
+        # the worker thread, so a blocking call is fine. PlaySound gives no
+        # start notification, so the latency covers the call setup only.
+        data = sound.wav_bytes()
+        on_first_sample()
+        self._winsound.PlaySound(data, self._winsound.SND_MEMORY)
+
+    def close(self):
+        pass
+
+
+class AplayBackend:
+    FORMATS = {1: "U8", 2: "S16_LE", 3: "S24_3LE", 4: "S32_LE"}
+
+    def __init__(self, command="aplay"):
+        self._command = command
+        self._proc = None
+        self._format = None
+
+    def play(self, sound, on_first_sample):
+        pipe = self._pipe(sound)
+        first = int(sound.sample_rate * FIRST_CHUNK_SECONDS) * sound.frame_size
+        try:
+            pipe.write(sound.pcm[:first])
+            pipe.flush()
+            on_first_sample()
+            pipe.write(sound.pcm[first:])
+            pipe.flush()
+        except (BrokenPipeError, OSError):
+            # aplay died (device unplugged, killed); start afresh next time
+            self.close()
+            raise
+
+    def _pipe(self, sound):
+        fmt = (sound.sample_rate, sound.channels, sound.sample_width)
+        if self._proc is not None and (self._proc.poll() is not None or fmt != self._format):
+            self.close()
+        if self._proc is None:
+            # One long-lived process per format: the device stays open and
+            # each alert is just a write into the pipe.
+            self._proc = subprocess.Popen(
+                [self._command, "-q", "-t", "raw", "-f", self.FORMATS[sound.sample_width],
+                 "-r", str(sound.sample_rate), "-c", str(sound.channels)],
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            self._format = fmt
+        return self._proc.stdin
+
+    def close(self):
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._proc = None
+
+
+def default_backend():
+    if sys.platform == "win32":
+        return WinsoundBackend()
+    if shutil.which("aplay"):
+        return AplayBackend()
+    return NullBackend()
+
+
+class AudioPlayer:
+    def __init__(self, backend=None, clock=time.perf_counter):
+        self.backend = backend if backend is not None else default_backend()
+        self.latencies = deque(maxlen=1000)
+        self.errors = 0
+        self._clock = clock
+        self._sounds = {}
+        self._loaders = {}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def register(self, name, loader):
+        """Register a sound; ``loader()`` returns a Sound and runs once, on the worker."""
+        self._loaders[name] = loader
+
+    def preload(self, name):
+        self._queue.put(("load", name, None))
+
+    def play(self, name):
+        self._queue.put(("play", name, self._clock()))
+
+    def latency_stats(self):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return {
+            "count": len(ordered),
+            "min_ms": ordered[0] * 1000,
+            "median_ms": ordered[len(ordered) // 2] * 1000,
+            "max_ms": ordered[-1] * 1000,
+        }
+
+    def wait_idle(self):
+        done = threading.Event()
+        self._queue.put(("call", done.set, None))
+        done.wait()
+
+    def close(self):
+        self._queue.put(("stop", None, None))
+        self._thread.join()
+        self.backend.close()
+
+    def _sound(self, name):
+        sound = self._sounds.get(name)
+        if sound is None:
+            sound = self._loaders[name]()
+            self._sounds[name] = sound
+        return sound
+
+    def _run(self):
+        while True:
+            kind, arg, triggered_at = self._queue.get()
+            if kind == "stop":
+                return
+            try:
+                if kind == "call":
+                    arg()
+                elif kind == "load":
+                    self._sound(arg)
+                elif kind == "play":
+                    sound = self._sound(arg)
+                    self.backend.play(
+                        sound, lambda: self.latencies.append(self._clock() - triggered_at)
+                    )
+            except Exception:
+                self.errors += 1
@@ -0,0 +1,84 @@
+"""Alarm synthesis time: the original per-sample generator vs. synth.render_chime.
+
+The legacy generator is reproduced here verbatim (minus the file write) so
+the comparison survives its removal from generate_assets.py.
+
+    python benchmarks/bench_alarm_synth.py
+"""
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth
+from synth import cached_chime, chime_params, render_chime
+
+
+def legacy_alarm(duration=1.5, sample_rate=44100, freqs=((523, 0.0, 0.4), (659, 0.4, 0.8), (784, 0.8, 1.3))):
+    num_samples = int(sample_rate * duration)
+    samples = []
+    for freq, start, end in freqs:
+        start_sample = int(start * sample_rate)
+        end_sample = int(end * sample_rate)
+        for i in range(num_samples):
+            if start_sample <= i < end_sample:
+                t = (i - start_sample) / sample_rate
+                envelope = min(1.0, (end - start - t) * 5) * min(1.0, t * 20)
+                value = envelope * 0.4 * math.sin(2 * math.pi * freq * t)
+            else:
+                value = 0
+            if i < len(samples):
+                samples[i] += value
+            else:
+                samples.append(value)
+    max_val = max(abs(s) for s in samples) or 1
+    return b"".join(struct.pack("<h", int(s / max_val * 32000)) for s in samples)
+
+
+def _time(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+
+def _max_diff(a, b):
+    sa = struct.unpack(f"<{len(a) // 2}h", a)
+    sb = struct.unpack(f"<{len(b) // 2}h", b)
+    return max(abs(x - y) for x, y in zip(sa, sb))
+
+
+def main():
+    legacy_ms, legacy_pcm = _time(legacy_alarm)
+    print(f"{'variant':<34} {'time':>10} {'max |diff| vs legacy':>22}")
+    print(f"{'legacy, 1.5 s mono':<34} {legacy_ms:>8.1f}ms {'-':>22}")
+
+    params = chime_params()
+    backends = [("array", False)] + ([("numpy", True)] if synth.np is not None else [])
+    for name, use_numpy in backends:
+        ms, pcm = _time(lambda: render_chime(**params, use_numpy=use_numpy))
+        print(f"{name + ', 1.5 s mono':<34} {ms:>8.1f}ms {_max_diff(pcm, legacy_pcm):>22}")
+
+    longer = chime_params(duration=12.0, channels=2, tones=[
+        [523 + 20 * i, 0.4 * i, 0.4 * i + 1.2, -1 + i / 14] for i in range(28)
+    ])
+    ms, _ = _time(lambda: legacy_alarm(duration=12.0, freqs=[t[:3] for t in longer["tones"]]), repeat=1)
+    print(f"{'legacy, 12 s 28 tones (mono)':<34} {ms:>8.1f}ms")
+    for name, use_numpy in backends:
+        ms, _ = _time(lambda: render_chime(**longer, use_numpy=use_numpy))
+        print(f"{name + ', 12 s 28 tones stereo':<34} {ms:>8.1f}ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cold_ms, _ = _time(lambda: cached_chime(tmp), repeat=1)
+        warm_ms, _ = _time(lambda: cached_chime(tmp))
+    print(f"{'cached_chime cold / warm':<34} {cold_ms:>8.1f}ms / {warm_ms:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Trigger-to-first-sample latency of notifications' audio path.
+
+Compares the persistent AudioPlayer (sound decoded once, worker thread,
+long-lived pipe) with the old approach of reading alarm.wav and starting a
+player per alert. Without a sound device, ``--sink fake`` swaps aplay for a
+script that just drains its input, so the pipe path is still exercised.
+
+    python benchmarks/bench_audio_latency.py --plays 50 --sink fake
+"""
+import argparse
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio import AplayBackend, AudioPlayer, NullBackend, Sound
+from synth import chime_params, render_chime, write_wav
+
+
+def _fake_aplay(tmp):
+    path = os.path.join(tmp, "fake-aplay")
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\nexec cat > /dev/null\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+    return (f"median {ordered[len(ordered) // 2] * 1000:8.3f} ms   "
+            f"max {ordered[-1] * 1000:8.3f} ms")
+
+
+def bench_player(backend, wav_path, plays):
+    player = AudioPlayer(backend)
+    player.register("alarm", lambda: Sound.from_wav(wav_path))
+    player.preload("alarm")
+    player.wait_idle()
+    for _ in range(plays):
+        player.play("alarm")
+        player.wait_idle()
+    player.close()
+    return list(player.latencies)
+
+
+def bench_spawn_per_alert(command, wav_path, plays):
+    latencies = []
+    for _ in range(plays):
+        t0 = time.perf_counter()
+        sound = Sound.from_wav(wav_path)
+        proc = subprocess.Popen([command, "-q", "-t", "raw", "-f", "S16_LE",
+                                 "-r", str(sound.sample_rate), "-c", str(sound.channels)],
+                                stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        proc.stdin.write(sound.pcm[:441 * 2])
+        proc.stdin.flush()
+        latencies.append(time.perf_counter() - t0)
+        proc.stdin.write(sound.pcm[441 * 2:])
+        proc.stdin.close()
+        proc.wait()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plays", type=int, default=50)
+    parser.add_argument("--sink", choices=["fake", "aplay"], default="fake")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        params = chime_params()
+        wav_path = os.path.join(tmp, "alarm.wav")
+        write_wav(wav_path, render_chime(**params), params["sample_rate"], params["channels"])
+        command = _fake_aplay(tmp) if args.sink == "fake" else "aplay"
+
+        print(f"{'AudioPlayer + NullBackend':<32} {_summary(bench_player(NullBackend(), wav_path, args.plays))}")
+        print(f"{'AudioPlayer + AplayBackend':<32} "
+              f"{_summary(bench_player(AplayBackend(command), wav_path, args.plays))}")
+        print(f"{'read + spawn per alert':<32} "
+              f"{_summary(bench_spawn_per_alert(command, wav_path, args.plays))}")
+
+
+if __name__ == "__main__":
+    main()
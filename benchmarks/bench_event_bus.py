@@ -0,0 +1,78 @@
+"""Time spent inside TimerEngine._tick with fast and slow event subscribers.
+
+Runs one work session in virtual time (poll mode, 5 ticks a second) with
+a cheap display-like subscriber, a 1 Hz rate-limited tray-like one, a
+transitions-only one and a consumer that burns --slow-ms per event. With
+the bus's slow-consumer deferral disabled, the slow consumer runs inside
+every tick; with it enabled, it is moved to its own loop turn and gets
+only the newest tick.
+
+    python benchmarks/bench_event_bus.py --seconds 300 --slow-ms 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from events import Tick, StateChange
+from simulation import Simulation
+from timer_engine import SessionType
+
+
+def _busy(ms):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+def run(seconds, slow_ms, defer):
+    sim = Simulation(tick_mode="poll", check=False)
+    engine = sim.engine
+    engine.durations[SessionType.WORK] = seconds
+    bus = engine.events
+    if not defer:
+        bus.slow_ms = float("inf")
+    bus.subscribe(lambda e: _busy(0.02), (Tick, StateChange), name="display")
+    bus.subscribe(lambda e: _busy(0.2), (Tick, StateChange), name="tray", max_rate=1)
+    bus.subscribe(lambda e: None, name="controls", transitions_only=True)
+    bus.subscribe(lambda e: _busy(slow_ms), (Tick, StateChange), name="slow")
+
+    # Wrap the engine's tick to time only the work done on the tick path
+    tick_times = []
+    original = engine._tick
+
+    def timed_tick():
+        t0 = time.perf_counter()
+        original()
+        tick_times.append(time.perf_counter() - t0)
+
+    engine._tick = timed_tick
+    sim.apply("start")
+    sim.loop.run()
+    tick_times.sort()
+    return tick_times, bus.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=300, help="session length")
+    parser.add_argument("--slow-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    for defer in (False, True):
+        times, report = run(args.seconds, args.slow_ms, defer)
+        p50 = times[len(times) // 2] * 1000
+        p99 = times[int(len(times) * 0.99)] * 1000
+        print(f"deferral {'on' if defer else 'off'}: {len(times)} ticks, "
+              f"_tick p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+        print(f"  {'subscriber':<10} {'delivered':>9} {'coalesced':>9} {'mean ms':>8} "
+              f"{'max ms':>8} deferred")
+        for row in report:
+            print(f"  {row['name']:<10} {row['delivered']:>9} {row['coalesced']:>9} "
+                  f"{row['mean_ms']:>8.3f} {row['max_ms']:>8.3f} {row['deferred']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Journal write overhead per transition and recovery time.
+
+Write overhead: time spent in Journal.append() on the calling thread with
+the default batched fsync, compared with an fsync after every append.
+
+Recovery: builds a journal of --entries records (a million by default),
+then times recover() on it as written and with a torn tail (a partial
+final write plus --damaged corrupted records), against decoding the whole
+file the way a replay-everything design would.
+
+    python benchmarks/bench_journal.py --entries 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal import Journal, MAGIC, VERSION, _HEADER, _RECORD, decode, encode
+from timer_engine import TimerState, SessionType
+
+SNAPSHOT = {
+    "state": TimerState.RUNNING,
+    "session_type": SessionType.WORK,
+    "completed_pomodoros": 3,
+    "remaining": 1500,
+    "target_time": 1_700_000_000.0,
+    "started_at": 1_699_998_500.0,
+}
+
+
+def _percentiles_us(times):
+    times.sort()
+    return (times[len(times) // 2] * 1e6, times[int(len(times) * 0.99)] * 1e6, times[-1] * 1e6)
+
+
+def bench_appends(directory, count, sync_every_append):
+    path = os.path.join(directory, f"append-{sync_every_append}.bin")
+    journal = Journal(path, checkpoint_every=count + 2)
+    journal.recover()
+    journal.open()
+    times = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        journal.append("pause" if i % 2 else "resume", SNAPSHOT)
+        if sync_every_append:
+            journal.sync()
+        times.append(time.perf_counter() - t0)
+    journal.close()
+    return _percentiles_us(times), journal.syncs
+
+
+def build(path, entries):
+    record = encode("resume", SNAPSHOT, time.time())
+    chunk = record * 10_000
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0))
+        for _ in range(entries // 10_000):
+            f.write(chunk)
+        f.write(record * (entries % 10_000))
+
+
+def time_recover(path, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        entry = Journal(path).recover()
+        best = min(best, time.perf_counter() - t0)
+    assert entry is not None
+    return best
+
+
+def time_full_replay(path):
+    t0 = time.perf_counter()
+    last = None
+    with open(path, "rb") as f:
+        f.read(_HEADER.size)
+        while True:
+            record = f.read(_RECORD.size)
+            if len(record) < _RECORD.size:
+                break
+            last = decode(record) or last
+    assert last is not None
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--appends", type=int, default=2000)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--damaged", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"append() on the calling thread, {args.appends} transitions:")
+        for sync_every in (False, True):
+            (p50, p99, worst), syncs = bench_appends(directory, args.appends, sync_every)
+            label = "fsync each" if sync_every else "batched fsync"
+            print(f"  {label:<14} p50 {p50:8.1f} us  p99 {p99:8.1f} us  max {worst:9.1f} us"
+                  f"  ({syncs} fsyncs)")
+
+        path = os.path.join(directory, "big.bin")
+        t0 = time.perf_counter()
+        build(path, args.entries)
+        size = os.path.getsize(path)
+        print(f"\n{args.entries:,} entries, {size / 1e6:.1f} MB, built in {time.perf_counter() - t0:.2f} s")
+        print(f"  recover(), intact tail          {time_recover(path) * 1e6:10.1f} us")
+        with open(path, "r+b") as f:
+            f.seek(size - args.damaged * _RECORD.size)
+            f.write(b"\xff" * (args.damaged * _RECORD.size))
+            f.seek(0, os.SEEK_END)
+            f.write(b"\x00" * (_RECORD.size // 2))
+        print(f"  recover(), {args.damaged} damaged + torn   {time_recover(path) * 1e6:10.1f} us")
+        print(f"  decode every record (replay)    {time_full_replay(path) * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Stats query latency vs. table size.
+
+Fills a throwaway database with synthetic work sessions (100 per day, so
+today's slice is the same size at every scale) and times the stats queries
+against it. The legacy date(completed_at) query is timed alongside for
+comparison.
+
+    python benchmarks/bench_stats_queries.py --max-rows 10000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Database
+
+SESSIONS_PER_DAY = 100
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+LEGACY_TODAY_SQL = """SELECT COUNT(*), COALESCE(SUM(duration_seconds), 0)
+                      FROM sessions
+                      WHERE session_type = 'work' AND date(completed_at) = ?"""
+
+
+def _rows(n):
+    now = time.time()
+    step = 86400 / SESSIONS_PER_DAY
+    for i in range(n):
+        ts = now - i * step
+        dt = datetime.fromtimestamp(ts)
+        iso = dt.isoformat()
+        yield ("work", 1500, None, iso, iso, int(ts), iso[:10])
+
+
+def _fill(db, n):
+    db.conn.executemany(
+        """INSERT INTO sessions (session_type, duration_seconds, task_id,
+                                 started_at, completed_at, completed_ts, day)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        _rows(n),
+    )
+    db.conn.commit()
+    db.rebuild_rollup()
+
+
+def _median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    print(f"{'rows':>12} {'today':>10} {'week':>10} {'all-time':>10} {'legacy today':>14}")
+    for n in [s for s in SIZES if s <= args.max_rows]:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"))
+            _fill(db, n)
+            db.conn.execute("ANALYZE")
+            today_ms = _median_ms(db.get_today_stats, args.repeat)
+            week_ms = _median_ms(db.get_week_stats, args.repeat)
+            all_ms = _median_ms(db.get_all_time_stats, args.repeat)
+            legacy_ms = _median_ms(
+                lambda: db.conn.execute(LEGACY_TODAY_SQL, (today,)).fetchone(),
+                max(1, args.repeat // 4),
+            )
+            db.close()
+        print(f"{n:>12,} {today_ms:>8.3f}ms {week_ms:>8.3f}ms {all_ms:>8.3f}ms {legacy_ms:>12.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Load test for the status API: many SSE, long-poll and stats clients.
+
+Starts a StatusServer in-process (or targets a running app with --url)
+and a publisher thread standing in for the Tk thread, ticking at --rate
+Hz with a transition every fifth tick and a stats invalidation every
+tenth. Reports push latency (publish to client receipt), how many events
+each subscriber saw, long-poll answers, /stats 200 vs 304 responses, how
+often the stats were actually computed, and what publish() costs the
+calling thread. In-process runs share the GIL with the clients, so
+latencies and publish() outliers include the load generator's own work;
+--url measures against a separate app process.
+
+    python benchmarks/bench_status_server.py --subscribers 500 --pollers 100
+    python benchmarks/bench_status_server.py --url http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from status_server import StatusServer
+
+STATS = {"today": {"pomodoros": 3, "focus_seconds": 4500},
+         "week": [], "all_time": {"pomodoros": 1200, "focus_seconds": 1_800_000}}
+
+
+def _raise_fd_limit(needed):
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+
+def _percentiles_ms(values):
+    if not values:
+        return 0, 0, 0
+    values.sort()
+    return (values[len(values) // 2] * 1000, values[int(len(values) * 0.99)] * 1000,
+            values[-1] * 1000)
+
+
+async def _request(host, port, path, headers=""):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n{headers}\r\n".encode())
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    status = int(lines[0].split()[1])
+    found = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        found[name.lower()] = value.strip()
+    return status, found, body
+
+
+async def _subscriber(host, port, stop, latencies, counts):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /events HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    await reader.readuntil(b"\r\n\r\n")
+    seen = 0
+    try:
+        while not stop.is_set():
+            try:
+                frame = await asyncio.wait_for(reader.readuntil(b"\n\n"), 0.5)
+            except asyncio.TimeoutError:
+                continue
+            for line in frame.split(b"\n"):
+                if line.startswith(b"data: "):
+                    sent = json.loads(line[6:]).get("updated_at")
+                    if sent:
+                        latencies.append(time.time() - sent)
+                    seen += 1
+    finally:
+        counts.append(seen)
+        writer.close()
+
+
+async def _long_poller(host, port, stop, answers):
+    version = 0
+    while not stop.is_set():
+        status, _, body = await _request(host, port, f"/state?since={version}&timeout=2")
+        if status == 200:
+            version = json.loads(body)["version"]
+            answers.append(version)
+
+
+async def _stats_poller(host, port, stop, statuses):
+    etag = None
+    while not stop.is_set():
+        status, headers, _ = await _request(
+            host, port, "/stats", f"If-None-Match: {etag}\r\n" if etag else "")
+        statuses[status] = statuses.get(status, 0) + 1
+        etag = headers.get("etag", etag)
+        await asyncio.sleep(0.2)
+
+
+def _publisher(server, rate, stop, publish_times, published):
+    state = {"state": "running", "session_type": "work", "remaining": 1500, "total": 1500,
+             "completed_pomodoros": 0, "task": None}
+    n = 0
+    while not stop.is_set():
+        n += 1
+        state = dict(state, remaining=state["remaining"] - 1, updated_at=time.time())
+        t0 = time.perf_counter()
+        server.publish(state, transition=n % 5 == 0)
+        if n % 10 == 0:
+            server.invalidate_stats()
+        publish_times.append(time.perf_counter() - t0)
+        published.append(n)
+        time.sleep(1 / rate)
+
+
+async def _run(args, host, port):
+    stop = asyncio.Event()
+    latencies, counts, answers, statuses = [], [], [], {}
+    tasks = []
+    # Ramp up connections in batches so the listen backlog is not flooded
+    for i in range(args.subscribers):
+        tasks.append(asyncio.create_task(_subscriber(host, port, stop, latencies, counts)))
+        if i % 100 == 99:
+            await asyncio.sleep(0.05)
+    tasks += [asyncio.create_task(_long_poller(host, port, stop, answers))
+              for _ in range(args.pollers)]
+    tasks += [asyncio.create_task(_stats_poller(host, port, stop, statuses))
+              for _ in range(args.stats_clients)]
+    await asyncio.sleep(args.seconds)
+    stop.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = [r for r in results if isinstance(r, Exception)]
+    return latencies, counts, answers, statuses, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="test a running app instead of an in-process server")
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--pollers", type=int, default=100)
+    parser.add_argument("--stats-clients", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rate", type=float, default=5, help="publishes per second")
+    args = parser.parse_args()
+    _raise_fd_limit(4 * (args.subscribers + args.pollers + args.stats_clients) + 256)
+
+    server = None
+    stop_publisher = threading.Event()
+    publish_times, published = [], []
+    stats_calls = []
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        pool = concurrent.futures.ThreadPoolExecutor(1)
+
+        def stats_fn():
+            stats_calls.append(1)
+            return pool.submit(lambda: time.sleep(0.005) or STATS)
+
+        server = StatusServer(stats_fn, port=0)
+        server.start()
+        host, port = server.host, server.port
+        threading.Thread(target=_publisher, daemon=True,
+                         args=(server, args.rate, stop_publisher, publish_times, published)).start()
+
+    latencies, counts, answers, statuses, errors = asyncio.run(_run(args, host, port))
+    stop_publisher.set()
+
+    print(f"{args.subscribers} SSE subscribers, {args.pollers} long-pollers, "
+          f"{args.stats_clients} stats clients, {args.seconds:g} s")
+    if published:
+        p50, p99, worst = _percentiles_ms(publish_times)
+        print(f"  published {len(published)} states; publish() p50 {p50 * 1000:.1f} us, "
+              f"p99 {p99 * 1000:.1f} us on the calling thread")
+    p50, p99, worst = _percentiles_ms(latencies)
+    print(f"  push latency      p50 {p50:.2f} ms  p99 {p99:.2f} ms  max {worst:.2f} ms")
+    if counts:
+        print(f"  events/subscriber min {min(counts)}  max {max(counts)}")
+    print(f"  long-poll answers {len(answers)}")
+    print(f"  /stats responses  {dict(sorted(statuses.items()))}"
+          + (f", computed {len(stats_calls)} times" if server else ""))
+    if errors:
+        print(f"  {len(errors)} client errors, e.g. {errors[0]!r}")
+    if server:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Per-task analytics latency on a large synthetic history.
+
+Fills a throwaway database with work sessions spread over a few years and
+a Zipf-like mix of tasks, then times top_tasks(), task_session_counts()
+and task_daily_series() over several ranges, both uncached and cached.
+Each query plan is checked for the index it is meant to use.
+
+    python benchmarks/bench_task_queries.py --rows 5000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+from models import Database
+
+YEARS = 4
+
+
+def _rows(n, tasks, rng):
+    now = time.time()
+    step = YEARS * 365 * 86400 / n
+    weights = [1 / (i + 1) for i in range(tasks)]
+    task_ids = rng.choices(range(1, tasks + 1), weights=weights, k=n)
+    for i in range(n):
+        ts = now - i * step
+        iso = datetime.fromtimestamp(ts).isoformat()
+        yield ("work", 1500, task_ids[i], iso, iso, int(ts), iso[:10])
+
+
+def _fill(db, n, tasks, seed):
+    rng = random.Random(seed)
+    conn = db.conn
+    conn.executemany("INSERT INTO tasks (label) VALUES (?)",
+                     ((f"Task {i:04d}",) for i in range(1, tasks + 1)))
+    # Same trick as Database.import_sessions: build the indexes once at the end
+    conn.execute("DROP INDEX idx_sessions_type_day_task")
+    conn.execute("DROP INDEX idx_sessions_type_task_day")
+    conn.execute("DROP INDEX idx_sessions_identity")
+    conn.executemany(
+        """INSERT INTO sessions (session_type, duration_seconds, task_id,
+                                 started_at, completed_at, completed_ts, day)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        _rows(n, tasks, rng),
+    )
+    conn.execute(models._TYPE_DAY_INDEX_SQL)
+    conn.execute(models._TYPE_TASK_INDEX_SQL)
+    conn.commit()
+    db.rebuild_rollup()
+    conn.execute("ANALYZE")
+
+
+def _check_plan(db, sql, params, index):
+    """"ok" if every step reading sessions uses ``index``, else those steps."""
+    steps = [r[3] for r in db.conn.execute("EXPLAIN QUERY PLAN " + sql, params)
+             if " sessions " in f"{r[3]} "]
+    wrong = [step for step in steps if index not in step]
+    return "ok" if steps and not wrong else "; ".join(wrong) or "sessions not read"
+
+
+def _time_ms(db, fn, repeat, cached):
+    times = []
+    for _ in range(repeat):
+        if not cached:
+            db._generation += 1
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--tasks", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        t0 = time.perf_counter()
+        _fill(db, args.rows, args.tasks, args.seed)
+        print(f"filled {args.rows:,} sessions / {args.tasks:,} tasks "
+              f"in {time.perf_counter() - t0:.1f} s")
+
+        bounds = {"start": "0000-00-00", "end": "9999-99-99"}
+        # With and without planner statistics; a new database has none
+        for stats in ("analyzed", "no stats"):
+            if stats == "no stats":
+                db.conn.execute("DELETE FROM sqlite_stat1")
+                db.conn.commit()
+                db.conn.execute("ANALYZE sqlite_schema")  # reloads the (now empty) statistics
+            print(f"plan top_tasks ({stats}): "
+                  f"{_check_plan(db, models._TASK_TOTALS_SQL, bounds, 'idx_sessions_type_day_task')}")
+            print(f"plan task_daily_series ({stats}): "
+                  f"{_check_plan(db, models._task_daily_sql('Task 0001'), dict(bounds, task='Task 0001'), 'idx_sessions_type_task_day')}")
+        db.conn.execute("ANALYZE")
+        db.conn.commit()
+
+        today = date.today()
+        print(f"\n{'query':<34} {'range':>6} {'uncached':>10} {'cached':>10}")
+        for days in (7, 30, 365, None):
+            start = today - timedelta(days=days - 1) if days else None
+            label = f"{days}d" if days else "all"
+            cases = [
+                ("top_tasks(limit=10)", lambda: db.top_tasks(start, today, limit=10)),
+                ("task_session_counts", lambda: db.task_session_counts(start, today)),
+                ("task_daily_series(most used)", lambda: db.task_daily_series("Task 0001", start, today)),
+                ("task_daily_series(rare)", lambda: db.task_daily_series(f"Task {args.tasks:04d}", start, today)),
+            ]
+            for name, fn in cases:
+                uncached = _time_ms(db, fn, args.repeat, cached=False)
+                cached = _time_ms(db, fn, args.repeat, cached=True)
+                print(f"{name:<34} {label:>6} {uncached:>8.2f}ms {cached:>8.4f}ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
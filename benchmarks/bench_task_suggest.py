@@ -0,0 +1,80 @@
+"""Task autocomplete latency with many distinct labels.
+
+Builds a TaskIndex over synthetic labels (two or three words drawn from a
+small vocabulary, so short prefixes match thousands of labels) with
+Zipf-like use counts, then times suggest() for cold and cached prefixes
+and touch() for recording a use.
+
+    python benchmarks/bench_task_suggest.py --labels 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_index import TaskIndex
+
+WORDS = ["review", "write", "design", "fix", "plan", "read", "email", "report",
+         "meeting", "research", "deploy", "refactor", "test", "draft", "call",
+         "budget", "invoice", "lecture", "exercise", "study", "api", "docs",
+         "backlog", "release", "notes", "paper", "client", "sprint", "bug", "ui"]
+
+
+def _labels(n, rng):
+    labels = set()
+    while len(labels) < n:
+        words = rng.sample(WORDS, rng.choice((2, 3)))
+        labels.add(" ".join(words).capitalize() + f" #{rng.randrange(10_000)}")
+    return sorted(labels)
+
+
+def _percentiles_us(times):
+    times.sort()
+    return (times[len(times) // 2] * 1e6, times[int(len(times) * 0.99)] * 1e6, times[-1] * 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    labels = _labels(args.labels, rng)
+    rows = [(label, int(1000 / (i + 1)) + 1, rng.randrange(1_700_000_000, 1_800_000_000))
+            for i, label in enumerate(rng.sample(labels, len(labels)))]
+
+    index = TaskIndex(lambda: rows)
+    t0 = time.perf_counter()
+    len(index)
+    print(f"{args.labels:,} labels, loaded in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    # Every prefix a user types on the way to a label, one to eight characters
+    prefixes = []
+    for label in rng.choices(labels, k=args.queries):
+        prefixes.extend(label[:n] for n in range(1, min(len(label), 8) + 1))
+
+    print(f"{'case':<22} {'median us':>10} {'p99 us':>10} {'max us':>10}")
+    # The first pass computes each distinct prefix once; the second is all cache hits
+    for case in ("cold", "cached"):
+        times = []
+        for prefix in prefixes:
+            t0 = time.perf_counter()
+            index.suggest(prefix)
+            times.append(time.perf_counter() - t0)
+        print(f"{'suggest ' + case:<22} {'%10.1f %10.1f %10.1f' % _percentiles_us(times)}")
+
+    times = []
+    for label in rng.choices(labels, k=args.queries) + [f"New task {i}" for i in range(200)]:
+        t0 = time.perf_counter()
+        index.touch(label, 1_800_000_000)
+        times.append(time.perf_counter() - t0)
+    print(f"{'touch':<22} {'%10.1f %10.1f %10.1f' % _percentiles_us(times)}")
+
+
+if __name__ == "__main__":
+    main()
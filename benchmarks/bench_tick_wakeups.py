@@ -0,0 +1,50 @@
+"""Wakeups and on_tick calls per session for each tick scheduler mode.
+
+Runs one 25-minute work session per mode in virtual time. Every scheduled
+callback fires 0-15 ms late, the way a busy Tk loop delivers after()
+callbacks, to show that aligned mode does not drift.
+
+    python benchmarks/bench_tick_wakeups.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation import Simulation
+from timer_engine import SessionType
+
+SESSION_SECONDS = 25 * 60
+MAX_LATENESS = 0.015
+
+
+def run(mode, interval):
+    ticks = []
+    completed = []
+    sim = Simulation(tick_mode=mode, tick_interval=interval, lateness=MAX_LATENESS,
+                     on_tick=lambda remaining, _: ticks.append((sim.loop.now, remaining)),
+                     on_complete=lambda _: completed.append((sim.loop.now, len(ticks))))
+    sim.engine.durations[SessionType.WORK] = SESSION_SECONDS
+    start = sim.loop.now
+    sim.apply("start")
+    sim.loop.run()
+    finished_at, ticks_in_session = completed[0]
+    errors = [abs(remaining - (SESSION_SECONDS - (t - start)))
+              for t, remaining in ticks[:ticks_in_session]]
+    return sim.loop.wakeups, ticks_in_session, max(errors), finished_at - start - SESSION_SECONDS
+
+
+def main():
+    # "max err" is how far a reported value strays from the true remaining
+    # time when it is reported. "finish" is completion time relative to the
+    # nominal end; the engine completes once the rounded remaining time
+    # reaches 0, i.e. ~0.5 s early.
+    print(f"{'mode':<14} {'wakeups':>8} {'on_tick':>8} {'max err':>8} {'finish':>10}")
+    for mode, interval in [("poll", 1), ("aligned", 1), ("aligned", 10), ("aligned", 60)]:
+        wakeups, ticks, max_err, late = run(mode, interval)
+        label = mode if mode == "poll" else f"{mode}/{interval}s"
+        print(f"{label:<14} {wakeups:>8} {ticks:>8} {max_err:>7.3f}s {late * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""CPU cost of hosting many timers: TimerPool vs. one TimerEngine each.
+
+Both sides run in virtual time (simulation.SimulatedLoop), so the numbers
+are the CPU spent on the timers' own bookkeeping and callbacks. Every timer
+loops through work and break sessions, and a completion handler restarts
+it after a short random pause, the way a team member would.
+
+    python benchmarks/bench_timer_pool.py --timers 10000 --hours 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation import SimulatedLoop
+from timer_engine import TimerEngine
+from timer_pool import TimerPool
+
+
+def bench_pool(timers, hours, seed=0):
+    rng = random.Random(seed)
+    loop = SimulatedLoop()
+    batches = []
+
+    def on_batch(completed):
+        batches.append(len(completed))
+        for timer_id, _ in completed:
+            loop.after(rng.randint(0, 120_000), lambda t=timer_id: pool.start(t))
+
+    pool = TimerPool(on_batch, loop.after, loop.after_cancel, clock=loop.time)
+    for _ in range(timers):
+        timer_id = pool.add()
+        loop.after(rng.randint(0, 600_000), lambda t=timer_id: pool.start(t))
+
+    t0 = time.process_time()
+    loop.run_until(hours * 3600)
+    cpu = time.process_time() - t0
+    return cpu, loop.wakeups, sum(batches), len(batches)
+
+
+def bench_engines(timers, hours, tick_mode, seed=0):
+    rng = random.Random(seed)
+    loop = SimulatedLoop()
+    completions = [0]
+    engines = []
+
+    def make(i):
+        def on_complete(_):
+            completions[0] += 1
+            loop.after(rng.randint(0, 120_000), engines[i].start)
+        return TimerEngine(lambda remaining, session: None, on_complete,
+                           loop.after, loop.after_cancel, tick_mode=tick_mode, clock=loop.time)
+
+    for i in range(timers):
+        engines.append(make(i))
+        loop.after(rng.randint(0, 600_000), engines[i].start)
+
+    t0 = time.process_time()
+    loop.run_until(hours * 3600)
+    cpu = time.process_time() - t0
+    return cpu, loop.wakeups, completions[0], None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--timers", type=int, default=10_000)
+    parser.add_argument("--hours", type=float, default=8)
+    parser.add_argument("--engine-hours", type=float, default=0.25,
+                        help="simulated time for the per-engine baselines (they are slow)")
+    args = parser.parse_args()
+
+    per = 10_000 / args.timers
+    print(f"{'variant':<18} {'sim h':>6} {'wakeups':>11} {'completions':>12} {'CPU s/h per 10k':>16}")
+    rows = [("TimerPool", args.hours, bench_pool(args.timers, args.hours))]
+    for mode in ("aligned", "poll"):
+        rows.append((f"TimerEngine/{mode}", args.engine_hours,
+                     bench_engines(args.timers, args.engine_hours, mode)))
+    for label, hours, (cpu, wakeups, completions, batches) in rows:
+        print(f"{label:<18} {hours:>6.2f} {wakeups:>11,} {completions:>12,} {cpu / hours * per:>16.3f}")
+        if batches is not None:
+            # Loop wakeups above include the simulated users restarting timers
+            print(f"{'':<18} pool woke {batches:,} times to dispatch completions")
+
+
+if __name__ == "__main__":
+    main()
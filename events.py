@@ -0,0 +1,226 @@
+"""Publish/subscribe for TimerEngine events.
+
+Events:
+    Tick             the displayed remaining time changed
+    StateChange      the timer state or session type changed
+    SessionComplete  a session ran out, before the engine advances
+    DurationChange   set_durations() was called
+
+Each subscriber chooses what it wants:
+
+    max_rate          deliver at most this many Ticks per second; Ticks in
+                      between are coalesced and only the newest is delivered
+    transitions_only  never deliver Ticks
+    deferred          deliver on the next loop turn instead of inside the
+                      engine's tick, again coalescing Ticks that pile up
+
+Only Ticks are ever coalesced or rate limited. Every other event is
+delivered, in order, and carries the remaining time too, so a Tick that a
+transition overtakes can be dropped. A subscriber whose mean dispatch time
+goes over ``slow_ms`` is switched to deferred, so one expensive consumer
+cannot hold up the tick for the rest. report() shows per-subscriber
+dispatch times.
+"""
+import math
+import time
+
+
+class Tick:
+    __slots__ = ("remaining", "session_type", "state")
+
+    def __init__(self, remaining, session_type, state):
+        self.remaining = remaining
+        self.session_type = session_type
+        self.state = state
+
+
+class StateChange:
+    __slots__ = ("state", "previous", "session_type", "previous_session", "remaining")
+
+    def __init__(self, state, previous, session_type, previous_session, remaining):
+        self.state = state
+        self.previous = previous
+        self.session_type = session_type
+        self.previous_session = previous_session
+        self.remaining = remaining
+
+
+class SessionComplete:
+    """``completed_at`` is when the session ran out (its target time).
+
+    ``recovered`` is true for a session that ran out while the app was not
+    running and was completed by TimerEngine.restore(); it should be
+    recorded but not announced.
+    """
+    __slots__ = ("session_type", "completed_pomodoros", "started_at", "duration",
+                 "completed_at", "recovered")
+
+    def __init__(self, session_type, completed_pomodoros, started_at, duration,
+                 completed_at, recovered=False):
+        self.session_type = session_type
+        self.completed_pomodoros = completed_pomodoros
+        self.started_at = started_at
+        self.duration = duration
+        self.completed_at = completed_at
+        self.recovered = recovered
+
+
+class DurationChange:
+    __slots__ = ("durations",)
+
+    def __init__(self, durations):
+        self.durations = durations
+
+
+EVENT_TYPES = (Tick, StateChange, SessionComplete, DurationChange)
+
+# Mean dispatch time above which a subscriber is moved off the tick path
+SLOW_DISPATCH_MS = 4.0
+# Calls before the mean is trusted; the first call often warms caches
+SLOW_AFTER_CALLS = 5
+
+
+class Subscription:
+    def __init__(self, bus, callback, events, name, max_rate, transitions_only, deferred):
+        self._bus = bus
+        self.callback = callback
+        self.name = name or getattr(callback, "__qualname__", repr(callback))
+        if transitions_only:
+            events = tuple(e for e in events if e is not Tick)
+        self.events = frozenset(events)
+        self.min_interval = 1 / max_rate if max_rate else 0
+        self.deferred = deferred
+
+        self.delivered = 0
+        self.coalesced = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+        self._queue = []          # deferred non-Tick events, in order
+        self._tick = None         # newest undelivered Tick
+        self._last_tick = None    # bus clock when a Tick was last delivered
+        self._flush_id = None
+        self._flush_at = None
+
+    def unsubscribe(self):
+        self._bus.unsubscribe(self)
+
+    @property
+    def mean_ms(self):
+        return self.total_time / self.delivered * 1000 if self.delivered else 0.0
+
+    def _deliver(self, event):
+        t0 = time.perf_counter()
+        try:
+            self.callback(event)
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.delivered += 1
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+            if (not self.deferred and self.delivered >= SLOW_AFTER_CALLS
+                    and self.total_time / self.delivered * 1000 > self._bus.slow_ms):
+                self.deferred = True
+
+
+class EventBus:
+    def __init__(self, schedule_fn, cancel_fn, clock=time.time, slow_ms=SLOW_DISPATCH_MS):
+        self.schedule = schedule_fn
+        self.cancel = cancel_fn
+        self.clock = clock
+        self.slow_ms = slow_ms
+        self._subscribers = []
+        self.published = 0
+
+    @property
+    def active(self):
+        """Whether anyone is subscribed; publishers may skip building events otherwise."""
+        return bool(self._subscribers)
+
+    def subscribe(self, callback, events=EVENT_TYPES, name=None, max_rate=None,
+                  transitions_only=False, deferred=False):
+        """Call ``callback(event)`` for each published event of the given types."""
+        sub = Subscription(self, callback, events, name, max_rate, transitions_only, deferred)
+        self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+        if sub._flush_id is not None:
+            self.cancel(sub._flush_id)
+            sub._flush_id = None
+
+    def publish(self, event):
+        self.published += 1
+        kind = type(event)
+        # Copied so a callback may subscribe or unsubscribe
+        for sub in list(self._subscribers):
+            if kind not in sub.events:
+                continue
+            if kind is Tick:
+                self._offer_tick(sub, event)
+            else:
+                if sub._tick is not None:
+                    sub._tick = None  # superseded; the transition carries the time
+                    sub.coalesced += 1
+                if sub.deferred or sub._queue:
+                    sub._queue.append(event)
+                    self._schedule_flush(sub, 0)
+                else:
+                    sub._deliver(event)
+
+    def _offer_tick(self, sub, event):
+        if sub._tick is not None:
+            sub.coalesced += 1
+        now = self.clock()
+        wait = 0
+        if sub.min_interval and sub._last_tick is not None:
+            wait = sub._last_tick + sub.min_interval - now
+        if wait <= 0 and not sub.deferred and not sub._queue:
+            sub._tick = None
+            sub._last_tick = now
+            sub._deliver(event)
+            return
+        sub._tick = event
+        self._schedule_flush(sub, max(0, wait))
+
+    def _schedule_flush(self, sub, delay):
+        due = self.clock() + delay
+        if sub._flush_id is not None:
+            if sub._flush_at <= due:
+                return
+            self.cancel(sub._flush_id)
+        sub._flush_at = due
+        sub._flush_id = self.schedule(math.ceil(delay * 1000), lambda: self._flush(sub))
+
+    def _flush(self, sub):
+        sub._flush_id = None
+        queue, sub._queue = sub._queue, []
+        for event in queue:
+            sub._deliver(event)
+        if sub._tick is None:
+            return
+        now = self.clock()
+        if sub.min_interval and sub._last_tick is not None:
+            wait = sub._last_tick + sub.min_interval - now
+            # Timers may fire a hair early; a millisecond is close enough
+            if wait > 0.001:
+                self._schedule_flush(sub, wait)
+                return
+        event, sub._tick = sub._tick, None
+        sub._last_tick = now
+        sub._deliver(event)
+
+    def report(self):
+        """Per-subscriber delivery counts and dispatch times, slowest first."""
+        rows = [{
+            "name": sub.name,
+            "delivered": sub.delivered,
+            "coalesced": sub.coalesced,
+            "mean_ms": sub.mean_ms,
+            "max_ms": sub.max_time * 1000,
+            "deferred": sub.deferred,
+        } for sub in self._subscribers]
+        rows.sort(key=lambda row: row["mean_ms"], reverse=True)
+        return rows
@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+
+def atomic_write(path, text, fsync=True):
+    """Replace ``path`` with ``text`` so readers see the old or new file, never a mix.
+
+    ``text`` may be bytes for binary files.
+
+    Writes to a temporary file in the same directory and renames it over the
+    target. With ``fsync`` the data is flushed to disk before the rename.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        if isinstance(text, bytes):
+            f = os.fdopen(fd, "wb")
+        else:
+            f = os.fdopen(fd, "w", encoding="utf-8")
+        with f:
+            f.write(text)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
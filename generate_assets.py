@@ -1,11 +1,15 @@
 """Run this once to generate icon and alarm assets. Requires Pillow."""
+import argparse
+import filecmp
+import json
 import os
-import struct
-import wave
-import math
+import shutil
 from PIL import Image, ImageDraw
 
+from synth import cached_chime
+
 ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+CACHE_DIR = os.path.join(ASSETS_DIR, "cache")
 os.makedirs(ASSETS_DIR, exist_ok=True)
 
 
@@ -40,45 +44,33 @@ def create_icon():
     print(f"Created: {ico_path}")
 
 
-def create_alarm_sound():
-    """Create a simple chime alarm .wav file."""
-    sample_rate = 44100
-    duration = 1.5  # seconds
-    num_samples = int(sample_rate * duration)
-
-    samples = []
-    # Three ascending tones
-    freqs = [(523, 0.0, 0.4), (659, 0.4, 0.8), (784, 0.8, 1.3)]
-    for freq, start, end in freqs:
-        start_sample = int(start * sample_rate)
-        end_sample = int(end * sample_rate)
-        for i in range(num_samples):
-            if start_sample <= i < end_sample:
-                t = (i - start_sample) / sample_rate
-                envelope = min(1.0, (end - start - t) * 5) * min(1.0, t * 20)
-                value = envelope * 0.4 * math.sin(2 * math.pi * freq * t)
-            else:
-                value = 0
-            if i < len(samples):
-                samples[i] += value
-            else:
-                samples.append(value)
-
-    # Normalize and convert to 16-bit
-    max_val = max(abs(s) for s in samples) or 1
-    raw = b"".join(struct.pack("<h", int(s / max_val * 32000)) for s in samples)
+def create_alarm_sound(**chime):
+    """Create the chime alarm .wav file.
 
+    Keyword arguments override synth.DEFAULT_CHIME. The render is cached by
+    parameters, so re-running with unchanged inputs only re-copies the file
+    if alarm.wav itself differs.
+    """
+    cached = cached_chime(CACHE_DIR, **chime)
     wav_path = os.path.join(ASSETS_DIR, "alarm.wav")
-    with wave.open(wav_path, "w") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-        wf.writeframes(raw)
-
+    if os.path.exists(wav_path) and filecmp.cmp(cached, wav_path, shallow=False):
+        print(f"Up to date: {wav_path}")
+        return
+    shutil.copyfile(cached, wav_path)
     print(f"Created: {wav_path}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate icon and alarm assets")
+    parser.add_argument("--chime", metavar="JSON",
+                        help="JSON file overriding synth.DEFAULT_CHIME parameters")
+    args = parser.parse_args()
+
+    chime = {}
+    if args.chime:
+        with open(args.chime) as f:
+            chime = json.load(f)
+
     create_icon()
-    create_alarm_sound()
+    create_alarm_sound(**chime)
     print("Assets generated successfully!")
@@ -0,0 +1,222 @@
+"""Opt-in latency histograms for the app's hot paths.
+
+``main.py --profile`` prints a summary on exit and ``--metrics-file``
+rewrites a JSON snapshot every few seconds. Nothing is measured unless
+one of them is given: install() replaces the measured methods with
+timing wrappers on their classes, so a normal run calls the original
+methods directly and pays nothing.
+
+Measured:
+    TimerEngine._tick, plus wakeup jitter (actual minus scheduled time)
+    EventBus.publish, the per-tick fan-out to subscribers
+    PomodoroApp tick consumers (_show_time, _update_tray, _on_complete)
+    TimerDisplay.update_display
+    every Database method
+    StatsPanel.refresh_tasks / render / render_chart
+    SettingsStore.update and the settings file write
+
+install() must run before the app is constructed, since event
+subscriptions and Tk callbacks hold bound methods.
+"""
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+from fileutil import atomic_write
+
+# Four buckets per doubling, i.e. about 19% resolution
+BUCKETS_PER_OCTAVE = 4
+METRICS_INTERVAL = 10.0
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+_sources = {}
+_started = time.perf_counter()
+_output = None
+
+
+class Histogram:
+    """Latencies on a log scale, in microseconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = {}
+
+    def add(self, us):
+        self.count += 1
+        self.total += us
+        self.min = min(self.min, us)
+        self.max = max(self.max, us)
+        # Bucket 0 holds everything under 1 us, including negative jitter
+        index = int(math.log2(us) * BUCKETS_PER_OCTAVE) + 1 if us >= 1 else 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the ``p``-th percentile, capped at max."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                bound = 2 ** (index / BUCKETS_PER_OCTAVE) if index else 1.0
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count / 1000 if self.count else 0.0,
+            "min_ms": self.min / 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) / 1000,
+            "p90_ms": self.percentile(90) / 1000,
+            "p99_ms": self.percentile(99) / 1000,
+            "max_ms": self.max / 1000 if self.count else 0.0,
+        }
+
+
+def enable(output=None):
+    """Start collecting; ``output`` is where finish() writes ("-" for stdout)."""
+    global _enabled, _output, _started
+    _enabled = True
+    _output = output
+    _started = time.perf_counter()
+
+
+def is_enabled():
+    return _enabled
+
+
+def record(name, seconds):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds * 1e6)
+
+
+def add_source(name, fn):
+    """Include ``fn()`` (JSON-ready) in summaries, e.g. the event bus report."""
+    if _enabled:
+        _sources[name] = fn
+
+
+def timed(name, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record(name, time.perf_counter() - t0)
+    return wrapper
+
+
+def wrap(cls, names=None, prefix=None):
+    """Time the named methods of ``cls``; all functions defined on it when None."""
+    prefix = prefix or cls.__name__
+    if names is None:
+        names = [name for name, value in vars(cls).items() if callable(value)
+                 and not isinstance(value, (staticmethod, classmethod, type))]
+    for name in names:
+        setattr(cls, name, timed(f"{prefix}.{name}", getattr(cls, name)))
+
+
+def _timed_tick(fn):
+    @functools.wraps(fn)
+    def wrapper(self):
+        t0 = time.perf_counter()
+        if self._tick_due is not None:
+            record("TimerEngine.tick_jitter", self.clock() - self._tick_due)
+        try:
+            return fn(self)
+        finally:
+            record("TimerEngine._tick", time.perf_counter() - t0)
+    return wrapper
+
+
+def install():
+    """Wrap the measured methods; a no-op unless enabled."""
+    if not _enabled:
+        return
+    from app import PomodoroApp
+    from events import EventBus
+    from models import Database
+    from settings_store import SettingsStore
+    from timer_engine import TimerEngine
+    from ui.stats_panel import StatsPanel
+    from ui.timer_display import TimerDisplay
+
+    TimerEngine._tick = _timed_tick(TimerEngine._tick)
+    wrap(EventBus, ["publish"])
+    wrap(PomodoroApp, ["_show_time", "_update_tray", "_on_complete", "_refresh_stats",
+                       "_apply_stats"])
+    wrap(TimerDisplay, ["update_display"])
+    wrap(Database)
+    wrap(StatsPanel, ["refresh_tasks", "render", "render_chart"])
+    wrap(SettingsStore, ["update", "_write"])
+
+
+def snapshot():
+    with _lock:
+        histograms = {name: h.summary() for name, h in sorted(_histograms.items())}
+    data = {"generated_at": time.time(), "uptime": time.perf_counter() - _started,
+            "histograms": histograms}
+    for name, fn in _sources.items():
+        try:
+            data[name] = fn()
+        except Exception as e:
+            data[name] = {"error": repr(e)}
+    return data
+
+
+def report():
+    data = snapshot()
+    lines = [f"Profile ({data['uptime']:.1f} s)", "",
+             f"  {'':<36} {'count':>8} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}  (ms)"]
+    for name, h in data["histograms"].items():
+        lines.append(f"  {name:<36} {h['count']:>8} {h['mean_ms']:>9.3f} {h['p50_ms']:>9.3f} "
+                     f"{h['p99_ms']:>9.3f} {h['max_ms']:>9.3f}")
+    for name in _sources:
+        lines += ["", f"{name}:", "  " + json.dumps(data[name], indent=2).replace("\n", "\n  ")]
+    return "\n".join(lines)
+
+
+def start_metrics_file(path, interval=METRICS_INTERVAL):
+    """Rewrite ``path`` with snapshot() every ``interval`` seconds on a daemon thread."""
+    def run():
+        while True:
+            time.sleep(interval)
+            write_metrics(path)
+    threading.Thread(target=run, name="metrics-file", daemon=True).start()
+
+
+def write_metrics(path):
+    try:
+        # Rewritten often and cheap to lose, so skip the fsync
+        atomic_write(path, json.dumps(snapshot(), indent=2), fsync=False)
+    except OSError:
+        pass
+
+
+def finish():
+    """Write the summary, if one was asked for."""
+    if not _enabled or not _output:
+        return
+    text = report()
+    # Windowed PyInstaller builds have no stdout; fall back to a file
+    if _output == "-" and sys.stdout is not None:
+        print(text)
+        return
+    path = _output if _output != "-" else os.path.join(os.getcwd(), "profile.txt")
+    with open(path, "w") as f:
+        f.write(text + "\n")
@@ -0,0 +1,292 @@
+"""Append-only, crash-safe journal of TimerEngine transitions.
+
+Every transition (start, pause, resume, skip, reset, complete) appends one
+fixed-size record holding the engine's full resumable state, as returned
+by TimerEngine.snapshot(), the task label at the time, plus a CRC32. Because each record is
+self-contained, recovery only needs the newest intact record: it reads
+backwards from the end of the file, skipping a torn final write, so
+startup cost depends on the damaged tail, not on the journal's length.
+
+Records are written with os.write as they happen, so they survive the
+process dying. fsync is batched: a background thread syncs at most once
+every ``sync_interval`` seconds while there are unsynced records, which
+bounds what a power loss can take. After ``checkpoint_every`` records,
+and on close(), the file is cut down to only the newest record. That is
+done in place, not by renaming a new file over it, which Windows refuses
+while the journal is open.
+
+Layout: an 8-byte header (MAGIC, version) followed by records of
+_RECORD.size bytes.
+"""
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+
+from timer_engine import TimerState, SessionType
+
+MAGIC = b"PMJ"
+VERSION = 2
+_HEADER = struct.Struct("<3sBI")  # magic, version, reserved
+# UTF-8, NUL padded; longer labels are cut at a character boundary
+TASK_BYTES = 256
+# kind, state, session type, completed pomodoros, remaining, target time,
+# started at, written at, task label; then a CRC32 of those bytes
+_BODY = struct.Struct(f"<BBBxIdddd{TASK_BYTES}s")
+_RECORD = struct.Struct(f"<{_BODY.size}sI")
+
+KINDS = ("start", "pause", "resume", "skip", "reset", "complete")
+_STATES = tuple(TimerState)
+_SESSIONS = tuple(SessionType)
+
+SYNC_INTERVAL = 1.0
+CHECKPOINT_EVERY = 4096
+
+
+def _none_to_nan(value):
+    return math.nan if value is None else value
+
+
+def _nan_to_none(value):
+    return None if math.isnan(value) else value
+
+
+def _encode_task(task):
+    if not task:
+        return b""
+    return task.encode("utf-8")[:TASK_BYTES].decode("utf-8", "ignore").encode("utf-8")
+
+
+def encode(kind, snapshot, at):
+    """A record for ``snapshot``, which may also carry a "task" label."""
+    body = _BODY.pack(
+        KINDS.index(kind), _STATES.index(snapshot["state"]),
+        _SESSIONS.index(snapshot["session_type"]), snapshot["completed_pomodoros"],
+        snapshot["remaining"], _none_to_nan(snapshot["target_time"]),
+        _none_to_nan(snapshot["started_at"]), at, _encode_task(snapshot.get("task")),
+    )
+    return _RECORD.pack(body, zlib.crc32(body))
+
+
+def decode(record):
+    """(kind, snapshot, written at) for an intact record, None for a damaged one."""
+    body, crc = _RECORD.unpack(record)
+    if zlib.crc32(body) != crc:
+        return None
+    kind, state, session, completed, remaining, target, started, at, task = _BODY.unpack(body)
+    try:
+        snapshot = {
+            "state": _STATES[state],
+            "session_type": _SESSIONS[session],
+            "completed_pomodoros": completed,
+            "remaining": remaining,
+            "target_time": _nan_to_none(target),
+            "started_at": _nan_to_none(started),
+            "task": task.rstrip(b"\0").decode("utf-8") or None,
+        }
+        return KINDS[kind], snapshot, at
+    except (IndexError, UnicodeDecodeError):
+        return None
+
+
+def transition_kind(event, completing=False):
+    """The journal kind for a StateChange event."""
+    if completing:
+        return "complete"
+    if event.state == TimerState.RUNNING:
+        return "start" if event.previous == TimerState.IDLE else "resume"
+    if event.state == TimerState.PAUSED:
+        return "pause"
+    return "skip" if event.session_type != event.previous_session else "reset"
+
+
+class Journal:
+    def __init__(self, path, sync_interval=SYNC_INTERVAL, checkpoint_every=CHECKPOINT_EVERY,
+                 clock=time.time):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.checkpoint_every = checkpoint_every
+        self.clock = clock
+        self.records = 0        # records in the file
+        self.appends = 0
+        self.syncs = 0
+        self.checkpoints = 0
+        self.errors = 0
+        self.last_error = None
+        self._fd = None
+        self._last = None       # newest encoded record
+        self._valid_records = None
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._closed = False
+        self._thread = None
+
+    def recover(self):
+        """The newest intact (kind, snapshot, written at), or None.
+
+        Also notes where the intact records end, so open() can cut off a
+        torn tail before appending.
+        """
+        self._valid_records = 0
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size or _HEADER.unpack(header)[:2] != (MAGIC, VERSION):
+                    return None
+                size = os.fstat(f.fileno()).st_size
+                for index in range((size - _HEADER.size) // _RECORD.size - 1, -1, -1):
+                    f.seek(_HEADER.size + index * _RECORD.size)
+                    record = f.read(_RECORD.size)
+                    entry = decode(record)
+                    if entry is not None:
+                        self._valid_records = index + 1
+                        self._last = record
+                        return entry
+        except OSError:
+            return None
+        return None
+
+    def open(self):
+        """Open for appending, after recover(); starts the background fsync thread."""
+        if self._valid_records is None:
+            self.recover()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        if self._valid_records == 0:
+            os.ftruncate(fd, 0)
+            os.write(fd, _HEADER.pack(MAGIC, VERSION, 0))
+        else:
+            os.ftruncate(fd, _HEADER.size + self._valid_records * _RECORD.size)
+        os.lseek(fd, 0, os.SEEK_END)
+        self._fd = fd
+        self.records = self._valid_records
+        self._thread = threading.Thread(target=self._run, name="journal-sync", daemon=True)
+        self._thread.start()
+
+    def append(self, kind, snapshot):
+        """Record a transition; returns without waiting for the disk."""
+        record = encode(kind, snapshot, self.clock())
+        with self._lock:
+            if self._fd is None:
+                return
+            try:
+                os.write(self._fd, record)
+            except OSError as e:
+                self.errors += 1
+                self.last_error = e
+                return
+            self._last = record
+            self.records += 1
+            self.appends += 1
+            checkpoint = self.records >= self.checkpoint_every
+        with self._cond:
+            if not self._dirty:
+                self._dirty = True
+                self._cond.notify()
+        if checkpoint:
+            self.checkpoint()
+
+    def sync(self):
+        """fsync anything appended so far."""
+        with self._cond:
+            self._dirty = False
+        # On a duplicate, so appends (and a checkpoint swapping the file)
+        # need not wait for the disk
+        with self._lock:
+            if self._fd is None:
+                return
+            fd = os.dup(self._fd)
+        try:
+            os.fsync(fd)
+            self.syncs += 1
+        except OSError as e:
+            self.errors += 1
+            self.last_error = e
+        finally:
+            os.close(fd)
+
+    def checkpoint(self):
+        """Cut the file down to the newest record.
+
+        The newest record is copied over the first and made durable before
+        the rest is truncated, so a crash at any point leaves the newest
+        record last in the file, where recover() looks.
+        """
+        with self._lock:
+            if self._fd is None or self._last is None:
+                return
+            try:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.write(self._fd, _HEADER.pack(MAGIC, VERSION, 0) + self._last)
+                os.fsync(self._fd)
+                os.ftruncate(self._fd, _HEADER.size + _RECORD.size)
+                os.fsync(self._fd)
+            except OSError as e:
+                self.errors += 1
+                self.last_error = e
+                return
+            finally:
+                os.lseek(self._fd, 0, os.SEEK_END)
+            self.records = 1
+            self.checkpoints += 1
+
+    def close(self):
+        """Checkpoint, stop the sync thread and close the file."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.checkpoint()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _run(self):
+        with self._cond:
+            while not self._closed:
+                if not self._dirty:
+                    self._cond.wait()
+                    continue
+                # Let further appends in this window share one fsync
+                self._cond.wait(self.sync_interval)
+                if self._closed:
+                    break
+                self._cond.release()
+                try:
+                    self.sync()
+                finally:
+                    self._cond.acquire()
+
+
+class EngineJournal:
+    """Journals a TimerEngine's transitions through its event bus.
+
+    ``task()``, if given, returns the current task label, which is stored
+    with each snapshot.
+    """
+
+    def __init__(self, engine, journal, task=None):
+        from events import StateChange, SessionComplete
+        self.engine = engine
+        self.journal = journal
+        self.task = task
+        self._completing = False
+        engine.events.subscribe(self._on_complete, (SessionComplete,), name="journal")
+        engine.events.subscribe(self._on_change, (StateChange,), name="journal")
+
+    def _on_complete(self, event):
+        # Journalled with the StateChange that follows, once the engine has
+        # advanced; a record taken now would replay as a running session.
+        self._completing = True
+
+    def _on_change(self, event):
+        kind = transition_kind(event, self._completing)
+        self._completing = False
+        snapshot = self.engine.snapshot()
+        if self.task is not None:
+            snapshot["task"] = self.task()
+        self.journal.append(kind, snapshot)
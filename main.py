@@ -1,12 +1,56 @@
+import argparse
 import sys
 import os
 
 # Ensure the app directory is on the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import PomodoroApp
+import instrumentation
+import startup_profile
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pomodoro Timer")
+    parser.add_argument(
+        "--startup-profile", nargs="?", const="-", metavar="PATH",
+        help="report import times and init phases once the window is up "
+             "(to PATH, or stdout when omitted)",
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const="-", metavar="PATH",
+        help="time hot paths and print a latency summary on exit "
+             "(to PATH, or stdout when omitted)",
+    )
+    parser.add_argument(
+        "--metrics-file", metavar="PATH",
+        help="time hot paths and rewrite PATH with JSON metrics periodically",
+    )
+    parser.add_argument(
+        "--metrics-interval", type=float, default=instrumentation.METRICS_INTERVAL,
+        metavar="SECONDS", help="how often --metrics-file is rewritten",
+    )
+    # Ignore anything else the platform launcher may pass along
+    args, _ = parser.parse_known_args(argv)
+    return args
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.startup_profile:
+        startup_profile.enable(args.startup_profile)
+
+    if args.profile or args.metrics_file:
+        instrumentation.enable(args.profile)
+
+    from app import PomodoroApp
+    startup_profile.mark("app imported")
+    # Before the app exists: it binds the measured methods as callbacks
+    instrumentation.install()
+    if args.metrics_file:
+        instrumentation.start_metrics_file(args.metrics_file, args.metrics_interval)
+
     app = PomodoroApp()
     app.mainloop()
+    if args.metrics_file:
+        instrumentation.write_metrics(args.metrics_file)
+    instrumentation.finish()
@@ -1,18 +1,507 @@
 import os
+import queue
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+
+import timeseries
 
 
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pomodoro.db")
 
+# Bumped whenever _migrate() learns a new step; stored in PRAGMA user_version.
+SCHEMA_VERSION = 8
+
+_MIGRATION_BATCH = 10000
+_WRITER_MAX_BATCH = 256
+# Closed buckets kept by time_series() for each (session type, bucket) and
+# closed months of heatmap totals; least recently used go first
+SERIES_CACHE_BUCKETS = 10000
+HEATMAP_CACHE_MONTHS = 120
+
+
+def _local_day(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+
+
+# Covering indexes: every stats and per-task query on raw sessions is answered
+# from an index alone. The first serves day ranges, the second one task's days.
+_TYPE_DAY_INDEX_SQL = """CREATE INDEX IF NOT EXISTS idx_sessions_type_day_task
+                         ON sessions (session_type, day, task_id, duration_seconds)"""
+_TYPE_TASK_INDEX_SQL = """CREATE INDEX IF NOT EXISTS idx_sessions_type_task_day
+                          ON sessions (session_type, task_id, day, duration_seconds)"""
+# Hourly and heatmap time series bucket on completed_ts within a day range.
+_TYPE_DAY_TS_INDEX_SQL = """CREATE INDEX IF NOT EXISTS idx_sessions_type_day_ts
+                            ON sessions (session_type, day, completed_ts, duration_seconds)"""
+
+# Indexes that import_sessions() drops during a bulk load and rebuilds after.
+_BULK_INDEXES = {
+    "idx_sessions_type_day_task": _TYPE_DAY_INDEX_SQL,
+    "idx_sessions_type_task_day": _TYPE_TASK_INDEX_SQL,
+    "idx_sessions_type_day_ts": _TYPE_DAY_TS_INDEX_SQL,
+}
+
+
+# Per (session_type, day) totals from raw sessions plus compacted history;
+# what daily_rollup should contain.
+_DAILY_TOTALS_SQL = """
+    SELECT day, session_type, SUM(count) AS count, SUM(total) AS total FROM (
+        SELECT day, session_type, COUNT(*) AS count, SUM(duration_seconds) AS total
+        FROM sessions GROUP BY session_type, day
+        UNION ALL
+        SELECT day, session_type, SUM(count), SUM(total_seconds)
+        FROM session_archive GROUP BY session_type, day
+    )
+    GROUP BY session_type, day
+"""
+
+
+def _rebuild_rollup(conn, archive=True):
+    conn.execute("DELETE FROM daily_rollup")
+    if not archive:
+        conn.execute(
+            """INSERT INTO daily_rollup (day, session_type, count, total_seconds)
+               SELECT day, session_type, COUNT(*), SUM(duration_seconds)
+               FROM sessions
+               GROUP BY session_type, day"""
+        )
+        return
+    conn.execute(
+        f"""INSERT INTO daily_rollup (day, session_type, count, total_seconds)
+            SELECT day, session_type, count, total FROM ({_DAILY_TOTALS_SQL})"""
+    )
+
+
+def _months_before(day, months):
+    """The same day of the month ``months`` earlier, clamped to the month's end."""
+    month_index = day.year * 12 + day.month - 1 - months
+    year, month = divmod(month_index, 12)
+    month += 1
+    next_month = date(year + (month == 12), month % 12 + 1, 1)
+    return date(year, month, min(day.day, (next_month - timedelta(days=1)).day))
+
+
+def _compact(conn, cutoff):
+    """Fold sessions completed before ``cutoff`` (YYYY-MM-DD) into session_archive.
+
+    daily_rollup already counts these sessions and is left untouched, so
+    every stats query returns the same totals afterwards.
+    """
+    conn.execute(
+        """INSERT INTO session_archive (day, session_type, task_id, count, total_seconds)
+           SELECT day, session_type, COALESCE(task_id, 0), COUNT(*), SUM(duration_seconds)
+           FROM sessions WHERE day < ?
+           GROUP BY session_type, day, COALESCE(task_id, 0)
+           ON CONFLICT (session_type, day, task_id) DO UPDATE SET
+               count = count + excluded.count,
+               total_seconds = total_seconds + excluded.total_seconds""",
+        (cutoff,),
+    )
+    return conn.execute("DELETE FROM sessions WHERE day < ?", (cutoff,)).rowcount
+
+
+def _maintain(conn, cutoff):
+    """Compact (when ``cutoff`` is given), then return free pages and refresh planner stats."""
+    pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+    compacted = _compact(conn, cutoff) if cutoff else 0
+    conn.commit()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # Databases created before auto_vacuum was enabled need one full
+        # VACUUM for the setting to take effect.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    # Frees one page per step, and execute() only steps once; executescript
+    # runs it to completion.
+    conn.executescript("PRAGMA incremental_vacuum")
+    conn.execute("PRAGMA optimize")
+    # Vacuuming copies pages through the WAL; fold it back so the space is
+    # actually released on disk.
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    pages_after = conn.execute("PRAGMA page_count").fetchone()[0]
+    return {"compacted": compacted, "pages_freed": max(0, pages_before - pages_after)}
+
+
+def _refresh_task_usage(conn):
+    """Recount tasks.use_count (and last_used) from sessions and session_archive."""
+    conn.execute(
+        """UPDATE tasks SET use_count = usage.uses, last_used = MAX(tasks.last_used, usage.last)
+           FROM (
+               SELECT task_id, SUM(uses) AS uses, MAX(last) AS last FROM (
+                   SELECT task_id, COUNT(*) AS uses, MAX(completed_ts) AS last
+                   FROM sessions WHERE task_id IS NOT NULL GROUP BY task_id
+                   UNION ALL
+                   SELECT task_id, SUM(count), 0
+                   FROM session_archive WHERE task_id != 0 GROUP BY task_id
+               ) GROUP BY task_id
+           ) AS usage
+           WHERE tasks.id = usage.task_id"""
+    )
+
+
+def _insert_session(conn, record):
+    task_id = None
+    if record["task_label"]:
+        task_id = conn.execute(
+            """INSERT INTO tasks (label, use_count, last_used) VALUES (?, 1, ?)
+               ON CONFLICT (label) DO UPDATE SET
+                   use_count = use_count + 1,
+                   last_used = MAX(last_used, excluded.last_used)
+               RETURNING id""",
+            (record["task_label"], record["completed_ts"]),
+        ).fetchone()[0]
+    cur = conn.execute(
+        """INSERT INTO sessions (session_type, duration_seconds, task_id,
+                                 started_at, completed_at, completed_ts, day)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        (record["session_type"], record["duration_seconds"], task_id,
+         record["started_at"], record["completed_at"],
+         record["completed_ts"], record["day"]),
+    )
+    conn.execute(
+        """INSERT INTO daily_rollup (day, session_type, count, total_seconds)
+           VALUES (?, ?, 1, ?)
+           ON CONFLICT (session_type, day) DO UPDATE SET
+               count = count + 1,
+               total_seconds = total_seconds + excluded.total_seconds""",
+        (record["day"], record["session_type"], record["duration_seconds"]),
+    )
+    return cur.lastrowid
+
+
+_TODAY_SQL = """SELECT count, total_seconds FROM daily_rollup
+                WHERE session_type = 'work' AND day = ?"""
+
+_WEEK_SQL = """SELECT day, count, total_seconds FROM daily_rollup
+               WHERE session_type = 'work' AND day >= ?
+               ORDER BY day"""
+
+_ALL_TIME_SQL = """SELECT COALESCE(SUM(count), 0) as count,
+                          COALESCE(SUM(total_seconds), 0) as total
+                   FROM daily_rollup WHERE session_type = 'work'"""
+
+
+def _week_start():
+    return (date.today() - timedelta(days=6)).isoformat()
+
+
+# The _*_stats helpers combine committed rollup rows with pending (queued but
+# uncommitted) session records.
+
+def _today_stats(rows, pending, today):
+    count = rows[0]["count"] if rows else 0
+    total = rows[0]["total_seconds"] if rows else 0
+    for r in pending:
+        if r["session_type"] == "work" and r["day"] == today:
+            count += 1
+            total += r["duration_seconds"]
+    return {"pomodoros": count, "focus_seconds": total}
+
+
+def _week_stats(rows, pending, since):
+    days = {r["day"]: [r["count"], r["total_seconds"]] for r in rows}
+    for r in pending:
+        if r["session_type"] == "work" and r["day"] >= since:
+            totals = days.setdefault(r["day"], [0, 0])
+            totals[0] += 1
+            totals[1] += r["duration_seconds"]
+    return [{"day": day, "pomodoros": count, "focus_seconds": total}
+            for day, (count, total) in sorted(days.items())]
+
+
+def _all_time_stats(rows, pending):
+    count, total = rows[0]["count"], rows[0]["total"]
+    for r in pending:
+        if r["session_type"] == "work":
+            count += 1
+            total += r["duration_seconds"]
+    return {"pomodoros": count, "focus_seconds": total}
+
+
+def _day_totals(conn, start, end, session_type="work"):
+    """Days with sessions between two local days (inclusive), from daily_rollup."""
+    params = {"session_type": session_type, "start": str(start), "end": str(end)}
+    rows = conn.execute(timeseries.series_sql("day") + " ORDER BY bucket", params).fetchall()
+    return [{"day": r["bucket"], "pomodoros": r["count"], "focus_seconds": r["total"]} for r in rows]
+
+
+def _stats_summary(conn, history_since=None):
+    today = date.today().isoformat()
+    since = _week_start()
+    summary = {
+        "today": _today_stats(conn.execute(_TODAY_SQL, (today,)).fetchall(), [], today),
+        "week": _week_stats(conn.execute(_WEEK_SQL, (since,)).fetchall(), [], since),
+        "all_time": _all_time_stats(conn.execute(_ALL_TIME_SQL).fetchall(), []),
+    }
+    if history_since:
+        summary["history"] = _day_totals(conn, history_since, today)
+    return summary
+
+
+# Per-task work totals over an inclusive day range, raw and compacted
+# history combined; task_id is NULL for sessions without a task. Without
+# ANALYZE statistics the planner would rather use the task-ordered index to
+# skip the GROUP BY sort, but that reads every work session; a day-range
+# search is far cheaper for short ranges and no worse for all of history.
+# "+task_id" keeps the grouping from matching that index's order, which
+# steers the planner to the day index without failing if it is missing
+# (as INDEXED BY would).
+_TASK_TOTALS_SQL = """
+    SELECT t.label, x.count, x.total FROM (
+        SELECT task_id, SUM(count) AS count, SUM(total) AS total FROM (
+            SELECT task_id, COUNT(*) AS count, SUM(duration_seconds) AS total
+            FROM sessions
+            WHERE session_type = 'work' AND day BETWEEN :start AND :end
+            GROUP BY +task_id
+            UNION ALL
+            SELECT NULLIF(task_id, 0), count, total_seconds
+            FROM session_archive
+            WHERE session_type = 'work' AND day BETWEEN :start AND :end
+        ) GROUP BY task_id
+    ) AS x LEFT JOIN tasks t ON t.id = x.task_id
+    ORDER BY x.total DESC, t.label
+"""
+
+# {session_task} and {archive_task} select the task; see _task_daily_sql()
+_TASK_DAILY_SQL = """
+    SELECT day, SUM(count) AS count, SUM(total) AS total FROM (
+        SELECT day, COUNT(*) AS count, SUM(duration_seconds) AS total
+        FROM sessions
+        WHERE session_type = 'work' AND {session_task}
+              AND day BETWEEN :start AND :end
+        GROUP BY day
+        UNION ALL
+        SELECT day, count, total_seconds
+        FROM session_archive
+        WHERE session_type = 'work' AND {archive_task}
+              AND day BETWEEN :start AND :end
+    ) GROUP BY day ORDER BY day
+"""
+
+
+def _task_daily_sql(task):
+    # The label is resolved inside the query so that it shares the read
+    # snapshot; an unknown label matches nothing.
+    if task is None:
+        return _TASK_DAILY_SQL.format(session_task="task_id IS NULL", archive_task="task_id = 0")
+    by_label = "task_id = (SELECT id FROM tasks WHERE label = :task)"
+    return _TASK_DAILY_SQL.format(session_task=by_label, archive_task=by_label)
+
+
+# Open ends of a day range
+_FIRST_DAY = "0000-00-00"
+_LAST_DAY = "9999-99-99"
+
+
+def _day_range(start, end):
+    return {"start": str(start) if start else _FIRST_DAY, "end": str(end) if end else _LAST_DAY}
+
+
+def _task_totals(rows, pending, bounds):
+    """Merge per-task rows with pending records; returns {label: [count, total]}."""
+    totals = {r["label"]: [r["count"], r["total"]] for r in rows}
+    for r in pending:
+        if r["session_type"] == "work" and bounds["start"] <= r["day"] <= bounds["end"]:
+            entry = totals.setdefault(r["task_label"], [0, 0])
+            entry[0] += 1
+            entry[1] += r["duration_seconds"]
+    return totals
+
+
+# The _*_query helpers return (cache key, compute) for Database._cached();
+# compute(read) takes a function like Database._read().
+
+def _read_task_totals(read, start, end):
+    bounds = _day_range(start, end)
+    rows, pending = read(_TASK_TOTALS_SQL, bounds)
+    return _task_totals(rows, pending, bounds)
+
+
+def _top_tasks_query(start, end, limit):
+    def compute(read):
+        totals = _read_task_totals(read, start, end)
+        ranked = sorted(totals.items(), key=lambda item: (-item[1][1], item[0] or ""))
+        return [{"task": task, "pomodoros": count, "focus_seconds": total}
+                for task, (count, total) in ranked[:limit]]
+    return ("top_tasks", str(start), str(end), limit), compute
+
+
+def _task_counts_query(start, end):
+    def compute(read):
+        return {task: count for task, (count, _) in _read_task_totals(read, start, end).items()}
+    return ("task_counts", str(start), str(end)), compute
+
+
+def _task_daily_query(task, start, end):
+    def compute(read):
+        bounds = _day_range(start, end)
+        rows, pending = read(_task_daily_sql(task), dict(bounds, task=task))
+        days = {r["day"]: [r["count"], r["total"]] for r in rows}
+        for r in pending:
+            if (r["session_type"] == "work" and r["task_label"] == task
+                    and bounds["start"] <= r["day"] <= bounds["end"]):
+                entry = days.setdefault(r["day"], [0, 0])
+                entry[0] += 1
+                entry[1] += r["duration_seconds"]
+        return [{"day": day, "pomodoros": count, "focus_seconds": total}
+                for day, (count, total) in sorted(days.items())]
+    return ("task_daily", task, str(start), str(end)), compute
+
+
+class SessionWriter:
+    """Background thread that owns the write connection.
+
+    Session records are queued by the caller and committed in groups: each
+    wakeup drains whatever has accumulated (up to _WRITER_MAX_BATCH) into a
+    single transaction. Every queued item gets a Future that resolves once its
+    transaction has committed with synchronous=FULL.
+
+    Records stay in ``pending`` until committed. The commit also stores the
+    highest committed sequence number in writer_state, so a reader can tell
+    which pending records its own database snapshot already contains.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pending = {}
+        self._seq = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit_record(self, record):
+        future = Future()
+        with self.lock:
+            self._seq += 1
+            record["seq"] = self._seq
+            self.pending[self._seq] = record
+        self._queue.put(("record", record, future))
+        return future
+
+    def submit(self, fn):
+        """Run fn(conn) on the writer thread inside its own transaction."""
+        future = Future()
+        self._queue.put(("call", fn, future))
+        return future
+
+    def pending_snapshot(self):
+        with self.lock:
+            return list(self.pending.values())
+
+    def flush(self):
+        self.submit(lambda conn: None).result()
+
+    def close(self):
+        future = Future()
+        self._queue.put(("stop", None, future))
+        future.result()
+        self._thread.join()
+
+    def _run(self):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < _WRITER_MAX_BATCH:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                records = []
+                for kind, payload, future in batch:
+                    if kind == "record":
+                        records.append((payload, future))
+                        continue
+                    self._commit_records(conn, records)
+                    records = []
+                    if kind == "stop":
+                        future.set_result(None)
+                        return
+                    self._run_call(conn, payload, future)
+                self._commit_records(conn, records)
+        finally:
+            conn.close()
+
+    def _commit_records(self, conn, records):
+        if not records:
+            return
+        results = []
+        try:
+            with conn:
+                for record, _ in records:
+                    results.append(_insert_session(conn, record))
+                conn.execute(
+                    "UPDATE writer_state SET last_seq = ?", (records[-1][0]["seq"],)
+                )
+        except Exception as exc:
+            with self.lock:
+                for record, _ in records:
+                    self.pending.pop(record["seq"], None)
+            for _, future in records:
+                future.set_exception(exc)
+            return
+
+        with self.lock:
+            for record, _ in records:
+                self.pending.pop(record["seq"], None)
+        for (_, future), rowid in zip(records, results):
+            future.set_result(rowid)
+
+    def _run_call(self, conn, fn, future):
+        try:
+            with conn:
+                result = fn(conn)
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
 
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
         self.conn.row_factory = sqlite3.Row
+        # Only takes effect for new files; maintain() converts older ones.
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
         self._create_tables()
+        self._migrate()
+        # A no-op normally; restores indexes a crashed import of an older
+        # version could have left dropped, which _migrate() would not notice.
+        for sql in _BULK_INDEXES.values():
+            self.conn.execute(sql)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Sequence numbers restart with every writer, so forget the last run's.
+        self.conn.execute("UPDATE writer_state SET last_seq = 0")
+        self.conn.commit()
+        self._writer = SessionWriter(path)
+        self._task_index = None
+        # While the index is being built: its Future, and the uses since
+        self._task_index_future = None
+        self._task_touches = []
+        # Per-task results, valid while _generation is unchanged; bumped by
+        # every write that can change them.
+        self._generation = 0
+        self._analytics_cache = {}
+        self._analytics_generation = 0
+        # The *_async variants fill the cache from the writer thread
+        self._analytics_lock = threading.Lock()
+        # Time-series buckets that have closed, which only a backdated
+        # session can change; see _evict_series(). Cleared by bulk imports
+        # and compaction.
+        self._series_cache = {}
 
     def _create_tables(self):
+        # completed_ts is the completion time as integer epoch seconds and day
+        # is its local calendar date (YYYY-MM-DD). Stats filter on these plain
+        # columns so SQLite can use an index on them instead of scanning.
         self.conn.execute("""
             CREATE TABLE IF NOT EXISTS sessions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -20,50 +509,657 @@ class Database:
                 duration_seconds INTEGER NOT NULL,
                 task_label TEXT,
                 started_at TEXT NOT NULL,
-                completed_at TEXT NOT NULL
+                completed_at TEXT NOT NULL,
+                completed_ts INTEGER,
+                day TEXT
             )
         """)
         self.conn.commit()
 
-    def record_session(self, session_type, duration_seconds, task_label, started_at):
+    def _migrate(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        self.conn.execute("BEGIN")
+        try:
+            if version < 1:
+                self._migrate_v1()
+            if version < 2:
+                self._migrate_v2()
+            if version < 3:
+                self._migrate_v3()
+            if version < 4:
+                self._migrate_v4()
+            if version < 5:
+                self._migrate_v5()
+            if version < 6:
+                self._migrate_v6()
+            if version < 7:
+                self._migrate_v7()
+            if version < 8:
+                self._migrate_v8()
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _migrate_v1(self):
+        columns = {r["name"] for r in self.conn.execute("PRAGMA table_info(sessions)")}
+        if "completed_ts" not in columns:
+            self.conn.execute("ALTER TABLE sessions ADD COLUMN completed_ts INTEGER")
+        if "day" not in columns:
+            self.conn.execute("ALTER TABLE sessions ADD COLUMN day TEXT")
+
+        # completed_at was written with datetime.now().isoformat(), i.e. naive
+        # local time, so the conversion has to happen in Python: SQLite's own
+        # date functions would treat it as UTC.
+        last_id = 0
+        while True:
+            rows = self.conn.execute(
+                """SELECT id, completed_at FROM sessions
+                   WHERE id > ? AND completed_ts IS NULL
+                   ORDER BY id LIMIT ?""",
+                (last_id, _MIGRATION_BATCH),
+            ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for r in rows:
+                completed = datetime.fromisoformat(r["completed_at"])
+                updates.append((int(completed.timestamp()), completed.strftime("%Y-%m-%d"), r["id"]))
+            self.conn.executemany(
+                "UPDATE sessions SET completed_ts = ?, day = ? WHERE id = ?", updates
+            )
+            last_id = rows[-1]["id"]
+
         self.conn.execute(
-            """INSERT INTO sessions (session_type, duration_seconds, task_label, started_at, completed_at)
-               VALUES (?, ?, ?, ?, ?)""",
-            (session_type, duration_seconds, task_label,
-             datetime.fromtimestamp(started_at).isoformat(),
-             datetime.now().isoformat()),
+            """CREATE INDEX IF NOT EXISTS idx_sessions_type_day
+               ON sessions (session_type, day, duration_seconds)"""
         )
-        self.conn.commit()
+
+    def _migrate_v2(self):
+        # One row per (day, session_type), kept in step with sessions by
+        # record_session so stats never have to aggregate raw history.
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS daily_rollup (
+                day TEXT NOT NULL,
+                session_type TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                total_seconds INTEGER NOT NULL,
+                PRIMARY KEY (session_type, day)
+            ) WITHOUT ROWID
+        """)
+        # session_archive only appears in v5
+        _rebuild_rollup(self.conn, archive=False)
+
+    def _migrate_v3(self):
+        # Highest SessionWriter sequence number whose transaction has committed.
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS writer_state (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                last_seq INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("INSERT OR IGNORE INTO writer_state (id, last_seq) VALUES (0, 0)")
+
+    def _migrate_v4(self):
+        # Duplicate detection for import_sessions(). Not UNIQUE: older
+        # databases may already hold duplicates, and task_label is nullable.
+        self.conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_sessions_identity
+               ON sessions (started_at, session_type, task_label)"""
+        )
+
+    def _migrate_v5(self):
+        # Per-day, per-task totals of sessions removed by compaction; an
+        # empty task_label stands for "no task" so it can be part of the key.
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_archive (
+                day TEXT NOT NULL,
+                session_type TEXT NOT NULL,
+                task_label TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                total_seconds INTEGER NOT NULL,
+                PRIMARY KEY (session_type, day, task_label)
+            ) WITHOUT ROWID
+        """)
+
+    def _migrate_v6(self):
+        # Task labels are interned once in tasks, with usage counts for
+        # autocomplete; sessions and session_archive refer to them by id.
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                label TEXT NOT NULL UNIQUE,
+                use_count INTEGER NOT NULL DEFAULT 0,
+                last_used INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.execute(
+            """INSERT OR IGNORE INTO tasks (label)
+               SELECT DISTINCT task_label FROM sessions WHERE task_label != ''
+               UNION
+               SELECT task_label FROM session_archive WHERE task_label != ''"""
+        )
+
+        self.conn.execute("ALTER TABLE sessions ADD COLUMN task_id INTEGER REFERENCES tasks (id)")
+        self.conn.execute(
+            """UPDATE sessions SET task_id = tasks.id
+               FROM tasks WHERE tasks.label = sessions.task_label"""
+        )
+        self.conn.execute("DROP INDEX IF EXISTS idx_sessions_identity")
+        self.conn.execute("ALTER TABLE sessions DROP COLUMN task_label")
+        self.conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_sessions_identity
+               ON sessions (started_at, session_type, task_id)"""
+        )
+
+        # task_id 0 stands for "no task" in the archive key
+        self.conn.execute("""
+            CREATE TABLE session_archive_new (
+                day TEXT NOT NULL,
+                session_type TEXT NOT NULL,
+                task_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                total_seconds INTEGER NOT NULL,
+                PRIMARY KEY (session_type, day, task_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute(
+            """INSERT INTO session_archive_new (day, session_type, task_id, count, total_seconds)
+               SELECT a.day, a.session_type, COALESCE(t.id, 0), SUM(a.count), SUM(a.total_seconds)
+               FROM session_archive a LEFT JOIN tasks t ON t.label = a.task_label
+               GROUP BY a.session_type, a.day, COALESCE(t.id, 0)"""
+        )
+        self.conn.execute("DROP TABLE session_archive")
+        self.conn.execute("ALTER TABLE session_archive_new RENAME TO session_archive")
+        _refresh_task_usage(self.conn)
+
+    def _migrate_v7(self):
+        # Per-task analytics. idx_sessions_type_day_task extends the old
+        # (session_type, day, duration_seconds) index, which it replaces.
+        self.conn.execute("DROP INDEX IF EXISTS idx_sessions_type_day")
+        self.conn.execute(_TYPE_DAY_INDEX_SQL)
+        self.conn.execute(_TYPE_TASK_INDEX_SQL)
+        self.conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_archive_type_task_day
+               ON session_archive (session_type, task_id, day, count, total_seconds)"""
+        )
+
+    def _migrate_v8(self):
+        self.conn.execute(_TYPE_DAY_TS_INDEX_SQL)
+
+    def _read(self, sql, params=()):
+        """Run a stats query and return (rows, uncommitted pending records).
+
+        The pending list is copied before the query so that any record missing
+        from it has already been committed, and the query and watermark share
+        one read transaction so they describe the same snapshot.
+        """
+        pending = self._writer.pending_snapshot()
+        self.conn.execute("BEGIN")
+        try:
+            rows = self.conn.execute(sql, params).fetchall()
+            watermark = self.conn.execute("SELECT last_seq FROM writer_state").fetchone()[0]
+        finally:
+            self.conn.commit()
+        return rows, [r for r in pending if r["seq"] > watermark]
+
+    def rebuild_rollup(self):
+        self._writer.submit(_rebuild_rollup).result()
+
+    def check_rollup(self):
+        """Compare daily_rollup against raw sessions plus session_archive.
+
+        Returns a list of (day, session_type, rollup, actual) tuples where the
+        two disagree; rollup and actual are (count, total_seconds) or None.
+        """
+        self.conn.execute("BEGIN")
+        try:
+            actual = {
+                (r["day"], r["session_type"]): (r["count"], r["total"])
+                for r in self.conn.execute(_DAILY_TOTALS_SQL)
+            }
+            rollup = {
+                (r["day"], r["session_type"]): (r["count"], r["total_seconds"])
+                for r in self.conn.execute("SELECT * FROM daily_rollup")
+            }
+        finally:
+            self.conn.commit()
+        mismatches = []
+        for key in sorted(actual.keys() | rollup.keys()):
+            if actual.get(key) != rollup.get(key):
+                mismatches.append((key[0], key[1], rollup.get(key), actual.get(key)))
+        return mismatches
+
+    def record_session(self, session_type, duration_seconds, task_label, started_at,
+                       completed_at=None):
+        """Queue a session for the background writer.
+
+        ``completed_at`` (epoch seconds) defaults to now. Returns a Future
+        that resolves to the new row id once the write is durable. Stats
+        reads include the session immediately.
+        """
+        completed_ts = time.time() if completed_at is None else completed_at
+        record = {
+            "session_type": session_type,
+            "duration_seconds": duration_seconds,
+            "task_label": task_label,
+            "started_at": datetime.fromtimestamp(started_at).isoformat(),
+            "completed_at": datetime.fromtimestamp(completed_ts).isoformat(),
+            "completed_ts": int(completed_ts),
+            "day": _local_day(completed_ts),
+        }
+        self._generation += 1
+        self._evict_series(record)
+        if self._task_index is not None:
+            self._task_index.touch(task_label, int(completed_ts))
+        elif self._task_index_future is not None:
+            self._task_touches.append((task_label, int(completed_ts)))
+        return self._writer.submit_record(record)
+
+    def _evict_series(self, record):
+        # A session completed now lands in open buckets, which are never
+        # cached; one recorded late (e.g. recovered after a crash) may not.
+        for (kind, detail), cache in list(self._series_cache.items()):
+            if kind == "heatmap":
+                if detail == record["session_type"]:
+                    cache.pop(record["day"][:7], None)
+            elif kind == record["session_type"]:
+                cache.pop(timeseries.pending_key(detail, record), None)
+
+    def suggest_tasks(self, prefix):
+        """Previously used task labels starting with ``prefix``, most used first.
+
+        Returns [] until the label index has been built by
+        warm_task_index(), which the first call starts if need be. The
+        index is then kept current by record_session(); call from one
+        thread (the Tk thread in the app).
+        """
+        if self._task_index is None:
+            future = self.warm_task_index()
+            if not future.done() or future.exception() is not None:
+                return []
+            self._task_index = future.result()
+            # Sessions recorded after the index was queued are not in it
+            for label, when in self._task_touches:
+                self._task_index.touch(label, when)
+            self._task_touches = []
+        return self._task_index.suggest(prefix)
+
+    def warm_task_index(self):
+        """Build the task label index on the writer thread; returns a Future.
+
+        Loading and sorting every label takes a while on a long history,
+        too long for the first keystroke on the Tk thread.
+        """
+        if self._task_index_future is None:
+            from task_index import TaskIndex
+
+            def build(conn):
+                rows = conn.execute("SELECT label, use_count, last_used FROM tasks").fetchall()
+                index = TaskIndex(lambda: rows)
+                index.load()
+                return index
+            self._task_touches = []
+            self._task_index_future = self._writer.submit(build)
+        return self._task_index_future
+
+    def flush(self):
+        """Block until every queued write has committed."""
+        self._writer.flush()
 
     def get_today_stats(self):
-        today = datetime.now().strftime("%Y-%m-%d")
-        row = self.conn.execute(
-            """SELECT COUNT(*) as count, COALESCE(SUM(duration_seconds), 0) as total
-               FROM sessions
-               WHERE session_type = 'work' AND date(completed_at) = ?""",
-            (today,),
-        ).fetchone()
-        return {"pomodoros": row["count"], "focus_seconds": row["total"]}
+        today = date.today().isoformat()
+        rows, pending = self._read(_TODAY_SQL, (today,))
+        return _today_stats(rows, pending, today)
 
     def get_week_stats(self):
-        rows = self.conn.execute(
-            """SELECT date(completed_at) as day,
-                      COUNT(*) as count,
-                      SUM(duration_seconds) as total
-               FROM sessions
-               WHERE session_type = 'work'
-                 AND date(completed_at) >= date('now', '-6 days')
-               GROUP BY date(completed_at)
-               ORDER BY day"""
-        ).fetchall()
-        return [{"day": r["day"], "pomodoros": r["count"], "focus_seconds": r["total"]} for r in rows]
+        series = self.time_series(_week_start(), date.today(), "day")
+        return [{"day": b["bucket"], "pomodoros": b["pomodoros"], "focus_seconds": b["focus_seconds"]}
+                for b in series if b["pomodoros"]]
 
     def get_all_time_stats(self):
-        row = self.conn.execute(
-            """SELECT COUNT(*) as count, COALESCE(SUM(duration_seconds), 0) as total
-               FROM sessions WHERE session_type = 'work'"""
-        ).fetchone()
-        return {"pomodoros": row["count"], "focus_seconds": row["total"]}
+        rows, pending = self._read(_ALL_TIME_SQL)
+        return _all_time_stats(rows, pending)
+
+    def get_stats_summary(self):
+        return {
+            "today": self.get_today_stats(),
+            "week": self.get_week_stats(),
+            "all_time": self.get_all_time_stats(),
+        }
+
+    def get_stats_summary_async(self, history_since=None):
+        """Compute get_stats_summary() on the writer thread; returns a Future.
+
+        With ``history_since``, the summary also has "history": work totals
+        for each day with sessions from then through today, like "week",
+        which saves the UI from querying on its own thread.
+
+        The writer handles its queue in order, so the result includes every
+        session recorded before this call.
+        """
+        return self._writer.submit(
+            lambda conn: _stats_summary(conn, history_since))
+
+    def get_day_totals_async(self, start, end, session_type="work"):
+        """Totals for each day with sessions between two local days, as a Future.
+
+        Computed on the writer thread; returns [{"day", "pomodoros",
+        "focus_seconds"}] in day order.
+        """
+        return self._writer.submit(lambda conn: _day_totals(conn, start, end, session_type))
+
+    def export_sessions(self, dest, fmt="csv", **options):
+        """Stream session history to a file; see session_io.export_sessions().
+
+        Queued sessions are committed first so the export includes them.
+        Safe to call from any thread.
+        """
+        import session_io
+        self._writer.flush()
+        return session_io.export_sessions(self.path, dest, fmt, **options)
+
+    def import_sessions(self, source, fmt=None, **options):
+        """Bulk-load sessions from CSV or JSON Lines; see session_io.import_sessions().
+
+        Runs on the writer thread, so sessions recorded meanwhile simply wait
+        their turn. The session indexes are dropped for the duration and
+        rebuilt once at the end, together with daily_rollup, instead of being
+        updated row by row. All of it is one transaction, so a failed or
+        interrupted import leaves the database as it was, indexes included.
+        Rows on days that have already been compacted into session_archive
+        are skipped, as they can no longer be checked for duplicates.
+        Returns the import counts and rows per second.
+        """
+        import session_io
+
+        def run(conn):
+            # DDL does not open a transaction implicitly
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            archived_through = conn.execute("SELECT MAX(day) FROM session_archive").fetchone()[0]
+            for name in _BULK_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            result = session_io.import_sessions(conn, source, fmt, skip_through=archived_through,
+                                                commit=False, **options)
+            for sql in _BULK_INDEXES.values():
+                conn.execute(sql)
+            _rebuild_rollup(conn)
+            _refresh_task_usage(conn)
+            return result
+
+        try:
+            return self._writer.submit(run).result()
+        finally:
+            self._task_index = None
+            self._task_index_future = None
+            self._generation += 1
+            self._series_cache.clear()
+
+    def maintain(self, retention_months=0):
+        """Compact and tidy the database on the writer thread; returns a Future.
+
+        With ``retention_months`` > 0, sessions completed more than that many
+        months ago are summarised into session_archive and deleted. Freed
+        pages are then returned to the filesystem (incremental vacuum) and
+        PRAGMA optimize refreshes the query planner statistics. The Future's
+        result is {"compacted": rows removed, "pages_freed": n}.
+        """
+        cutoff = None
+        if retention_months > 0:
+            cutoff = _months_before(date.today(), retention_months).isoformat()
+        future = self._writer.submit(lambda conn: _maintain(conn, cutoff))
+        if cutoff:
+            # Hourly series of compacted days are gone now
+            future.add_done_callback(lambda f: self._series_cache.clear())
+        return future
+
+    def size_report(self, repeat=20):
+        """File size, row counts and stats-query latency, for before/after comparisons."""
+        self.flush()
+        files = [self.path, self.path + "-wal"]
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.get_stats_summary()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+
+        def pragma(name):
+            return self.conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+        return {
+            "file_bytes": sum(os.path.getsize(f) for f in files if os.path.exists(f)),
+            "page_size": pragma("page_size"),
+            "page_count": pragma("page_count"),
+            "freelist_pages": pragma("freelist_count"),
+            "sessions": self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+            "archive_rows": self.conn.execute("SELECT COUNT(*) FROM session_archive").fetchone()[0],
+            "stats_median_ms": timings[len(timings) // 2] * 1000,
+            "stats_max_ms": timings[-1] * 1000,
+        }
+
+    def time_series(self, start, end, bucket="day", session_type="work"):
+        """Session totals per time bucket between two local days (inclusive).
+
+        ``bucket`` is one of timeseries.BUCKETS; the range is widened to
+        whole buckets and every bucket is listed, empty ones included.
+        Returns [{"bucket", "pomodoros", "focus_seconds"}] in order; heatmap
+        buckets are (weekday, hour) tuples, Monday first.
+
+        Buckets that ended before now are memoised (up to
+        SERIES_CACHE_BUCKETS per series), so repeated calls only query the
+        open bucket and any not seen before. record_session() drops the
+        bucket a backdated session falls in.
+        """
+        start, end = timeseries.as_date(start), timeseries.as_date(end)
+        if bucket == "heatmap":
+            return self._heatmap(start, end, session_type)
+
+        spans = timeseries.spans(bucket, start, end)
+        cache = self._series_cache.setdefault((session_type, bucket), OrderedDict())
+        missing = [span for span in spans if span[0] not in cache]
+        fresh = {}
+        if missing:
+            params = {"session_type": session_type,
+                      "start": missing[0][1].isoformat(), "end": missing[-1][2].isoformat()}
+            rows, pending = self._read(timeseries.series_sql(bucket), params)
+            fresh = self._merge_series(rows, pending, bucket, params)
+            now = datetime.now()
+            for key, _, _, ends_at in missing:
+                if ends_at <= now:
+                    cache[key] = fresh.get(key, (0, 0))
+        result = []
+        for key, _, _, _ in spans:
+            if key in cache:
+                cache.move_to_end(key)
+                count, total = cache[key]
+            else:
+                count, total = fresh.get(key, (0, 0))
+            result.append({"bucket": key, "pomodoros": count, "focus_seconds": total})
+        while len(cache) > SERIES_CACHE_BUCKETS:
+            cache.popitem(last=False)
+        return result
+
+    def _merge_series(self, rows, pending, bucket, params):
+        totals = {r["bucket"]: (r["count"], r["total"]) for r in rows}
+        for r in pending:
+            if (r["session_type"] == params["session_type"]
+                    and params["start"] <= r["day"] <= params["end"]):
+                key = timeseries.pending_key(bucket, r)
+                count, total = totals.get(key, (0, 0))
+                totals[key] = (count + 1, total + r["duration_seconds"])
+        return totals
+
+    def _heatmap(self, start, end, session_type):
+        # Each whole month that is over is memoised under its "YYYY-MM" key,
+        # which stays valid as days pass; partial months at either end of the
+        # range, and the current month, are queried every time.
+        cache = self._series_cache.setdefault(("heatmap", session_type), OrderedDict())
+        now = datetime.now()
+        grid = {}
+        for key, month_first, month_last, ends_at in timeseries.spans("month", start, end):
+            first, last = max(start, month_first), min(end, month_last)
+            closed = ends_at <= now and (first, last) == (month_first, month_last)
+            totals = cache.get(key) if closed else None
+            if totals is None:
+                params = {"session_type": session_type,
+                          "start": first.isoformat(), "end": last.isoformat()}
+                rows, pending = self._read(timeseries.HEATMAP_SQL, params)
+                rows = [{"bucket": (r["weekday"], r["hour"]), "count": r["count"],
+                         "total": r["total"]} for r in rows]
+                totals = self._merge_series(rows, pending, "heatmap", params)
+                if closed:
+                    cache[key] = totals
+                    if len(cache) > HEATMAP_CACHE_MONTHS:
+                        cache.popitem(last=False)
+            else:
+                cache.move_to_end(key)
+            for bucket, (count, total) in totals.items():
+                c, t = grid.get(bucket, (0, 0))
+                grid[bucket] = (c + count, t + total)
+        return [{"bucket": (weekday, hour), "pomodoros": grid.get((weekday, hour), (0, 0))[0],
+                 "focus_seconds": grid.get((weekday, hour), (0, 0))[1]}
+                for weekday in range(7) for hour in range(24)]
+
+    def _cached(self, key, compute):
+        """compute(read) memoised until the next write; read is like _read()."""
+        with self._analytics_lock:
+            if self._analytics_generation != self._generation:
+                self._analytics_cache.clear()
+                self._analytics_generation = self._generation
+            if key in self._analytics_cache:
+                return self._analytics_cache[key]
+        result = compute(self._read)
+        with self._analytics_lock:
+            if self._analytics_generation == self._generation:
+                self._analytics_cache[key] = result
+        return result
+
+    def _cached_async(self, key, compute):
+        """_cached() on the writer thread; returns a Future.
+
+        A cached result comes back as an already completed Future. The writer
+        has committed everything queued before the call, so there are no
+        pending records to merge.
+        """
+        generation = self._generation
+        with self._analytics_lock:
+            if self._analytics_generation != generation:
+                self._analytics_cache.clear()
+                self._analytics_generation = generation
+            if key in self._analytics_cache:
+                future = Future()
+                future.set_result(self._analytics_cache[key])
+                return future
+
+        def run(conn):
+            result = compute(lambda sql, params: (conn.execute(sql, params).fetchall(), []))
+            with self._analytics_lock:
+                # A session recorded since the call may be missing from result
+                if self._analytics_generation == generation == self._generation:
+                    self._analytics_cache[key] = result
+            return result
+        return self._writer.submit(run)
+
+    def top_tasks(self, start=None, end=None, limit=10):
+        """Tasks with the most work time between two local days (inclusive).
+
+        ``start``/``end`` are dates or YYYY-MM-DD; None leaves that end open.
+        Returns [{"task", "pomodoros", "focus_seconds"}] by focus time, with
+        task None for sessions recorded without a label. Results are cached
+        until the next record_session(). Don't mutate them.
+        """
+        return self._cached(*_top_tasks_query(start, end, limit))
+
+    def top_tasks_async(self, start=None, end=None, limit=10):
+        """top_tasks() computed on the writer thread; returns a Future."""
+        return self._cached_async(*_top_tasks_query(start, end, limit))
+
+    def task_session_counts(self, start=None, end=None):
+        """{task label (or None): work sessions} between two local days; cached like top_tasks()."""
+        return self._cached(*_task_counts_query(start, end))
+
+    def task_session_counts_async(self, start=None, end=None):
+        """task_session_counts() computed on the writer thread; returns a Future."""
+        return self._cached_async(*_task_counts_query(start, end))
+
+    def task_daily_series(self, task, start=None, end=None):
+        """Work totals per local day for one task label (None: no task); cached like top_tasks().
+
+        Returns [{"day", "pomodoros", "focus_seconds"}] for days with sessions.
+        """
+        return self._cached(*_task_daily_query(task, start, end))
+
+    def task_daily_series_async(self, task, start=None, end=None):
+        """task_daily_series() computed on the writer thread; returns a Future."""
+        return self._cached_async(*_task_daily_query(task, start, end))
 
     def close(self):
+        """Flush queued writes, stop the writer thread and close connections."""
+        self._writer.close()
         self.conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pomodoro database maintenance")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild-rollup", help="regenerate daily_rollup from raw sessions")
+    sub.add_parser("check-rollup", help="verify daily_rollup against raw sessions")
+    export = sub.add_parser("export", help="stream session history to CSV or JSON Lines")
+    export.add_argument("path", help="output file; a .gz suffix compresses it")
+    export.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    export.add_argument("--from", dest="start", metavar="YYYY-MM-DD", help="first day to include")
+    export.add_argument("--to", dest="end", metavar="YYYY-MM-DD", help="last day to include")
+    export.add_argument("--task", help="only sessions with this exact task label")
+    imp = sub.add_parser("import", help="bulk-load sessions from CSV or JSON Lines")
+    imp.add_argument("path", help="input file (.csv, .jsonl, optionally .gz)")
+    imp.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file name")
+    compact = sub.add_parser("compact", help="summarise old sessions and reclaim space")
+    compact.add_argument("--months", type=int, default=0,
+                         help="keep raw sessions for this many months (default: only vacuum)")
+    sub.add_parser("report", help="show database size and stats query latency")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        if args.command == "rebuild-rollup":
+            db.rebuild_rollup()
+            print("daily_rollup rebuilt")
+        elif args.command == "check-rollup":
+            mismatches = db.check_rollup()
+            for day, session_type, rollup, actual in mismatches:
+                print(f"{day} {session_type}: rollup={rollup} actual={actual}")
+            print(f"{len(mismatches)} mismatched day(s)")
+            raise SystemExit(1 if mismatches else 0)
+        elif args.command == "export":
+            count = db.export_sessions(args.path, args.format, start=args.start,
+                                       end=args.end, task=args.task)
+            print(f"exported {count} session(s) to {args.path}")
+        elif args.command == "import":
+            result = db.import_sessions(args.path, args.format)
+            print(f"read {result['read']}, inserted {result['inserted']}, "
+                  f"skipped {result['duplicates']} duplicate(s) and {result['archived']} archived, "
+                  f"rejected {result['rejected']} "
+                  f"in {result['seconds']:.1f} s ({result['rows_per_second']:,.0f} rows/s)")
+        elif args.command == "report":
+            for key, value in db.size_report().items():
+                print(f"{key:>16}: {value:,.2f}" if isinstance(value, float) else f"{key:>16}: {value:,}")
+        elif args.command == "compact":
+            before = db.size_report()
+            result = db.maintain(args.months).result()
+            after = db.size_report()
+            print(f"compacted {result['compacted']:,} session(s), freed {result['pages_freed']:,} page(s)")
+            print(f"{'':>16}  {'before':>14}  {'after':>14}")
+            for key in before:
+                fmt = ",.2f" if isinstance(before[key], float) else ","
+                print(f"{key:>16}  {before[key]:>14{fmt}}  {after[key]:>14{fmt}}")
+    finally:
+        db.close()
@@ -1,36 +1,154 @@
 import os
 import threading
-import winsound
+import time
+from collections import deque
+
+from audio import AudioPlayer, Sound
 
 ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
 ALARM_PATH = os.path.join(ASSETS_DIR, "alarm.wav")
 
+_player = None
+_dispatcher = None
+
+
+class PlyerBackend:
+    def __init__(self):
+        self._notification = None
 
-def send_toast(title, message):
-    def _notify():
-        try:
+    def notify(self, title, message):
+        if self._notification is None:
+            # Imported once, on the dispatcher thread
             from plyer import notification
-            notification.notify(
-                title=title,
-                message=message,
-                app_name="Pomodoro Timer",
-                timeout=5,
-            )
-        except Exception:
-            pass
+            self._notification = notification
+        self._notification.notify(
+            title=title,
+            message=message,
+            app_name="Pomodoro Timer",
+            timeout=5,
+        )
+
+
+class StubBackend:
+    """Records notifications in-process instead of showing them."""
+
+    def __init__(self):
+        self.delivered = []
+
+    def notify(self, title, message):
+        self.delivered.append((title, message))
+
+
+class NotificationDispatcher:
+    """One worker thread delivering toasts from a bounded queue.
+
+    A pending toast with the same ``key`` is replaced rather than queued
+    again, and an exact duplicate of a pending toast is dropped. When the
+    queue is full, send() either waits for room (``block=True``) or evicts
+    the oldest pending toast, so a burst never grows without bound.
+    """
+
+    def __init__(self, backend=None, maxsize=8, clock=time.monotonic):
+        self.backend = backend if backend is not None else PlyerBackend()
+        self.maxsize = maxsize
+        self._clock = clock
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._latencies = deque(maxlen=1000)
+        self._counts = {"sent": 0, "failed": 0, "dropped": 0, "coalesced": 0}
+        self._busy = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def send(self, title, message, key=None, block=False, timeout=None):
+        """Queue a toast; returns False if it was rejected for lack of room."""
+        item = (key, title, message, self._clock())
+        with self._cond:
+            for i, (pending_key, pending_title, pending_message, _) in enumerate(self._pending):
+                if key is not None and pending_key == key:
+                    self._pending[i] = item
+                    self._counts["coalesced"] += 1
+                    return True
+                if (pending_title, pending_message) == (title, message):
+                    self._counts["coalesced"] += 1
+                    return True
+            if len(self._pending) >= self.maxsize:
+                if block:
+                    if not self._cond.wait_for(lambda: len(self._pending) < self.maxsize, timeout):
+                        self._counts["dropped"] += 1
+                        return False
+                else:
+                    self._pending.popleft()
+                    self._counts["dropped"] += 1
+            self._pending.append(item)
+            self._cond.notify_all()
+        return True
+
+    def metrics(self):
+        with self._cond:
+            metrics = dict(self._counts, queued=len(self._pending))
+            latencies = sorted(self._latencies)
+        if latencies:
+            metrics["latency_ms"] = {
+                "median": latencies[len(latencies) // 2] * 1000,
+                "max": latencies[-1] * 1000,
+            }
+        return metrics
+
+    def wait_idle(self, timeout=None):
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                _, title, message, queued_at = self._pending.popleft()
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                self.backend.notify(title, message)
+                ok = True
+            except Exception:
+                ok = False
+            with self._cond:
+                self._counts["sent" if ok else "failed"] += 1
+                self._latencies.append(self._clock() - queued_at)
+                self._busy = False
+                self._cond.notify_all()
+
+
+def get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher()
+    return _dispatcher
+
+
+def send_toast(title, message, key=None):
+    get_dispatcher().send(title, message, key=key)
+
+
+def _load_alarm():
+    if os.path.exists(ALARM_PATH):
+        return Sound.from_wav(ALARM_PATH)
+    # Fallback when assets haven't been generated: render the default chime
+    from synth import chime_params, render_chime
+    params = chime_params()
+    return Sound(render_chime(**params), params["sample_rate"], params["channels"])
+
+
+def get_player():
+    global _player
+    if _player is None:
+        _player = AudioPlayer()
+        _player.register("alarm", _load_alarm)
+    return _player
+
 
-    t = threading.Thread(target=_notify, daemon=True)
-    t.start()
+def preload_sound():
+    get_player().preload("alarm")
 
 
 def play_sound():
-    try:
-        if os.path.exists(ALARM_PATH):
-            winsound.PlaySound(ALARM_PATH, winsound.SND_FILENAME | winsound.SND_ASYNC)
-        else:
-            # Fallback: system beep sequence
-            for _ in range(3):
-                winsound.Beep(800, 300)
-                winsound.Beep(0, 150)
-    except Exception:
-        pass
+    get_player().play("alarm")
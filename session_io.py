@@ -0,0 +1,230 @@
+"""Streaming export and import of session history.
+
+Exports read rows in keyset-paginated batches (WHERE id > last ORDER BY id
+LIMIT n) inside a single read transaction, and write them out as each
+batch arrives. Memory use therefore depends on the batch size, not on the
+size of the history. Exports open their own connection, so they can run on
+any thread while the app keeps recording.
+
+Imports read CSV or JSON Lines (optionally gzipped) one row at a time and
+insert them with executemany, committing every IMPORT_BATCH rows unless
+the caller owns the transaction (commit=False). Rows whose (started_at, session_type, task_label) is already present are
+skipped. Index, rollup and task-usage maintenance is left to the caller; see
+Database.import_sessions().
+"""
+import csv
+import gzip
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+EXPORT_COLUMNS = ("id", "session_type", "duration_seconds", "task_label",
+                  "started_at", "completed_at")
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_BATCH = 1000
+IMPORT_BATCH = 50000
+
+
+def _filters(start, end, task):
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("s.day >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append("s.day <= ?")
+        params.append(str(end))
+    if task is not None:
+        clauses.append("s.task_id = (SELECT id FROM tasks WHERE label = ?)")
+        params.append(task)
+    return clauses, params
+
+
+def _open_output(dest, compress):
+    if hasattr(dest, "write"):
+        return dest, False
+    if compress:
+        # Level 6 is several times faster than the default 9 for a few % more bytes
+        return gzip.open(dest, "wt", compresslevel=6, encoding="utf-8", newline=""), True
+    return open(dest, "w", encoding="utf-8", newline=""), True
+
+
+def export_sessions(db_path, dest, fmt="csv", start=None, end=None, task=None,
+                    compress=None, progress=None, batch_size=EXPORT_BATCH):
+    """Write sessions to ``dest`` (a path or text file object); returns the row count.
+
+    ``start``/``end`` are inclusive local dates (date or YYYY-MM-DD) and
+    ``task`` matches task labels exactly. ``compress`` defaults to True for
+    paths ending in .gz. ``progress(done, total)`` is called after each batch.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format: {fmt!r}")
+    if compress is None:
+        compress = isinstance(dest, str) and dest.endswith(".gz")
+
+    clauses, params = _filters(start, end, task)
+    where = " AND ".join(["s.id > ?"] + clauses)
+    sql = f"""SELECT s.id, s.session_type, s.duration_seconds, t.label,
+                     s.started_at, s.completed_at
+              FROM sessions s LEFT JOIN tasks t ON t.id = s.task_id
+              WHERE {where} ORDER BY s.id LIMIT ?"""
+
+    conn = sqlite3.connect(db_path)
+    out, owns_output = _open_output(dest, compress)
+    written = 0
+    try:
+        conn.execute("BEGIN")
+        total = None
+        if progress is not None:
+            count_where = " AND ".join(clauses) or "1"
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM sessions s WHERE {count_where}", params
+            ).fetchone()[0]
+            progress(0, total)
+
+        writer = csv.writer(out) if fmt == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_COLUMNS)
+
+        last_id = 0
+        while True:
+            rows = conn.execute(sql, [last_id] + params + [batch_size]).fetchall()
+            if not rows:
+                break
+            if writer:
+                writer.writerows(rows)
+            else:
+                out.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows)
+            written += len(rows)
+            last_id = rows[-1][0]
+            if progress is not None:
+                progress(written, total)
+    finally:
+        conn.close()
+        if owns_output:
+            out.close()
+    return written
+
+
+def _open_input(source):
+    if hasattr(source, "read"):
+        return source, False
+    if source.endswith(".gz"):
+        return gzip.open(source, "rt", encoding="utf-8", newline=""), True
+    return open(source, "r", encoding="utf-8", newline=""), True
+
+
+def _guess_format(source):
+    name = source[:-3] if source.endswith(".gz") else source
+    return "jsonl" if name.endswith((".jsonl", ".json")) else "csv"
+
+
+def _read_rows(f, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+    else:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _session_row(raw):
+    """Normalise one imported row to the sessions column order.
+
+    Timestamps are re-serialised with isoformat() so that they compare equal
+    to the ones record_session() writes. completed_at defaults to started_at
+    plus the duration.
+    """
+    session_type = raw["session_type"]
+    if not session_type:
+        raise ValueError("missing session_type")
+    duration = int(raw["duration_seconds"])
+    started = datetime.fromisoformat(raw["started_at"])
+    completed_at = raw.get("completed_at")
+    completed = (datetime.fromisoformat(completed_at) if completed_at
+                 else started + timedelta(seconds=duration))
+    task_label = raw.get("task_label") or None
+    return (session_type, duration, task_label, started.isoformat(),
+            completed.isoformat(), int(completed.timestamp()),
+            completed.strftime("%Y-%m-%d"))
+
+
+# ?3 is the task label; it has been interned into tasks beforehand.
+_IMPORT_SQL = """
+    INSERT INTO sessions (session_type, duration_seconds, task_id,
+                          started_at, completed_at, completed_ts, day)
+    SELECT ?1, ?2, task.id, ?4, ?5, ?6, ?7
+    FROM (SELECT (SELECT id FROM tasks WHERE label = ?3) AS id) AS task
+    WHERE NOT EXISTS (
+        SELECT 1 FROM sessions
+        WHERE started_at = ?4 AND session_type = ?1 AND task_id IS task.id
+    )
+"""
+
+
+def import_sessions(conn, source, fmt=None, batch_size=IMPORT_BATCH, progress=None,
+                    skip_through=None, commit=True):
+    """Insert sessions from ``source`` (a path or text file object) using ``conn``.
+
+    Commits after every ``batch_size`` rows, or never with ``commit=False``,
+    leaving the whole load to the caller's transaction; duplicates, both against the
+    database and within the file, are skipped and rows that cannot be parsed
+    are counted as rejected. Rows completed on or before the day
+    ``skip_through`` (YYYY-MM-DD) are counted as archived and not inserted.
+    ``progress(read)`` is called after each batch. Returns a dict of counts,
+    elapsed seconds and rows per second.
+    """
+    if fmt is None:
+        fmt = _guess_format(source) if isinstance(source, str) else "csv"
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown import format: {fmt!r}")
+
+    read = inserted = rejected = archived = 0
+    start = time.perf_counter()
+    f, owns_input = _open_input(source)
+    try:
+        batch = []
+        for raw in _read_rows(f, fmt):
+            read += 1
+            try:
+                row = _session_row(raw)
+            except (KeyError, TypeError, ValueError):
+                rejected += 1
+                continue
+            if skip_through is not None and row[6] <= skip_through:
+                archived += 1
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                inserted += _insert_batch(conn, batch, commit)
+                batch = []
+                if progress is not None:
+                    progress(read)
+        if batch:
+            inserted += _insert_batch(conn, batch, commit)
+        if progress is not None:
+            progress(read)
+    finally:
+        if owns_input:
+            f.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "read": read,
+        "inserted": inserted,
+        "duplicates": read - rejected - archived - inserted,
+        "rejected": rejected,
+        "archived": archived,
+        "seconds": elapsed,
+        "rows_per_second": read / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _insert_batch(conn, batch, commit=True):
+    labels = {row[2] for row in batch if row[2]}
+    conn.executemany("INSERT OR IGNORE INTO tasks (label) VALUES (?)", ((l,) for l in labels))
+    before = conn.total_changes
+    conn.executemany(_IMPORT_SQL, batch)
+    if commit:
+        conn.commit()
+    return conn.total_changes - before
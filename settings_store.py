@@ -0,0 +1,101 @@
+"""Debounced, atomic persistence for settings.json.
+
+Changes are applied to the in-memory dict immediately and written out by a
+background thread once they have stopped arriving for ``delay`` seconds,
+so dragging a slider costs one write instead of dozens. Writes go through
+fileutil.atomic_write and are skipped when the serialised content matches
+what is already on disk. flush() writes any pending change synchronously
+and is called on exit.
+"""
+import json
+import threading
+import time
+
+from fileutil import atomic_write
+
+
+class SettingsStore:
+    def __init__(self, path, defaults, delay=0.5, clock=time.monotonic):
+        self.path = path
+        self.delay = delay
+        self.writes = 0
+        self.errors = 0
+        self.last_error = None
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._due = None
+        self._closed = False
+        self._written = None
+        self.data = self._load(defaults)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _load(self, defaults):
+        data = dict(defaults)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read()
+            loaded = json.loads(text)
+        except (OSError, ValueError):
+            return data
+        if isinstance(loaded, dict):
+            data.update(loaded)
+            self._written = text
+        return data
+
+    def update(self, changes):
+        """Merge ``changes`` into ``data`` and schedule a write."""
+        with self._cond:
+            self.data.update(changes)
+            self._due = self._clock() + self.delay
+            self._cond.notify()
+
+    def flush(self):
+        """Write any pending change now; raises OSError if the write fails."""
+        with self._cond:
+            self._due = None
+        # Also retries a background write that failed
+        self._write(raise_errors=True)
+
+    def close(self):
+        """Flush and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        with self._cond:
+            while not self._closed:
+                if self._due is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._due - self._clock()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._due = None
+                self._cond.release()
+                try:
+                    self._write()
+                finally:
+                    self._cond.acquire()
+
+    def _write(self, raise_errors=False):
+        with self._write_lock:
+            with self._cond:
+                text = json.dumps(self.data, indent=2)
+            if text == self._written:
+                return
+            try:
+                atomic_write(self.path, text)
+            except OSError as e:
+                self.errors += 1
+                self.last_error = e
+                if raise_errors:
+                    raise
+                return
+            self._written = text
+            self.writes += 1
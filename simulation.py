@@ -0,0 +1,287 @@
+"""Virtual-clock harness for driving TimerEngine without waiting in real time.
+
+SimulatedLoop stands in for Tk: it provides the engine's clock plus
+after()/after_cancel() backed by a discrete-event heap, and jumps straight
+to the next due callback. Simulation wraps an engine on such a loop, checks
+its invariants as it runs, and hashes every action, tick and completion
+into a running digest. With record=True it also keeps the action log so
+that a run can be replayed exactly; otherwise memory stays flat however
+long the run.
+
+Every tick still runs the real engine code, so throughput is bounded by
+it: roughly 12-17k sessions (30-45k wakeups) a second on a laptop-class
+CPU, i.e. about a minute per million cycles. The default 100k is a few
+seconds.
+
+    python simulation.py --cycles 1000000            # randomized regression run, ~1 min
+    python simulation.py --cycles 1000 --record a.jsonl
+    python simulation.py --replay a.jsonl
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import random
+import time
+
+from timer_engine import TimerEngine, TimerState, SessionType, TICK_SLACK_MS
+
+ACTIONS = ("start", "pause", "resume", "skip", "reset", "set_durations")
+# Trace entries hashed per update() call
+TRACE_BATCH = 4096
+
+
+class SimulationError(AssertionError):
+    pass
+
+
+class SimulatedLoop:
+    def __init__(self, start=0.0, lateness=0.0, seed=0):
+        self.now = start
+        self.wakeups = 0
+        self.lateness = lateness
+        self._heap = []
+        self._ids = itertools.count()
+        self._cancelled = set()
+        self._rng = random.Random(seed)
+
+    def time(self):
+        return self.now
+
+    def after(self, ms, fn):
+        timer_id = next(self._ids)
+        due = self.now + ms / 1000
+        if self.lateness:
+            due += self._rng.uniform(0, self.lateness)
+        heapq.heappush(self._heap, (due, timer_id, fn))
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self._cancelled.add(timer_id)
+
+    def next_due(self):
+        while self._heap and self._heap[0][1] in self._cancelled:
+            self._cancelled.discard(heapq.heappop(self._heap)[1])
+        return self._heap[0][0] if self._heap else None
+
+    def run_until(self, t):
+        while True:
+            due = self.next_due()
+            if due is None or due > t:
+                break
+            _, _, fn = heapq.heappop(self._heap)
+            self.now = due
+            self.wakeups += 1
+            fn()
+        self.now = max(self.now, t)
+
+    def advance(self, seconds):
+        self.run_until(self.now + seconds)
+
+    def run(self):
+        while self.next_due() is not None:
+            self.run_until(self.next_due())
+
+
+class Simulation:
+    """A TimerEngine on a SimulatedLoop, with invariant checks and a trace digest.
+
+    ``actions`` holds the action log when ``record`` is true, else None.
+    """
+
+    def __init__(self, tick_mode="aligned", tick_interval=1, lateness=0.0, seed=0,
+                 check=True, on_tick=None, on_complete=None, record=False):
+        self.loop = SimulatedLoop(lateness=lateness, seed=seed)
+        self.check = check
+        self.actions = [] if record else None
+        self.action_count = 0
+        # Hashes the same bytes as repr() of the whole trace list would, in
+        # batches of entries, so digests match runs that kept the list
+        self._trace_hash = hashlib.sha256(b"[")
+        self._trace_sep = ""
+        self._trace_batch = []
+        self.ticks = 0
+        self.completions = 0
+        self._on_tick = on_tick
+        self._on_complete = on_complete
+        self._work_completions = 0
+        self._just_completed = None
+        self.engine = TimerEngine(
+            on_tick=self._handle_tick,
+            on_complete=self._handle_complete,
+            schedule_fn=self.loop.after,
+            cancel_fn=self.loop.after_cancel,
+            tick_mode=tick_mode,
+            tick_interval=tick_interval,
+            clock=self.loop.time,
+        )
+
+    def apply(self, action, *args):
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action: {action!r}")
+        self.action_count += 1
+        if self.actions is not None:
+            self.actions.append({"t": self.loop.now, "action": action, "args": list(args)})
+        self._trace((self.loop.now, action, args))
+        getattr(self.engine, action)(*args)
+
+    def advance(self, seconds):
+        self.loop.advance(seconds)
+
+    def replay(self, actions):
+        """Apply a recorded action list at its recorded virtual times.
+
+        A trailing {"action": "stop"} entry ends the run at that time;
+        otherwise the loop runs until nothing is scheduled.
+        """
+        for entry in actions:
+            self.loop.run_until(entry["t"])
+            if entry["action"] == "stop":
+                return
+            self.apply(entry["action"], *entry["args"])
+        self.loop.run()
+
+    def recording(self):
+        """The action log, terminated so that a replay stops where this run did."""
+        if self.actions is None:
+            raise ValueError("not recording; create the Simulation with record=True")
+        return self.actions + [{"t": self.loop.now, "action": "stop", "args": []}]
+
+    def digest(self):
+        self._flush_trace()
+        digest = self._trace_hash.copy()
+        digest.update(b"]")
+        return digest.hexdigest()
+
+    def _trace(self, entry):
+        batch = self._trace_batch
+        batch.append(repr(entry))
+        if len(batch) >= TRACE_BATCH:
+            self._flush_trace()
+
+    def _flush_trace(self):
+        if self._trace_batch:
+            self._trace_hash.update((self._trace_sep + ", ".join(self._trace_batch)).encode())
+            self._trace_sep = ", "
+            self._trace_batch = []
+
+    def _handle_tick(self, remaining, session_type):
+        self.ticks += 1
+        self._trace((self.loop.now, "tick", remaining, session_type.value))
+        if self.check:
+            if not 0 <= remaining <= self.engine.durations[session_type]:
+                raise SimulationError(f"remaining {remaining} outside 0..{self.engine.durations[session_type]}")
+            # The engine advances right after on_complete and reports the new
+            # session with a tick, so that tick shows where the cycle went.
+            if self._just_completed is not None:
+                self._check_advance(self._just_completed, session_type)
+                self._just_completed = None
+        if self._on_tick:
+            self._on_tick(remaining, session_type)
+
+    def _handle_complete(self, session_type):
+        engine = self.engine
+        self.completions += 1
+        self._trace((self.loop.now, "complete", session_type.value))
+        if self.check:
+            if session_type == SessionType.WORK:
+                self._work_completions += 1
+            if engine.completed_pomodoros != self._work_completions:
+                raise SimulationError(
+                    f"completed_pomodoros {engine.completed_pomodoros} != {self._work_completions}"
+                )
+            # The engine reports completion once the rounded remaining time is 0
+            late = self.loop.now - engine._target_time
+            if late < -0.5 or late > self.loop.lateness + TICK_SLACK_MS / 1000 + 0.2:
+                raise SimulationError(f"completed {late:+.3f}s from target")
+        if self._on_complete:
+            self._on_complete(session_type)
+        self._just_completed = session_type
+
+    def _check_advance(self, completed, session_type):
+        if completed == SessionType.WORK:
+            if self.engine.completed_pomodoros % self.engine.long_break_interval == 0:
+                expected = SessionType.LONG_BREAK
+            else:
+                expected = SessionType.SHORT_BREAK
+        else:
+            expected = SessionType.WORK
+        if session_type != expected:
+            raise SimulationError(
+                f"after {completed.value} expected {expected.value}, got {session_type.value}"
+            )
+
+
+def run_random(cycles, seed=0, durations=(3, 1, 2), tick_interval=1, lateness=0.0, check=True,
+               record=False):
+    """Drive a Simulation with random user behaviour until ``cycles`` sessions complete."""
+    rng = random.Random(seed)
+    sim = Simulation(tick_interval=tick_interval, lateness=lateness, seed=seed, check=check,
+                     record=record)
+    sim.apply("set_durations", *durations)
+    engine = sim.engine
+    while sim.completions < cycles:
+        sim.advance(rng.uniform(0, 2 * max(durations)))
+        roll = rng.random()
+        if engine.state == TimerState.IDLE:
+            if roll < 0.85:
+                sim.apply("start")
+            elif roll < 0.95:
+                sim.apply("skip")
+            else:
+                sim.apply("set_durations", *(rng.randint(1, 2 * d) for d in durations))
+        elif engine.state == TimerState.RUNNING:
+            if roll < 0.1:
+                sim.apply("pause")
+            elif roll < 0.13:
+                sim.apply("skip")
+            elif roll < 0.15:
+                sim.apply("reset")
+        elif roll < 0.8:
+            sim.apply("resume")
+        elif roll < 0.9:
+            sim.apply("reset")
+        else:
+            sim.apply("skip")
+    return sim
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run TimerEngine in virtual time")
+    parser.add_argument("--cycles", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tick-interval", type=int, default=1)
+    parser.add_argument("--no-check", action="store_true", help="skip invariant checks")
+    parser.add_argument("--record", metavar="PATH", help="write the action log as JSON lines")
+    parser.add_argument("--replay", metavar="PATH", help="replay an action log instead of a random run")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.replay:
+        with open(args.replay) as f:
+            actions = [json.loads(line) for line in f if line.strip()]
+        sim = Simulation(tick_interval=args.tick_interval, check=not args.no_check,
+                         record=bool(args.record))
+        sim.replay(actions)
+    else:
+        sim = run_random(args.cycles, seed=args.seed, tick_interval=args.tick_interval,
+                         check=not args.no_check, record=bool(args.record))
+    elapsed = time.perf_counter() - t0
+
+    if args.record:
+        with open(args.record, "w") as f:
+            for entry in sim.recording():
+                f.write(json.dumps(entry) + "\n")
+
+    simulated = sim.loop.now
+    print(f"{sim.completions:,} sessions, {sim.action_count:,} actions, "
+          f"{sim.ticks:,} ticks, {sim.loop.wakeups:,} wakeups")
+    print(f"{simulated / 3600:,.1f} h simulated in {elapsed:.2f} s "
+          f"({sim.completions / elapsed:,.0f} sessions/s, {sim.loop.wakeups / elapsed:,.0f} wakeups/s)")
+    print(f"trace digest {sim.digest()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Last-known stats and engine position, for painting before the database answers.
+
+The app saves a snapshot on exit and after every completed session. At
+startup it renders from the snapshot immediately, then replaces the values
+with fresh ones from the database.
+"""
+import json
+import os
+import time
+from datetime import date, timedelta
+
+from fileutil import atomic_write
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshot.json")
+# Bump when the layout changes; snapshots with another version are ignored.
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(stats, session_type, completed_pomodoros, path=SNAPSHOT_PATH):
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "day": date.today().isoformat(),
+        "stats": stats,
+        "engine": {
+            "session_type": session_type,
+            "completed_pomodoros": completed_pomodoros,
+        },
+    }
+    # A lost snapshot only costs one slower first paint, so skip the fsync
+    atomic_write(path, json.dumps(data), fsync=False)
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Return the saved snapshot, or None if missing, unreadable or outdated.
+
+    Stats are adjusted to today's date: "today" is cleared and old days are
+    dropped from the week if the snapshot was taken on an earlier day.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        return None
+
+    try:
+        stats = data["stats"]
+        data["engine"]["session_type"]
+        data["engine"]["completed_pomodoros"]
+        if data.get("day") != date.today().isoformat():
+            since = (date.today() - timedelta(days=6)).isoformat()
+            stats["today"] = {"pomodoros": 0, "focus_seconds": 0}
+            stats["week"] = [d for d in stats["week"] if d["day"] >= since]
+    except (KeyError, TypeError):
+        return None
+    return data
@@ -0,0 +1,87 @@
+"""Cold-start breakdown for ``main.py --startup-profile``.
+
+While enabled, every first-time import is timed by wrapping
+builtins.__import__, which works the same from source and inside the
+PyInstaller bundle where ``-X importtime`` is not available. The app also
+marks named init phases. Once the window is up, the report is written to
+stdout or to a file.
+"""
+import builtins
+import os
+import sys
+import time
+
+_enabled = False
+_output = None
+_t0 = time.perf_counter()
+_phases = []
+# (module name, cumulative seconds, self seconds, nesting depth)
+_imports = []
+_stack = []
+_original_import = builtins.__import__
+
+
+def enable(output="-"):
+    global _enabled, _output, _t0
+    _enabled = True
+    _output = output
+    _t0 = time.perf_counter()
+    builtins.__import__ = _timed_import
+
+
+def is_enabled():
+    return _enabled
+
+
+def mark(phase):
+    if _enabled:
+        _phases.append((phase, time.perf_counter() - _t0))
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    _stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += elapsed
+        _imports.append((name, elapsed, elapsed - children, len(_stack)))
+
+
+def report(top=25):
+    lines = ["Startup profile", "", "Init phases (seconds since start, delta):"]
+    previous = 0.0
+    for phase, at in _phases:
+        lines.append(f"  {at * 1000:9.1f} ms  {(at - previous) * 1000:+9.1f} ms  {phase}")
+        previous = at
+
+    total = sum(cumulative for _, cumulative, _, depth in _imports if depth == 0)
+    lines += ["", f"Imports: {len(_imports)} modules, {total * 1000:.1f} ms at top level",
+              f"  {'cumulative':>12} {'self':>10}  module"]
+    for name, cumulative, self_time, _ in sorted(_imports, key=lambda i: -i[1])[:top]:
+        lines.append(f"  {cumulative * 1000:9.1f} ms {self_time * 1000:7.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def finish():
+    """Write the report and stop timing imports."""
+    global _enabled
+    if not _enabled:
+        return
+    mark("startup complete")
+    builtins.__import__ = _original_import
+    _enabled = False
+
+    text = report()
+    # Windowed PyInstaller builds have no stdout; fall back to a file
+    if _output == "-" and sys.stdout is not None:
+        print(text)
+        return
+    path = _output if _output != "-" else os.path.join(os.getcwd(), "startup_profile.txt")
+    with open(path, "w") as f:
+        f.write(text + "\n")
@@ -0,0 +1,312 @@
+"""Optional localhost HTTP API with the timer state and stats, for desk
+displays and editor plugins.
+
+The server runs its own asyncio loop on a daemon thread. The app hands it
+each new state with publish(), one thread-safe call per tick whatever the
+number of clients; subscribers are served entirely on the server loop and
+never reach the Tk thread.
+
+    GET /state                  current state as JSON, ETag = state version
+    GET /state?since=V          long-poll: answers once the version passes V
+                                (or after ``timeout`` seconds, default 30)
+    GET /stats                  Database stats summary, cached and ETagged
+                                until invalidate_stats() is called
+    GET /events                 Server-Sent Events: "state" on transitions,
+                                "tick" on second ticks, "stats" when the
+                                stats change; ?transitions=1 skips ticks
+
+Each state is encoded once and the same bytes go to every subscriber. A
+subscriber that falls behind skips straight to the newest state.
+
+Versions ("<nonce>-<n>") and ETags carry a nonce chosen when the server is
+created, since the counters behind them restart with every process: a
+client still holding a value from an earlier run gets a fresh answer at
+once instead of a 304 or a long wait.
+"""
+import asyncio
+import json
+import secrets
+import threading
+import time
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_HOST = "127.0.0.1"
+LONG_POLL_TIMEOUT = 30
+MAX_LONG_POLL_TIMEOUT = 300
+SSE_HEARTBEAT = 15
+# A client that has not finished sending its request headers by then is dropped
+REQUEST_TIMEOUT = 10
+WRITE_TIMEOUT = 10
+MAX_HEADER_BYTES = 8192
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+class _State:
+    """One published state, encoded once for all clients."""
+
+    def __init__(self, version, kind, data, stats_generation, nonce):
+        self.version = version
+        self.kind = kind  # "state", "tick" or "stats"
+        self.data = data
+        self.body = json.dumps(dict(data, version=f"{nonce}-{version}",
+                                    stats_generation=stats_generation)).encode()
+        self.etag = f'"{nonce}-v{version}"'
+        self.event = b"event: %s\nid: %d\ndata: %s\n\n" % (kind.encode(), version, self.body)
+
+
+class StatusServer:
+    def __init__(self, stats_fn, port, host=DEFAULT_HOST):
+        """``stats_fn()`` returns a concurrent.futures.Future of the stats
+        summary; it is called from the server thread."""
+        self.host = host
+        self.port = port
+        self._stats_fn = stats_fn
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+        self._nonce = secrets.token_hex(4)
+
+        # Server-loop state, only touched on the loop thread
+        self._state = _State(0, "state", {}, 0, self._nonce)
+        self._notice = self._state     # newest state that is not a tick
+        self._changed = None           # asyncio.Event, replaced on every publish
+        self._stats_generation = 0
+        self._stats_cache = None       # (key, etag, body)
+        self._stats_fetch = None       # (key, asyncio.Future) while one is in flight
+        self.clients = 0
+        self.requests = 0
+
+    def start(self):
+        """Bind and serve on a background thread; raises OSError if the port is taken."""
+        self._thread = threading.Thread(target=self._run, name="status-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def stop(self):
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2)
+
+    def publish(self, data, transition=False):
+        """Hand a new state dict to the server; safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._publish, "state" if transition else "tick", data)
+
+    def invalidate_stats(self):
+        """Drop the cached stats, e.g. after a session was recorded."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._invalidate_stats)
+
+    # -- server loop --------------------------------------------------------
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._changed = asyncio.Event()
+            self._server = loop.run_until_complete(asyncio.start_server(
+                self._handle, self.host, self.port, backlog=1024,
+            ))
+            # Report the bound port when 0 asked for any free one
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self._error = e
+            loop.close()
+            self._ready.set()
+            return
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    def _publish(self, kind, data):
+        self._state = _State(self._state.version + 1, kind, data, self._stats_generation,
+                             self._nonce)
+        if kind != "tick":
+            self._notice = self._state
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _invalidate_stats(self):
+        self._stats_generation += 1
+        self._stats_cache = None
+        # Lets SSE clients know to refetch /stats; the timer state is unchanged
+        self._publish("stats", self._state.data)
+
+    async def _handle(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                self.requests += 1
+                keep_alive = await self._dispatch(method, target, headers, writer)
+                if not keep_alive or headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, asyncio.CancelledError):
+            pass  # cancelled only when the server stops
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def _read_request(self, reader):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+        except asyncio.IncompleteReadError:
+            return None  # client closed between requests
+        if len(head) > MAX_HEADER_BYTES:
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            return None
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        return method, target, headers
+
+    async def _dispatch(self, method, target, headers, writer):
+        if method != "GET":
+            await self._respond(writer, 405, b'{"error": "GET only"}')
+            return True
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/state":
+            await self._get_state(writer, headers, query)
+        elif url.path == "/stats":
+            await self._get_stats(writer, headers)
+        elif url.path == "/events":
+            await self._stream_events(writer, query)
+            return False
+        else:
+            await self._respond(writer, 404, b'{"error": "not found"}')
+        return True
+
+    async def _respond(self, writer, status, body=b"", etag=None, cache="no-cache"):
+        head = [f"HTTP/1.1 {status} {_REASONS[status]}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}",
+                f"Cache-Control: {cache}"]
+        if etag:
+            head.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+
+    async def _get_state(self, writer, headers, query):
+        if "since" in query:
+            nonce, _, since = query["since"].rpartition("-")
+            try:
+                # A version from another run (or a bare number) is answered at once
+                since = int(since) if nonce == self._nonce else -1
+                timeout = min(float(query.get("timeout", LONG_POLL_TIMEOUT)), MAX_LONG_POLL_TIMEOUT)
+            except ValueError:
+                await self._respond(writer, 400, b'{"error": "bad since/timeout"}')
+                return
+            if self._state.version <= since:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        state = self._state
+        if headers.get("if-none-match") == state.etag:
+            await self._respond(writer, 304, etag=state.etag)
+        else:
+            await self._respond(writer, 200, state.body, etag=state.etag)
+
+    async def _get_stats(self, writer, headers):
+        # Keyed by day too, so "today" rolls over at midnight
+        key = (self._stats_generation, date.today())
+        cached = self._stats_cache
+        if cached is None or cached[0] != key:
+            try:
+                cached = await self._fetch_stats(key)
+            except Exception:
+                await self._respond(writer, 503, b'{"error": "stats unavailable"}')
+                return
+        _, etag, body = cached
+        if headers.get("if-none-match") == etag:
+            await self._respond(writer, 304, etag=etag)
+        else:
+            await self._respond(writer, 200, body, etag=etag)
+
+    async def _fetch_stats(self, key):
+        # Concurrent requests share one database query
+        if self._stats_fetch is None or self._stats_fetch[0] != key:
+            self._stats_fetch = (key, asyncio.ensure_future(self._load_stats(key)))
+        return await asyncio.shield(self._stats_fetch[1])
+
+    async def _load_stats(self, key):
+        try:
+            stats = await asyncio.wrap_future(self._stats_fn())
+        finally:
+            if self._stats_fetch is not None and self._stats_fetch[0] == key:
+                self._stats_fetch = None
+        generation, day = key
+        entry = (key, f'"{self._nonce}-s{generation}-{day.isoformat()}"', json.dumps(stats).encode())
+        # A session recorded meanwhile has already moved the generation on
+        if key[0] == self._stats_generation:
+            self._stats_cache = entry
+        return entry
+
+    async def _stream_events(self, writer, query):
+        transitions_only = query.get("transitions") in ("1", "true")
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        state = self._state
+        writer.write(b"retry: 2000\n" + state.event)
+        await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+        sent = state.version
+        while True:
+            changed = self._changed
+            if self._state.version == sent:
+                try:
+                    await asyncio.wait_for(changed.wait(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                    await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+                    continue
+            # Coalesced to the newest state, but a transition (or stats
+            # change) that a later tick overtook is still delivered
+            state, notice = self._state, self._notice
+            if notice.version > sent and notice is not state:
+                writer.write(notice.event)
+            if not (transitions_only and state.kind == "tick"):
+                writer.write(state.event)
+            sent = state.version
+            await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+
+
+def timer_state(engine, task=None):
+    """The JSON-ready state of a TimerEngine."""
+    return {
+        "state": engine.state.value,
+        "session_type": engine.session_type.value,
+        "remaining": engine.remaining,
+        "total": engine.total_duration,
+        "completed_pomodoros": engine.completed_pomodoros,
+        "task": task,
+        "updated_at": time.time(),
+    }
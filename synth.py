@@ -0,0 +1,172 @@
+"""Chime synthesis for the alarm sound.
+
+A chime is a list of tones, each (frequency Hz, start s, end s[, pan]),
+with a linear attack/release envelope. The whole buffer is built per tone
+slice rather than per sample, using NumPy when it is installed and the
+stdlib ``array`` module otherwise. render_chime() returns 16-bit
+little-endian PCM ready for a WAV file or an audio device.
+
+Rendered files are cached under a name derived from a hash of the chime
+parameters, so unchanged parameters never trigger a re-render.
+"""
+import hashlib
+import json
+import math
+import os
+import sys
+import wave
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Part of every cache key; bump when the rendering itself changes.
+SYNTH_VERSION = 1
+
+DEFAULT_CHIME = {
+    # Three ascending tones
+    "tones": [[523, 0.0, 0.4], [659, 0.4, 0.8], [784, 0.8, 1.3]],
+    "duration": 1.5,
+    "sample_rate": 44100,
+    "channels": 1,
+    "amplitude": 0.4,
+    "attack": 0.05,
+    "release": 0.2,
+}
+
+PEAK = 32000
+
+
+def chime_params(**overrides):
+    params = dict(DEFAULT_CHIME)
+    unknown = set(overrides) - set(params)
+    if unknown:
+        raise ValueError(f"unknown chime parameter(s): {', '.join(sorted(unknown))}")
+    params.update(overrides)
+    return params
+
+
+def render_chime(tones, duration, sample_rate, channels, amplitude, attack, release,
+                 use_numpy=None):
+    """Render a chime to interleaved 16-bit PCM bytes, normalised to PEAK.
+
+    ``attack`` and ``release`` are ramp lengths in seconds; 0 means no ramp.
+    """
+    if attack < 0 or release < 0:
+        raise ValueError("attack and release must not be negative")
+    if use_numpy is None:
+        use_numpy = np is not None
+    num_samples = int(sample_rate * duration)
+    if use_numpy:
+        return _render_numpy(tones, num_samples, sample_rate, channels, amplitude, attack, release)
+    return _render_array(tones, num_samples, sample_rate, channels, amplitude, attack, release)
+
+
+def _tone_span(tone, sample_rate, num_samples):
+    freq, start, end = tone[0], tone[1], tone[2]
+    pan = tone[3] if len(tone) > 3 else 0.0
+    first = int(start * sample_rate)
+    last = min(int(end * sample_rate), num_samples)
+    return freq, end - start, pan, first, last
+
+
+def _channel_gains(pan, channels):
+    if channels == 1:
+        return (1.0,)
+    # Linear pan between the first two channels; others get the centre mix
+    left, right = (1 - pan) / 2, (1 + pan) / 2
+    return tuple([left, right] + [0.5] * (channels - 2))
+
+
+def _render_numpy(tones, num_samples, sample_rate, channels, amplitude, attack, release):
+    out = np.zeros((num_samples, channels), dtype=np.float64)
+    for tone in tones:
+        freq, length, pan, first, last = _tone_span(tone, sample_rate, num_samples)
+        if last <= first:
+            continue
+        t = np.arange(last - first, dtype=np.float64) / sample_rate
+        envelope = np.ones_like(t)
+        if attack > 0:
+            envelope *= np.minimum(1.0, t / attack)
+        if release > 0:
+            envelope *= np.minimum(1.0, (length - t) / release)
+        signal = amplitude * envelope * np.sin(2 * np.pi * freq * t)
+        for channel, gain in enumerate(_channel_gains(pan, channels)):
+            out[first:last, channel] += signal * gain
+    peak = np.abs(out).max() or 1.0
+    pcm = (out * (PEAK / peak)).astype("<i2")
+    return pcm.tobytes()
+
+
+def _render_array(tones, num_samples, sample_rate, channels, amplitude, attack, release):
+    out = [array("d", bytes(8 * num_samples)) for _ in range(channels)]
+    written = []
+    for tone in tones:
+        freq, length, pan, first, last = _tone_span(tone, sample_rate, num_samples)
+        if last <= first:
+            continue
+        n = last - first
+        step = 2 * math.pi * freq / sample_rate
+        sin = math.sin
+        signal = array("d", [amplitude * sin(step * i) for i in range(n)])
+
+        # The envelope is 1.0 except for a linear ramp at each end, so only
+        # those two short stretches need touching.
+        if attack > 0:
+            attack_samples = min(n, math.ceil(attack * sample_rate))
+            rise = 1.0 / (attack * sample_rate)
+            signal[:attack_samples] = array("d", [
+                v * (i * rise) for i, v in enumerate(signal[:attack_samples])
+            ])
+        if release > 0:
+            release_from = max(0, int((length - release) * sample_rate))
+            fall = 1.0 / (release * sample_rate)
+            signal[release_from:] = array("d", [
+                v * min(1.0, (length * sample_rate - i) * fall)
+                for i, v in enumerate(signal[release_from:], release_from)
+            ])
+
+        overlaps = any(first < end and start < last for start, end in written)
+        written.append((first, last))
+        for channel, gain in enumerate(_channel_gains(pan, channels)):
+            scaled = signal if gain == 1.0 else array("d", [v * gain for v in signal])
+            if overlaps:
+                scaled = array("d", [a + b for a, b in zip(out[channel][first:last], scaled)])
+            out[channel][first:last] = scaled
+
+    peak = max(max(map(abs, buf), default=0.0) for buf in out) or 1.0
+    scale = PEAK / peak
+    pcm = array("h", bytes(2 * num_samples * channels))
+    for channel, buf in enumerate(out):
+        pcm[channel::channels] = array("h", [int(v * scale) for v in buf])
+    if sys.byteorder == "big":
+        pcm.byteswap()
+    return pcm.tobytes()
+
+
+def write_wav(path, pcm, sample_rate, channels):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+
+
+def cache_key(params):
+    payload = json.dumps({"version": SYNTH_VERSION, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def cached_chime(cache_dir, **overrides):
+    """Return the path of the WAV for these chime parameters, rendering it if needed."""
+    params = chime_params(**overrides)
+    path = os.path.join(cache_dir, f"chime-{cache_key(params)}.wav")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        pcm = render_chime(**params)
+        tmp_path = path + ".tmp"
+        write_wav(tmp_path, pcm, params["sample_rate"], params["channels"])
+        os.replace(tmp_path, path)
+    return path
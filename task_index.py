@@ -0,0 +1,118 @@
+"""In-memory prefix index over task labels for autocomplete.
+
+Suggestions are ranked by use count, then by last use. Two sorted lists
+are kept:
+
+    _keys   (casefolded label, label), so the labels starting with a prefix
+            form one contiguous run found with two bisects
+    _ranks  (-use_count, -last_used, label), best first
+
+A narrow prefix is answered by ranking its run of _keys. A broad one (a
+single letter can match thousands of labels) walks _ranks instead and
+stops after ``limit`` matches; the broader the prefix, the sooner that
+happens. Either way the work stays around sqrt(labels * limit).
+
+Ranked results are also memoised per prefix. A label's score only ever
+grows (touch() adds a use), so a cached list stays correct if the touched
+label is merged into the lists of its own prefixes; nothing else can move.
+"""
+import heapq
+from bisect import bisect_left, insort
+
+
+class TaskIndex:
+    def __init__(self, loader, limit=8):
+        """``loader()`` returns (label, use_count, last_used) rows; it runs on first use."""
+        self.limit = limit
+        self._loader = loader
+        self._loaded = False
+        self._keys = []     # sorted (casefolded label, label)
+        self._ranks = []    # sorted rank keys, see _rank_key()
+        self._stats = {}    # label -> [use_count, last_used]
+        self._folded = {}   # label -> casefolded label
+        self._cache = {}    # casefolded prefix -> ranked labels
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._stats)
+
+    def load(self):
+        """Run the loader now rather than on first use, e.g. on another thread."""
+        self._ensure_loaded()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        for label, use_count, last_used in self._loader():
+            self._stats[label] = [use_count, last_used or 0]
+            self._folded[label] = label.casefold()
+        self._keys = sorted((folded, label) for label, folded in self._folded.items())
+        self._ranks = sorted(self._rank_key(label) for label in self._stats)
+        self._loaded = True
+
+    def _rank_key(self, label):
+        use_count, last_used = self._stats[label]
+        return -use_count, -last_used, label
+
+    def suggest(self, prefix):
+        """Up to ``limit`` labels starting with ``prefix`` (case-insensitive), most used first."""
+        self._ensure_loaded()
+        folded = prefix.casefold()
+        if not folded:
+            return []
+        ranked = self._cache.get(folded)
+        if ranked is None:
+            ranked = self._cache[folded] = self._rank(folded)
+        return list(ranked)
+
+    def _rank(self, folded):
+        lo = bisect_left(self._keys, (folded,))
+        hi = bisect_left(self._keys, (folded + "\U0010ffff",), lo)
+        matches = hi - lo
+        # Walking _ranks is cheaper per label than ranking a run, hence the 4
+        if 4 * matches * matches <= len(self._keys) * self.limit:
+            return heapq.nsmallest(
+                self.limit, (label for _, label in self._keys[lo:hi]), key=self._rank_key
+            )
+        ranked = []
+        for _, _, label in self._ranks:
+            if self._folded[label].startswith(folded):
+                ranked.append(label)
+                if len(ranked) == self.limit:
+                    break
+        return ranked
+
+    def touch(self, label, when):
+        """Record one use of ``label`` at epoch seconds ``when``.
+
+        Does nothing until the index has been loaded; the loader then picks
+        the use up from the database.
+        """
+        if not self._loaded or not label:
+            return
+        stats = self._stats.get(label)
+        if stats is None:
+            self._stats[label] = [1, when]
+            self._folded[label] = label.casefold()
+            insort(self._keys, (self._folded[label], label))
+        else:
+            del self._ranks[bisect_left(self._ranks, self._rank_key(label))]
+            stats[0] += 1
+            stats[1] = max(stats[1], when)
+        insort(self._ranks, self._rank_key(label))
+
+        folded = self._folded[label]
+        for end in range(1, len(folded) + 1):
+            ranked = self._cache.get(folded[:end])
+            if ranked is None:
+                continue
+            if label in ranked:
+                ranked.sort(key=self._rank_key)
+            elif len(ranked) < self.limit or self._rank_key(label) < self._rank_key(ranked[-1]):
+                ranked.append(label)
+                ranked.sort(key=self._rank_key)
+                del ranked[self.limit:]
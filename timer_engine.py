@@ -1,6 +1,18 @@
+import math
 import time
 from enum import Enum
 
+from events import EventBus, Tick, StateChange, SessionComplete, DurationChange
+
+
+# "poll" wakes every POLL_INTERVAL_MS; "aligned" sleeps until the displayed
+# value is due to change next.
+TICK_MODES = ("poll", "aligned")
+POLL_INTERVAL_MS = 200
+# Aligned wakeups aim this far past the boundary so a timer that fires a
+# hair early still sees the new value.
+TICK_SLACK_MS = 5
+
 
 class TimerState(Enum):
     IDLE = "idle"
@@ -15,16 +27,26 @@ class SessionType(Enum):
 
 
 class TimerEngine:
-    def __init__(self, on_tick, on_complete, schedule_fn, cancel_fn):
+    def __init__(self, on_tick, on_complete, schedule_fn, cancel_fn,
+                 tick_mode="aligned", tick_interval=1, clock=time.time):
+        """``on_tick(remaining, session_type)`` and ``on_complete(session_type)``
+        may be None; any number of other consumers can subscribe to
+        ``events`` (see events.py) instead."""
+        if tick_mode not in TICK_MODES:
+            raise ValueError(f"unknown tick mode: {tick_mode!r}")
         self.on_tick = on_tick
         self.on_complete = on_complete
         self.schedule = schedule_fn
         self.cancel = cancel_fn
+        self.clock = clock
+        self.events = EventBus(schedule_fn, cancel_fn, clock)
 
         self.state = TimerState.IDLE
         self.session_type = SessionType.WORK
         self.completed_pomodoros = 0
         self.long_break_interval = 4
+        self.tick_mode = tick_mode
+        self.tick_interval = tick_interval
 
         self.durations = {
             SessionType.WORK: 25 * 60,
@@ -36,6 +58,10 @@ class TimerEngine:
         self._target_time = None
         self._timer_id = None
         self._started_at = None
+        self._last_tick_value = None
+        # When the pending tick is meant to run; lets instrumentation
+        # measure wakeup jitter
+        self._tick_due = None
 
     @property
     def remaining(self):
@@ -49,14 +75,65 @@ class TimerEngine:
     def started_at(self):
         return self._started_at
 
+    def snapshot(self):
+        """Everything needed to resume this engine later with restore()."""
+        return {
+            "state": self.state,
+            "session_type": self.session_type,
+            "completed_pomodoros": self.completed_pomodoros,
+            "remaining": self._remaining,
+            "target_time": self._target_time,
+            "started_at": self._started_at,
+        }
+
+    def restore(self, snapshot):
+        """Resume from a snapshot(), e.g. one recovered after a crash.
+
+        A running session keeps its original target time, so time spent
+        while the app was down counts. If the target has already passed,
+        the session is completed as of its target time, the engine
+        advances and is left IDLE. The SessionComplete is marked
+        ``recovered`` so that consumers record it without alerting the
+        user to a session that may have ended hours ago. on_complete is
+        not called, as it cannot tell the difference.
+        """
+        if self._timer_id is not None:
+            self.cancel(self._timer_id)
+            self._timer_id = None
+        previous_session = self.session_type
+        self.session_type = snapshot["session_type"]
+        self.completed_pomodoros = snapshot["completed_pomodoros"]
+        self._started_at = snapshot["started_at"]
+        self._last_tick_value = None
+        state = snapshot["state"]
+        self._target_time = None
+        if state == TimerState.RUNNING:
+            self._target_time = snapshot["target_time"]
+            self._remaining = max(0, round(self._target_time - self.clock()))
+            if self._remaining <= 0:
+                completed_type = self.session_type
+                self._complete(recovered=True)
+                self._set_state(TimerState.IDLE, completed_type)
+                self._emit_tick()
+                return
+        elif state == TimerState.PAUSED:
+            self._remaining = round(snapshot["remaining"])
+        else:
+            self._remaining = self.durations[self.session_type]
+        self._set_state(state, previous_session)
+        self._emit_tick()
+        if state == TimerState.RUNNING:
+            self._schedule_tick()
+
     def start(self):
         if self.state != TimerState.IDLE:
             return
         self._remaining = self.durations[self.session_type]
-        self._started_at = time.time()
-        self._target_time = time.time() + self._remaining
-        self.state = TimerState.RUNNING
-        self.on_tick(self._remaining, self.session_type)
+        self._started_at = self.clock()
+        self._target_time = self.clock() + self._remaining
+        self._last_tick_value = None
+        self._set_state(TimerState.RUNNING)
+        self._emit_tick()
         self._schedule_tick()
 
     def pause(self):
@@ -65,15 +142,16 @@ class TimerEngine:
         if self._timer_id is not None:
             self.cancel(self._timer_id)
             self._timer_id = None
-        self._remaining = max(0, int(self._target_time - time.time()))
+        self._remaining = max(0, int(self._target_time - self.clock()))
         self._target_time = None
-        self.state = TimerState.PAUSED
+        self._set_state(TimerState.PAUSED)
 
     def resume(self):
         if self.state != TimerState.PAUSED:
             return
-        self._target_time = time.time() + self._remaining
-        self.state = TimerState.RUNNING
+        self._target_time = self.clock() + self._remaining
+        self._last_tick_value = None
+        self._set_state(TimerState.RUNNING)
         self._schedule_tick()
 
     def reset(self):
@@ -83,55 +161,118 @@ class TimerEngine:
         self._remaining = self.durations[self.session_type]
         self._target_time = None
         self._started_at = None
-        self.state = TimerState.IDLE
-        self.on_tick(self._remaining, self.session_type)
+        self._set_state(TimerState.IDLE)
+        self._emit_tick()
 
     def skip(self):
         if self._timer_id is not None:
             self.cancel(self._timer_id)
             self._timer_id = None
+        previous = self.session_type
         self._advance_session()
         self._remaining = self.durations[self.session_type]
         self._target_time = None
         self._started_at = None
-        self.state = TimerState.IDLE
-        self.on_tick(self._remaining, self.session_type)
+        self._set_state(TimerState.IDLE, previous)
+        self._emit_tick()
 
     def set_durations(self, work, short_break, long_break):
         self.durations[SessionType.WORK] = work
         self.durations[SessionType.SHORT_BREAK] = short_break
         self.durations[SessionType.LONG_BREAK] = long_break
+        self.events.publish(DurationChange(dict(self.durations)))
         if self.state == TimerState.IDLE:
             self._remaining = self.durations[self.session_type]
-            self.on_tick(self._remaining, self.session_type)
+            self._emit_tick()
+
+    def set_tick_interval(self, seconds):
+        """Only report every ``seconds``-th value while running (aligned mode).
+
+        Useful when nothing on screen needs second-level precision, e.g. while
+        the window is hidden in the tray.
+        """
+        seconds = max(1, int(seconds))
+        if seconds == self.tick_interval:
+            return
+        self.tick_interval = seconds
+        if self.state == TimerState.RUNNING and self._timer_id is not None:
+            self.cancel(self._timer_id)
+            self._timer_id = None
+            self._tick_due = None
+            self._tick()
 
     def _schedule_tick(self):
-        self._timer_id = self.schedule(200, self._tick)
+        if self.tick_mode == "poll":
+            delay = POLL_INTERVAL_MS
+        else:
+            delay = self._ms_until_next_change()
+        self._tick_due = self.clock() + delay / 1000
+        self._timer_id = self.schedule(delay, self._tick)
+
+    def _ms_until_next_change(self):
+        # Recomputed from _target_time on every wakeup, so late callbacks never
+        # accumulate drift.
+        left = self._target_time - self.clock()
+        shown = max(0, round(left))
+        step = self.tick_interval
+        next_value = ((shown - 1) // step) * step if shown > 0 else 0
+        # round() reports next_value once fewer than next_value + 0.5 s remain
+        delay = left - (next_value + 0.5)
+        return max(1, math.ceil(delay * 1000) + TICK_SLACK_MS)
 
     def _tick(self):
         self._timer_id = None
+        self._tick_due = None
         if self.state != TimerState.RUNNING:
             return
 
-        self._remaining = max(0, round(self._target_time - time.time()))
+        self._remaining = max(0, round(self._target_time - self.clock()))
 
         if self._remaining <= 0:
             self._remaining = 0
-            self.on_tick(0, self.session_type)
+            self._emit_tick()
             completed_type = self.session_type
-            if completed_type == SessionType.WORK:
-                self.completed_pomodoros += 1
-            self.on_complete(completed_type)
-            self._advance_session()
-            self._remaining = self.durations[self.session_type]
-            self._target_time = None
-            self._started_at = None
-            self.state = TimerState.IDLE
-            self.on_tick(self._remaining, self.session_type)
+            self._complete()
+            self._set_state(TimerState.IDLE, completed_type)
+            self._emit_tick()
         else:
-            self.on_tick(self._remaining, self.session_type)
+            # An aligned wakeup that fires early has nothing new to show
+            if self.tick_mode == "poll" or self._remaining != self._last_tick_value:
+                self._last_tick_value = self._remaining
+                self._emit_tick()
             self._schedule_tick()
 
+    def _complete(self, recovered=False):
+        """Count and announce the session that ran out, then move to the next one."""
+        completed_type = self.session_type
+        if completed_type == SessionType.WORK:
+            self.completed_pomodoros += 1
+        if self.on_complete and not recovered:
+            self.on_complete(completed_type)
+        self.events.publish(SessionComplete(completed_type, self.completed_pomodoros,
+                                            self._started_at, self.total_duration,
+                                            self._target_time, recovered))
+        self._advance_session()
+        self._remaining = self.durations[self.session_type]
+        self._target_time = None
+        self._started_at = None
+
+    def _emit_tick(self):
+        if self.on_tick:
+            self.on_tick(self._remaining, self.session_type)
+        if self.events.active:
+            self.events.publish(Tick(self._remaining, self.session_type, self.state))
+
+    def _set_state(self, state, previous_session=None):
+        """Enter ``state``; publishes a StateChange if it or the session type changed."""
+        previous = self.state
+        self.state = state
+        if previous_session is None:
+            previous_session = self.session_type
+        if self.events.active and (state != previous or previous_session != self.session_type):
+            self.events.publish(StateChange(state, previous, self.session_type,
+                                            previous_session, self._remaining))
+
     def _advance_session(self):
         if self.session_type == SessionType.WORK:
             if self.completed_pomodoros % self.long_break_interval == 0:
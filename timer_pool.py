@@ -0,0 +1,196 @@
+"""Many independent Pomodoro timers driven by a single scheduled wakeup.
+
+TimerPool keeps the state TimerEngine holds per instance (state, session
+type, target time, completed count, long-break interval) in parallel
+arrays indexed by timer id, and keeps running timers in one min-heap keyed
+by target time. Only one callback is ever scheduled: for the earliest
+deadline. When it fires, every timer that has expired is completed and the
+whole batch goes to ``on_complete_batch`` in a single call.
+
+There are no per-second ticks. Clients compute the countdown from
+``target_time(timer_id)`` themselves, so the pool only wakes when a
+timer actually completes.
+"""
+import heapq
+import math
+import time
+from array import array
+
+from timer_engine import TimerState, SessionType
+
+SESSION_TYPES = (SessionType.WORK, SessionType.SHORT_BREAK, SessionType.LONG_BREAK)
+STATES = (TimerState.IDLE, TimerState.RUNNING, TimerState.PAUSED)
+
+_WORK, _SHORT, _LONG = 0, 1, 2
+_IDLE, _RUNNING, _PAUSED = 0, 1, 2
+
+
+class TimerPool:
+    def __init__(self, on_complete_batch, schedule_fn, cancel_fn, clock=time.time):
+        self.on_complete_batch = on_complete_batch
+        self.schedule = schedule_fn
+        self.cancel = cancel_fn
+        self.clock = clock
+
+        self.durations = {
+            SessionType.WORK: 25 * 60,
+            SessionType.SHORT_BREAK: 5 * 60,
+            SessionType.LONG_BREAK: 15 * 60,
+        }
+
+        self._state = array("b")
+        self._session = array("b")
+        # Target time while running, remaining seconds otherwise
+        self._time = array("d")
+        self._completed = array("I")
+        self._interval = array("B")
+        # Bumped whenever a timer's heap entry goes stale
+        self._gen = array("I")
+        self._free = []
+
+        self._heap = []
+        self._stale = 0
+        self._wake_id = None
+        self._wake_at = None
+
+    def __len__(self):
+        return len(self._state) - len(self._free)
+
+    def add(self, long_break_interval=4):
+        duration = self.durations[SessionType.WORK]
+        if self._free:
+            timer_id = self._free.pop()
+            self._state[timer_id] = _IDLE
+            self._session[timer_id] = _WORK
+            self._time[timer_id] = duration
+            self._completed[timer_id] = 0
+            self._interval[timer_id] = long_break_interval
+            self._gen[timer_id] += 1
+            return timer_id
+        self._state.append(_IDLE)
+        self._session.append(_WORK)
+        self._time.append(duration)
+        self._completed.append(0)
+        self._interval.append(long_break_interval)
+        self._gen.append(0)
+        return len(self._state) - 1
+
+    def remove(self, timer_id):
+        self._invalidate(timer_id)
+        self._state[timer_id] = _IDLE
+        self._free.append(timer_id)
+
+    def state(self, timer_id):
+        return STATES[self._state[timer_id]]
+
+    def session_type(self, timer_id):
+        return SESSION_TYPES[self._session[timer_id]]
+
+    def completed_pomodoros(self, timer_id):
+        return self._completed[timer_id]
+
+    def target_time(self, timer_id):
+        if self._state[timer_id] != _RUNNING:
+            return None
+        return self._time[timer_id]
+
+    def remaining(self, timer_id):
+        if self._state[timer_id] == _RUNNING:
+            return max(0, round(self._time[timer_id] - self.clock()))
+        return int(self._time[timer_id])
+
+    def start(self, timer_id):
+        if self._state[timer_id] != _IDLE:
+            return
+        duration = self.durations[SESSION_TYPES[self._session[timer_id]]]
+        self._run(timer_id, self.clock() + duration)
+
+    def pause(self, timer_id):
+        if self._state[timer_id] != _RUNNING:
+            return
+        self._invalidate(timer_id)
+        self._time[timer_id] = max(0, int(self._time[timer_id] - self.clock()))
+        self._state[timer_id] = _PAUSED
+
+    def resume(self, timer_id):
+        if self._state[timer_id] != _PAUSED:
+            return
+        self._run(timer_id, self.clock() + self._time[timer_id])
+
+    def reset(self, timer_id):
+        self._invalidate(timer_id)
+        self._idle(timer_id)
+
+    def skip(self, timer_id):
+        self._invalidate(timer_id)
+        self._advance_session(timer_id)
+        self._idle(timer_id)
+
+    def _run(self, timer_id, target):
+        self._time[timer_id] = target
+        self._state[timer_id] = _RUNNING
+        heapq.heappush(self._heap, (target, timer_id, self._gen[timer_id]))
+        if self._wake_at is None or target < self._wake_at:
+            self._schedule_wake(target)
+
+    def _idle(self, timer_id):
+        self._state[timer_id] = _IDLE
+        self._time[timer_id] = self.durations[SESSION_TYPES[self._session[timer_id]]]
+
+    def _invalidate(self, timer_id):
+        if self._state[timer_id] == _RUNNING:
+            self._gen[timer_id] += 1
+            self._stale += 1
+            # Lazy deletion keeps pause/reset O(1); rebuild once most of the
+            # heap is dead weight.
+            if self._stale > 1024 and self._stale > len(self._heap) // 2:
+                self._compact()
+
+    def _compact(self):
+        self._heap = [e for e in self._heap
+                      if self._state[e[1]] == _RUNNING and self._gen[e[1]] == e[2]]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def _advance_session(self, timer_id):
+        if self._session[timer_id] == _WORK:
+            if self._completed[timer_id] % self._interval[timer_id] == 0:
+                self._session[timer_id] = _LONG
+            else:
+                self._session[timer_id] = _SHORT
+        else:
+            self._session[timer_id] = _WORK
+
+    def _schedule_wake(self, at):
+        if self._wake_id is not None:
+            self.cancel(self._wake_id)
+        delay = max(0, math.ceil((at - self.clock()) * 1000))
+        self._wake_at = at
+        self._wake_id = self.schedule(delay, self._on_wake)
+
+    def _on_wake(self):
+        self._wake_id = None
+        self._wake_at = None
+        now = self.clock()
+        heap = self._heap
+        completed = []
+        while heap and heap[0][0] <= now:
+            _, timer_id, gen = heapq.heappop(heap)
+            if gen != self._gen[timer_id] or self._state[timer_id] != _RUNNING:
+                self._stale -= 1
+                continue
+            self._gen[timer_id] += 1
+            session = self._session[timer_id]
+            if session == _WORK:
+                self._completed[timer_id] += 1
+            completed.append((timer_id, SESSION_TYPES[session]))
+            self._advance_session(timer_id)
+            self._idle(timer_id)
+
+        while heap and (heap[0][2] != self._gen[heap[0][1]] or self._state[heap[0][1]] != _RUNNING):
+            heapq.heappop(heap)
+            self._stale -= 1
+        if heap:
+            self._schedule_wake(heap[0][0])
+        if completed:
+            self.on_complete_batch(completed)
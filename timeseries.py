@@ -0,0 +1,111 @@
+"""Bucketing rules for Database.time_series().
+
+All buckets are in local time:
+
+    hour     "YYYY-MM-DD HH"
+    day      "YYYY-MM-DD"
+    week     "YYYY-MM-DD" of the Monday that starts it
+    month    "YYYY-MM"
+    heatmap  (weekday, hour), Monday = 0, summed over the whole range
+
+Day, week and month series are read from daily_rollup, so they include
+compacted history. Hour and heatmap series need completion times and are
+read from raw sessions, so they cover only the retention window.
+"""
+from datetime import date, datetime, time, timedelta
+
+BUCKETS = ("hour", "day", "week", "month", "heatmap")
+
+_BUCKET_SQL = {
+    "day": "day",
+    "week": "date(day, '-' || ((CAST(strftime('%w', day) AS INTEGER) + 6) % 7) || ' days')",
+    "month": "substr(day, 1, 7)",
+    "hour": "strftime('%Y-%m-%d %H', completed_ts, 'unixepoch', 'localtime')",
+}
+
+_ROLLUP_SERIES_SQL = """
+    SELECT {key} AS bucket, SUM(count) AS count, SUM(total_seconds) AS total
+    FROM daily_rollup
+    WHERE session_type = :session_type AND day BETWEEN :start AND :end
+    GROUP BY bucket
+"""
+
+_SESSION_SERIES_SQL = """
+    SELECT {key} AS bucket, COUNT(*) AS count, SUM(duration_seconds) AS total
+    FROM sessions
+    WHERE session_type = :session_type AND day BETWEEN :start AND :end
+    GROUP BY bucket
+"""
+
+HEATMAP_SQL = """
+    SELECT (CAST(strftime('%w', completed_ts, 'unixepoch', 'localtime') AS INTEGER) + 6) % 7
+               AS weekday,
+           CAST(strftime('%H', completed_ts, 'unixepoch', 'localtime') AS INTEGER) AS hour,
+           COUNT(*) AS count, SUM(duration_seconds) AS total
+    FROM sessions
+    WHERE session_type = :session_type AND day BETWEEN :start AND :end
+    GROUP BY weekday, hour
+"""
+
+
+def series_sql(bucket):
+    template = _SESSION_SERIES_SQL if bucket == "hour" else _ROLLUP_SERIES_SQL
+    return template.format(key=_BUCKET_SQL[bucket])
+
+
+def as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def pending_key(bucket, record):
+    """The bucket a queued session record falls in."""
+    if bucket == "hour":
+        return datetime.fromtimestamp(record["completed_ts"]).strftime("%Y-%m-%d %H")
+    if bucket == "heatmap":
+        completed = datetime.fromtimestamp(record["completed_ts"])
+        return completed.weekday(), completed.hour
+    day = date.fromisoformat(record["day"])
+    if bucket == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if bucket == "month":
+        return record["day"][:7]
+    return record["day"]
+
+
+def spans(bucket, start, end):
+    """Every bucket touching [start, end], widened to whole buckets.
+
+    Returns (key, first day, last day, ends_at) tuples in order, where
+    ends_at is the local datetime at which the bucket is over.
+    """
+    result = []
+    if bucket == "hour":
+        day = start
+        while day <= end:
+            midnight = datetime.combine(day, time())
+            for hour in range(24):
+                key = f"{day.isoformat()} {hour:02d}"
+                result.append((key, day, day, midnight + timedelta(hours=hour + 1)))
+            day += timedelta(days=1)
+    elif bucket == "day":
+        day = start
+        while day <= end:
+            result.append((day.isoformat(), day, day, datetime.combine(day + timedelta(days=1), time())))
+            day += timedelta(days=1)
+    elif bucket == "week":
+        monday = start - timedelta(days=start.weekday())
+        while monday <= end:
+            sunday = monday + timedelta(days=6)
+            result.append((monday.isoformat(), monday, sunday,
+                           datetime.combine(sunday + timedelta(days=1), time())))
+            monday += timedelta(days=7)
+    elif bucket == "month":
+        first = start.replace(day=1)
+        while first <= end:
+            following = (first + timedelta(days=32)).replace(day=1)
+            result.append((first.isoformat()[:7], first, following - timedelta(days=1),
+                           datetime.combine(following, time())))
+            first = following
+    else:
+        raise ValueError(f"unknown bucket: {bucket!r}")
+    return result
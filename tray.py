@@ -2,20 +2,63 @@ import threading
 import pystray
 from PIL import Image, ImageDraw
 
+DEFAULT_COLOR = "#e74c3c"
+RING_TRACK_COLOR = (128, 128, 128, 90)
 
-def _create_tray_icon_image(color="#e74c3c"):
-    """Create a simple tomato-colored circle icon programmatically."""
+# Rendered icons keyed by (color, ring frame); frame None means no ring
+_icon_cache = {}
+
+
+def _create_tray_icon_image(color=DEFAULT_COLOR, frame=None, frames=0):
+    """Create a simple tomato-colored circle icon programmatically.
+
+    With ``frames`` > 0 the body shrinks to make room for a progress ring
+    showing ``frame / frames`` of the session remaining.
+    """
     size = 64
     img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
-    draw.ellipse([4, 4, size - 4, size - 4], fill=color)
+    if frame is None:
+        draw.ellipse([4, 4, size - 4, size - 4], fill=color)
+    else:
+        draw.ellipse([2, 2, size - 2, size - 2], outline=RING_TRACK_COLOR, width=6)
+        if frame > 0:
+            draw.arc([2, 2, size - 2, size - 2], -90, -90 + 360 * frame / frames,
+                     fill=color, width=6)
+        draw.ellipse([12, 12, size - 12, size - 12], fill=color)
     # Small green stem
     draw.rectangle([28, 0, 36, 12], fill="#27ae60")
     return img
 
 
+def get_tray_icon(color=DEFAULT_COLOR, progress=None, frames=0):
+    """Return the cached icon for ``color``, rendering it on first use.
+
+    ``progress`` (fraction remaining) is quantised to one of ``frames`` + 1
+    ring images, so a whole session only ever needs that many renders.
+    """
+    frame = None
+    if frames and progress is not None:
+        frame = min(frames, max(0, round(progress * frames)))
+    key = (color, frame, frames)
+    image = _icon_cache.get(key)
+    if image is None:
+        image = _create_tray_icon_image(color, frame, frames)
+        _icon_cache[key] = image
+    return image
+
+
+def prerender_icons(colors, frames=0):
+    for color in colors:
+        get_tray_icon(color)
+        if frames > 0:
+            for frame in range(frames + 1):
+                get_tray_icon(color, frame / frames, frames)
+
+
 class TrayManager:
-    def __init__(self, show_window_cb, quit_cb, start_pause_cb, reset_cb, root):
+    def __init__(self, show_window_cb, quit_cb, start_pause_cb, reset_cb, root,
+                 colors=(DEFAULT_COLOR,), ring_frames=0, update_interval_ms=1000):
         self._show_cb = show_window_cb
         self._quit_cb = quit_cb
         self._start_pause_cb = start_pause_cb
@@ -23,9 +66,24 @@ class TrayManager:
         self._root = root
         self._icon = None
         self._thread = None
+        self._colors = colors
+        self._ring_frames = ring_frames
+        self._update_interval_ms = update_interval_ms
+
+        # Latest requested title/image and what the tray last received.
+        # Requests only overwrite the pending values; _flush delivers them
+        # at most once per update interval, or right away when it is 0
+        # (the caller throttles).
+        self._pending_title = None
+        self._pending_image = None
+        self._shown_title = None
+        self._shown_image = None
+        self._flush_id = None
 
     def start(self):
-        image = _create_tray_icon_image()
+        prerender_icons(self._colors, self._ring_frames)
+        image = get_tray_icon(self._colors[0])
+        self._shown_image = image
         menu = pystray.Menu(
             pystray.MenuItem("Show Window", self._on_show, default=True),
             pystray.MenuItem("Start/Pause", self._on_start_pause),
@@ -38,10 +96,36 @@ class TrayManager:
         self._thread.start()
 
     def update_tooltip(self, text):
-        if self._icon:
-            self._icon.title = text
+        self._pending_title = text
+        self._schedule_flush()
+
+    def update_icon(self, color, progress=None):
+        self._pending_image = get_tray_icon(color, progress, self._ring_frames)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if not self._update_interval_ms:
+            self._flush()
+        elif self._flush_id is None:
+            self._flush_id = self._root.after(self._update_interval_ms, self._flush)
+
+    def _flush(self):
+        self._flush_id = None
+        if not self._icon:
+            return
+        # Each assignment is a round trip into the pystray thread, so only
+        # send values that actually differ from what is shown.
+        if self._pending_title is not None and self._pending_title != self._shown_title:
+            self._icon.title = self._pending_title
+            self._shown_title = self._pending_title
+        if self._pending_image is not None and self._pending_image is not self._shown_image:
+            self._icon.icon = self._pending_image
+            self._shown_image = self._pending_image
 
     def stop(self):
+        if self._flush_id is not None:
+            self._root.after_cancel(self._flush_id)
+            self._flush_id = None
         if self._icon:
             try:
                 self._icon.stop()
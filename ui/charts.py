@@ -0,0 +1,166 @@
+"""Canvas charts for the Stats panel.
+
+Both charts create their canvas items once and afterwards only touch the
+items whose value changed: each item's last-drawn options are remembered
+and compared before calling coords()/itemconfigure(). Recording a session
+therefore redraws one bar or one heatmap cell, not the whole chart.
+"""
+import tkinter as tk
+from datetime import date, timedelta
+
+import customtkinter as ctk
+
+from ui.render_stats import render_counter
+
+# (light, dark)
+CHART_COLORS = {
+    "bg": ("#dbdbdb", "#2b2b2b"),
+    "text": ("#404040", "#b0b0b0"),
+    "bar": ("#e74c3c", "#e74c3c"),
+    "empty": ("#c8c8c8", "#3a3a3a"),
+}
+
+# Heatmap cell colours by level; level 0 is CHART_COLORS["empty"]
+HEATMAP_LEVELS = ["#f5b7b1", "#ec7063", "#e74c3c", "#922b21"]
+# Lowest pomodoro count for levels 1..4. Fixed rather than relative to the
+# busiest day, so one new session never recolours the rest of the year.
+HEATMAP_THRESHOLDS = [1, 3, 5, 8]
+
+MONTHS = "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split()
+
+
+def _mode():
+    return 1 if ctk.get_appearance_mode() == "Dark" else 0
+
+
+def heatmap_level(pomodoros):
+    level = 0
+    for threshold in HEATMAP_THRESHOLDS:
+        if pomodoros >= threshold:
+            level += 1
+    return level
+
+
+def _nice_max(value):
+    """Round an axis maximum up to 30 min steps, so small changes keep the scale."""
+    step = 30 * 60
+    return max(step, -(-value // step) * step)
+
+
+class _DiffCanvas(tk.Canvas):
+    def __init__(self, master, width, height):
+        mode = _mode()
+        super().__init__(master, width=width, height=height, highlightthickness=0,
+                         bg=CHART_COLORS["bg"][mode])
+        self._colors = {name: pair[mode] for name, pair in CHART_COLORS.items()}
+        self._drawn = {}
+
+    def _coords(self, item, *coords):
+        if self._drawn.get((item, "coords")) == coords:
+            render_counter.count("canvas_skipped")
+            return
+        self._drawn[(item, "coords")] = coords
+        self.coords(item, *coords)
+        render_counter.count("canvas")
+
+    def _config(self, item, **options):
+        if self._drawn.get((item, "config")) == options:
+            render_counter.count("canvas_skipped")
+            return
+        self._drawn[(item, "config")] = options
+        self.itemconfigure(item, **options)
+        render_counter.count("canvas")
+
+
+class BarChart(_DiffCanvas):
+    """A fixed number of bars, e.g. focus minutes for each of the last N days."""
+
+    def __init__(self, master, bars, width=340, height=120, show_values=True):
+        super().__init__(master, width, height)
+        self.bars = bars
+        self._width = width
+        self._height = height
+        self._show_values = show_values
+        self._top = 14 if show_values else 4
+        self._bottom = height - 16
+        slot = width / bars
+        self._slots = [(i * slot + slot * 0.15, (i + 1) * slot - slot * 0.15) for i in range(bars)]
+        self._rects = []
+        self._values = []
+        self._labels = []
+        for x0, x1 in self._slots:
+            centre = (x0 + x1) / 2
+            self._rects.append(self.create_rectangle(x0, self._bottom, x1, self._bottom,
+                                                     width=0, fill=self._colors["bar"]))
+            self._values.append(self.create_text(centre, self._bottom, anchor="s", text="",
+                                                 fill=self._colors["text"], font=("TkDefaultFont", 8)))
+            self._labels.append(self.create_text(centre, height - 2, anchor="s", text="",
+                                                 fill=self._colors["text"], font=("TkDefaultFont", 8)))
+
+    def set_data(self, values, labels):
+        """``values`` are seconds per bar; ``labels`` the axis text under each bar."""
+        scale = (self._bottom - self._top) / _nice_max(max(values, default=0))
+        for i, (seconds, label) in enumerate(zip(values, labels)):
+            x0, x1 = self._slots[i]
+            top = round(self._bottom - seconds * scale)
+            self._coords(self._rects[i], x0, top, x1, self._bottom)
+            if self._show_values:
+                self._coords(self._values[i], (x0 + x1) / 2, top - 1)
+                self._config(self._values[i], text=str(seconds // 60) if seconds else "")
+            self._config(self._labels[i], text=label)
+
+
+class CalendarHeatmap(_DiffCanvas):
+    """One year of days as week columns (Monday at the top), coloured by level."""
+
+    COLUMNS = 54  # a leap year starting on a Sunday touches 54 weeks
+
+    def __init__(self, master, cell=5, gap=1):
+        self._pitch = cell + gap
+        self._left = 12
+        self._top = 12
+        width = self._left + self.COLUMNS * self._pitch
+        super().__init__(master, width, self._top + 7 * self._pitch)
+        self._cells = [
+            [self.create_rectangle(self._left + col * self._pitch, self._top + row * self._pitch,
+                                   self._left + col * self._pitch + cell,
+                                   self._top + row * self._pitch + cell,
+                                   width=0, fill=self._colors["empty"], state="hidden")
+             for row in range(7)]
+            for col in range(self.COLUMNS)
+        ]
+        self._months = [self.create_text(0, self._top - 2, anchor="sw", text=name,
+                                         fill=self._colors["text"], font=("TkDefaultFont", 7))
+                        for name in MONTHS]
+        for row, name in ((0, "M"), (2, "W"), (4, "F")):
+            self.create_text(self._left - 3, self._top + row * self._pitch + cell / 2 + 1, anchor="e",
+                             text=name, fill=self._colors["text"], font=("TkDefaultFont", 6))
+
+    @staticmethod
+    def layout(year):
+        """(first day, offset): cell for a day is divmod(offset + index, 7) as (column, row)."""
+        first = date(year, 1, 1)
+        return first, first.weekday()
+
+    def set_levels(self, year, levels):
+        """``levels[i]`` is the level (0-4) of the i-th day of ``year``."""
+        first, offset = self.layout(year)
+        colours = [self._colors["empty"]] + HEATMAP_LEVELS
+        shown = set()
+        for index, level in enumerate(levels):
+            col, row = divmod(offset + index, 7)
+            shown.add((col, row))
+            self._config(self._cells[col][row], fill=colours[level], state="normal")
+        for col in range(self.COLUMNS):
+            for row in range(7):
+                if (col, row) not in shown:
+                    self._config(self._cells[col][row], state="hidden")
+        for month in range(12):
+            index = (date(year, month + 1, 1) - first).days
+            col = (offset + index) // 7
+            self._coords(self._months[month], self._left + col * self._pitch, self._top - 2)
+
+
+def year_days(year):
+    first = date(year, 1, 1)
+    return [first + timedelta(days=i) for i in range((date(year + 1, 1, 1) - first).days)]
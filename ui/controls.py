@@ -1,5 +1,6 @@
 import customtkinter as ctk
 from timer_engine import TimerState
+from ui.render_stats import render_counter
 
 
 class Controls(ctk.CTkFrame):
@@ -50,20 +51,29 @@ class Controls(ctk.CTkFrame):
             command=self._on_skip,
         )
 
+        self._state = None
         self.set_state(TimerState.IDLE)
 
     def set_state(self, state):
-        for widget in self.button_frame.winfo_children():
+        # The layout only changes on state transitions; repeats are cheap no-ops
+        if state == self._state:
+            render_counter.count("pack_skipped")
+            return
+        self._state = state
+
+        children = self.button_frame.winfo_children()
+        for widget in children:
             widget.pack_forget()
+        render_counter.count("pack", len(children))
 
         if state == TimerState.IDLE:
-            self.start_btn.pack(side="left", padx=5)
-            self.skip_btn.pack(side="left", padx=5)
+            buttons = (self.start_btn, self.skip_btn)
         elif state == TimerState.RUNNING:
-            self.pause_btn.pack(side="left", padx=5)
-            self.reset_btn.pack(side="left", padx=5)
-            self.skip_btn.pack(side="left", padx=5)
+            buttons = (self.pause_btn, self.reset_btn, self.skip_btn)
         elif state == TimerState.PAUSED:
-            self.resume_btn.pack(side="left", padx=5)
-            self.reset_btn.pack(side="left", padx=5)
-            self.skip_btn.pack(side="left", padx=5)
+            buttons = (self.resume_btn, self.reset_btn, self.skip_btn)
+        else:
+            buttons = ()
+        for button in buttons:
+            button.pack(side="left", padx=5)
+        render_counter.count("pack", len(buttons))
@@ -0,0 +1,19 @@
+"""Hand results from worker threads back to the Tk thread.
+
+Only the thread running mainloop may call Tk. A worker that calls after()
+itself waits for that thread to service the call, which deadlocks when the
+Tk thread is meanwhile joining the worker (e.g. Database.close() on quit).
+So the Tk side polls instead.
+"""
+
+POLL_MS = 20
+
+
+def when_done(widget, future, callback, poll_ms=POLL_MS):
+    """Call ``callback(future)`` on the Tk thread once ``future`` has finished."""
+    def poll():
+        if future.done():
+            callback(future)
+        else:
+            widget.after(poll_ms, poll)
+    widget.after(poll_ms, poll)
@@ -0,0 +1,30 @@
+import time
+from collections import Counter
+
+
+class RenderCounter:
+    """Counts Tk widget calls so render churn can be measured.
+
+    Widgets record each configure/pack call they make, and each update they
+    skipped because nothing changed, under keys like "configure" and
+    "configure_skipped".
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self.counts = Counter()
+        self.started = clock()
+
+    def count(self, kind, n=1):
+        self.counts[kind] += n
+
+    def per_minute(self):
+        minutes = max(self._clock() - self.started, 1e-9) / 60
+        return {kind: n / minutes for kind, n in self.counts.items()}
+
+    def reset(self):
+        self.counts.clear()
+        self.started = self._clock()
+
+
+render_counter = RenderCounter()
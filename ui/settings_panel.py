@@ -80,6 +80,9 @@ class SettingsPanel(ctk.CTkFrame):
 
     def _on_slider(self, value, value_label, var):
         val = int(round(value))
+        # The slider reports every pointer motion, not just step changes
+        if val == var.get():
+            return
         var.set(val)
         value_label.configure(text=f"{val} min")
         self._notify_change()
@@ -1,5 +1,47 @@
+import threading
+from concurrent.futures import Future
+from datetime import date, timedelta
+from tkinter import filedialog
+
 import customtkinter as ctk
 
+from ui.charts import BarChart, CalendarHeatmap, heatmap_level, year_days
+from ui.futures import when_done
+
+CHART_RANGES = {"7 days": 7, "30 days": 30, "Year": None}
+TOP_TASKS_DAYS = 30
+TOP_TASKS_SHOWN = 5
+NO_TASK = "(no task)"
+EXPORT_POLL_MS = 100
+
+
+def summary_options():
+    """Arguments for Database.get_stats_summary_async() that cover everything render() shows."""
+    today = date.today()
+    longest = max(days for days in CHART_RANGES.values() if days)
+    # This year's heatmap and the bar chart ranges
+    return {"history_since": min(date(today.year, 1, 1), today - timedelta(days=longest - 1))}
+
+
+def _day_bars(days, totals):
+    """Values, axis labels and session count for the last ``days`` days.
+
+    ``totals`` maps YYYY-MM-DD to (pomodoros, focus seconds).
+    """
+    today = date.today()
+    values, labels = [], []
+    pomodoros = 0
+    for i in range(days):
+        day = today - timedelta(days=days - 1 - i)
+        count, focus = totals.get(day.isoformat(), (0, 0))
+        values.append(focus)
+        pomodoros += count
+        if days <= 7:
+            labels.append(day.strftime("%a"))
+        else:
+            labels.append(str(day.day) if (days - 1 - i) % 5 == 0 else "")
+    return values, labels, pomodoros
+
 
 class StatsPanel(ctk.CTkFrame):
     def __init__(self, master, db, **kwargs):
@@ -24,15 +66,63 @@ class StatsPanel(ctk.CTkFrame):
         # Separator
         ctk.CTkFrame(self, height=1, fg_color="gray50").pack(fill="x", padx=15, pady=5)
 
-        # This week section
-        self.week_frame = ctk.CTkFrame(self, fg_color="transparent")
-        self.week_frame.pack(fill="x", padx=15, pady=2)
-        ctk.CTkLabel(self.week_frame, text="This Week", font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w")
-        self.week_details = ctk.CTkLabel(
-            self.week_frame, text="No data yet",
+        # Charts section: one canvas per range, created on first view and
+        # kept, so switching ranges is a pack swap rather than a redraw
+        self.chart_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.chart_frame.pack(fill="x", padx=15, pady=2)
+        header = ctk.CTkFrame(self.chart_frame, fg_color="transparent")
+        header.pack(fill="x")
+        ctk.CTkLabel(header, text="History", font=ctk.CTkFont(size=14, weight="bold")).pack(side="left")
+        self.range_selector = ctk.CTkSegmentedButton(
+            header, values=list(CHART_RANGES), font=ctk.CTkFont(size=12),
+            command=self._show_range,
+        )
+        self.range_selector.pack(side="right")
+        self.year_bar = ctk.CTkFrame(self.chart_frame, fg_color="transparent")
+        ctk.CTkButton(self.year_bar, text="‹", width=28, height=24,
+                      command=lambda: self._step_year(-1)).pack(side="left")
+        self.year_label = ctk.CTkLabel(self.year_bar, text="", font=ctk.CTkFont(size=12))
+        self.year_label.pack(side="left", padx=8)
+        ctk.CTkButton(self.year_bar, text="›", width=28, height=24,
+                      command=lambda: self._step_year(1)).pack(side="left")
+        self.chart_summary = ctk.CTkLabel(self.chart_frame, text="", font=ctk.CTkFont(size=12), anchor="w")
+        self._charts = {}
+        self._range = None
+        self._year = date.today().year
+        self._history = {}      # day -> (pomodoros, focus seconds), from render()
+        # Finished year -> heatmap levels, valid while db._generation is
+        # unchanged (an import or a late session can still add to a past year)
+        self._year_levels = {}
+        self._year_levels_generation = db._generation
+        self._year_requests = set()
+        self.range_selector.set("7 days")
+        self._show_range("7 days")
+
+        # Separator
+        ctk.CTkFrame(self, height=1, fg_color="gray50").pack(fill="x", padx=15, pady=5)
+
+        # Top tasks section
+        self.tasks_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.tasks_frame.pack(fill="x", padx=15, pady=2)
+        ctk.CTkLabel(
+            self.tasks_frame, text=f"Top Tasks ({TOP_TASKS_DAYS} days)",
+            font=ctk.CTkFont(size=14, weight="bold"),
+        ).pack(anchor="w")
+        self.tasks_details = ctk.CTkLabel(
+            self.tasks_frame, text="No data yet",
             font=ctk.CTkFont(size=12), justify="left", anchor="w",
         )
-        self.week_details.pack(anchor="w", fill="x")
+        self.tasks_details.pack(anchor="w", fill="x")
+        self.tasks_counts = ctk.CTkLabel(self.tasks_frame, text="", font=ctk.CTkFont(size=12), anchor="w")
+        self.tasks_counts.pack(anchor="w", fill="x")
+        # One task's days over the same range, picked from the top tasks
+        self.task_selector = ctk.CTkOptionMenu(
+            self.tasks_frame, values=[NO_TASK], width=200, height=24,
+            font=ctk.CTkFont(size=12), command=self._select_task,
+        )
+        self.task_chart = BarChart(self.tasks_frame, bars=TOP_TASKS_DAYS, height=80, show_values=False)
+        self.task_summary = ctk.CTkLabel(self.tasks_frame, text="", font=ctk.CTkFont(size=12), anchor="w")
+        self._task_choice = None  # selector entry shown in task_chart, once there are tasks
 
         # Separator
         ctk.CTkFrame(self, height=1, fg_color="gray50").pack(fill="x", padx=15, pady=5)
@@ -46,22 +136,227 @@ class StatsPanel(ctk.CTkFrame):
         self.alltime_focus = ctk.CTkLabel(self.alltime_frame, text="Focus time: 0 hr", font=ctk.CTkFont(size=13))
         self.alltime_focus.pack(anchor="w")
 
-    def refresh(self):
-        today = self.db.get_today_stats()
+        # Export
+        self.export_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.export_frame.pack(fill="x", padx=15, pady=(0, 10))
+        self.export_btn = ctk.CTkButton(
+            self.export_frame, text="Export CSV…", width=110, height=28,
+            font=ctk.CTkFont(size=12), command=self._export,
+        )
+        self.export_btn.pack(side="left")
+        self.export_status = ctk.CTkLabel(self.export_frame, text="", font=ctk.CTkFont(size=12))
+        self.export_status.pack(side="left", padx=10)
+
+    def _export(self):
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Export session history", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Compressed CSV", "*.csv.gz")],
+        )
+        if not path:
+            return
+        self.export_btn.configure(state="disabled")
+        self.export_status.configure(text="Exporting…")
+        # Runs on its own thread and connection; Tk polls for progress and
+        # the result, since only the Tk thread may touch widgets
+        self._export_progress = None
+        future = Future()
+        threading.Thread(target=self._run_export, args=(path, future), daemon=True).start()
+        self._poll_export(future)
+
+    def _run_export(self, path, future):
+        def progress(done, total):
+            self._export_progress = (done, total)
+        try:
+            future.set_result(self.db.export_sessions(path, "csv", progress=progress))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _poll_export(self, future):
+        if not future.done():
+            if self._export_progress and self._export_progress[1]:
+                done, total = self._export_progress
+                self.export_status.configure(text=f"Exporting… {done * 100 // total}%")
+            self.after(EXPORT_POLL_MS, self._poll_export, future)
+            return
+        if future.exception() is not None:
+            message = f"Export failed: {future.exception()}"
+        else:
+            message = f"Exported {future.result()} sessions"
+        self.export_btn.configure(state="normal")
+        self.export_status.configure(text=message)
+
+    def _show_range(self, name):
+        if name == self._range:
+            return
+        if self._range is not None:
+            self._charts[self._range].pack_forget()
+        self._range = name
+        chart = self._charts.get(name)
+        if chart is None:
+            days = CHART_RANGES[name]
+            if days is None:
+                chart = CalendarHeatmap(self.chart_frame)
+            else:
+                chart = BarChart(self.chart_frame, bars=days, show_values=days <= 7)
+            self._charts[name] = chart
+        # Repacked in order: year selector (heatmap only), chart, summary
+        self.year_bar.pack_forget()
+        self.chart_summary.pack_forget()
+        if CHART_RANGES[name] is None:
+            self.year_bar.pack(fill="x", pady=(4, 0))
+        chart.pack(pady=(6, 0))
+        self.chart_summary.pack(anchor="w", fill="x")
+        self.render_chart()
+
+    def _step_year(self, step):
+        year = self._year + step
+        if year > date.today().year:
+            return
+        self._year = year
+        self.render_chart()
+
+    def render_chart(self):
+        """Update the visible chart from the data already fetched.
+
+        Only bars or cells that changed are redrawn. Past years are fetched
+        on first view, off the Tk thread, and painted when they arrive.
+        """
+        days = CHART_RANGES[self._range]
+        chart = self._charts[self._range]
+        today = date.today()
+        if days is None:
+            if self._year == today.year:
+                levels = [heatmap_level(self._history.get(day.isoformat(), (0, 0))[0])
+                          for day in year_days(self._year)]
+            else:
+                if self._year_levels_generation != self.db._generation:
+                    self._year_levels.clear()
+                    self._year_levels_generation = self.db._generation
+                levels = self._year_levels.get(self._year)
+                if levels is None:
+                    self._request_year(self._year)
+                    levels = [0] * len(year_days(self._year))
+            chart.set_levels(self._year, levels)
+            self.year_label.configure(text=str(self._year))
+            active = sum(1 for level in levels if level)
+            self.chart_summary.configure(text=f"  {active} days with pomodoros")
+            return
+        values, labels, pomodoros = _day_bars(days, self._history)
+        chart.set_data(values, labels)
+        self.chart_summary.configure(text=f"  {pomodoros} sessions, {sum(values) // 60} min")
+
+    def _request_year(self, year):
+        if year in self._year_requests:
+            return
+        self._year_requests.add(year)
+        generation = self.db._generation
+        future = self.db.get_day_totals_async(date(year, 1, 1), date(year, 12, 31))
+        when_done(self, future, lambda f: self._apply_year(year, generation, f))
+
+    def _apply_year(self, year, generation, future):
+        self._year_requests.discard(year)
+        if future.exception() is not None:
+            return
+        if generation != self.db._generation:
+            # Written to meanwhile; render_chart() asks again if still shown
+            if CHART_RANGES[self._range] is None and self._year == year:
+                self.render_chart()
+            return
+        if self._year_levels_generation != generation:
+            self._year_levels.clear()
+            self._year_levels_generation = generation
+        counts = {d["day"]: d["pomodoros"] for d in future.result()}
+        self._year_levels[year] = [heatmap_level(counts.get(day.isoformat(), 0))
+                                   for day in year_days(year)]
+        if CHART_RANGES[self._range] is None and self._year == year:
+            self.render_chart()
+
+    def render(self, stats):
+        """Show a stats summary as returned by get_stats_summary_async(**summary_options()).
+
+        Only paints; parts missing from ``stats`` (e.g. an older snapshot)
+        keep what they showed before.
+        """
+        today = stats["today"]
         self.today_pomodoros.configure(text=f"Pomodoros: {today['pomodoros']}")
         self.today_focus.configure(text=f"Focus time: {today['focus_seconds'] // 60} min")
 
-        week = self.db.get_week_stats()
-        if week:
-            lines = []
-            for day in week:
-                mins = day["focus_seconds"] // 60
-                lines.append(f"  {day['day']}:  {day['pomodoros']} sessions, {mins} min")
-            self.week_details.configure(text="\n".join(lines))
-        else:
-            self.week_details.configure(text="No data yet")
+        if "history" in stats:
+            self._history = {d["day"]: (d["pomodoros"], d["focus_seconds"]) for d in stats["history"]}
+            self.render_chart()
 
-        alltime = self.db.get_all_time_stats()
+        alltime = stats["all_time"]
         self.alltime_pomodoros.configure(text=f"Pomodoros: {alltime['pomodoros']}")
         hours = alltime["focus_seconds"] / 3600
         self.alltime_focus.configure(text=f"Focus time: {hours:.1f} hr")
+
+    def refresh_tasks(self):
+        """Fetch the per-task section off the Tk thread and paint it when it arrives.
+
+        The queries are cached by the database until the next session, so
+        a refresh with nothing new recorded costs no query at all.
+        """
+        start, end = self._task_range()
+        when_done(self, self.db.top_tasks_async(start, end, limit=TOP_TASKS_SHOWN), self._apply_tasks)
+        when_done(self, self.db.task_session_counts_async(start, end), self._apply_task_counts)
+        if self._task_choice is not None:
+            self._request_task_series(self._task_choice)
+
+    def _task_range(self):
+        end = date.today()
+        return end - timedelta(days=TOP_TASKS_DAYS - 1), end
+
+    def _apply_tasks(self, future):
+        if future.exception() is not None:
+            return
+        tasks = future.result()
+        self.render_tasks(tasks)
+        choices = [task["task"] or NO_TASK for task in tasks]
+        if not choices:
+            return
+        self.task_selector.configure(values=choices)
+        if self._task_choice not in choices:
+            self._select_task(choices[0])
+        if not self.task_selector.winfo_manager():
+            self.task_selector.pack(anchor="w", pady=(6, 0))
+            self.task_chart.pack(pady=(4, 0))
+            self.task_summary.pack(anchor="w", fill="x")
+
+    def _apply_task_counts(self, future):
+        if future.exception() is not None:
+            return
+        counts = future.result()
+        unlabelled = counts.get(None, 0)
+        text = f"  {len(counts) - (None in counts)} tasks, {sum(counts.values())} sessions"
+        if unlabelled:
+            text += f" ({unlabelled} without a task)"
+        self.tasks_counts.configure(text=text if counts else "")
+
+    def _select_task(self, choice):
+        self.task_selector.set(choice)
+        self._task_choice = choice
+        self._request_task_series(choice)
+
+    def _request_task_series(self, choice):
+        start, end = self._task_range()
+        future = self.db.task_daily_series_async(None if choice == NO_TASK else choice, start, end)
+        when_done(self, future, lambda f: self._apply_task_series(choice, f))
+
+    def _apply_task_series(self, choice, future):
+        # A reply for a task that is no longer selected is dropped
+        if future.exception() is not None or choice != self._task_choice:
+            return
+        totals = {d["day"]: (d["pomodoros"], d["focus_seconds"]) for d in future.result()}
+        values, labels, pomodoros = _day_bars(TOP_TASKS_DAYS, totals)
+        self.task_chart.set_data(values, labels)
+        self.task_summary.configure(text=f"  {pomodoros} sessions, {sum(values) // 60} min")
+
+    def render_tasks(self, tasks):
+        if tasks:
+            lines = []
+            for task in tasks:
+                mins = task["focus_seconds"] // 60
+                lines.append(f"  {task['task'] or NO_TASK}:  {task['pomodoros']} sessions, {mins} min")
+            self.tasks_details.configure(text="\n".join(lines))
+        else:
+            self.tasks_details.configure(text="No data yet")
@@ -1,9 +1,20 @@
+import tkinter as tk
+
 import customtkinter as ctk
 
+# (light, dark) colours for the suggestion list, close to CTkEntry's own
+LIST_COLORS = {
+    "bg": ("#f9f9fa", "#343638"),
+    "fg": ("#1a1a1a", "#dce4ee"),
+    "select": ("#3a7ebf", "#1f538d"),
+}
+
 
 class TaskEntry(ctk.CTkFrame):
-    def __init__(self, master, **kwargs):
+    def __init__(self, master, suggest=None, **kwargs):
         super().__init__(master, fg_color="transparent", **kwargs)
+        # suggest(prefix) -> list of previously used labels, best first
+        self._suggest = suggest
 
         self.entry = ctk.CTkEntry(
             self,
@@ -15,6 +26,93 @@ class TaskEntry(ctk.CTkFrame):
         )
         self.entry.pack(pady=(15, 5), padx=20)
 
+        self._listbox = None
+        self._suggestions = []
+        if suggest is not None:
+            self.entry.bind("<KeyRelease>", self._on_key)
+            self.entry.bind("<Down>", lambda e: self._move(1))
+            self.entry.bind("<Up>", lambda e: self._move(-1))
+            self.entry.bind("<Return>", self._accept)
+            self.entry.bind("<Tab>", self._accept)
+            self.entry.bind("<Escape>", lambda e: self._hide())
+            # Delayed so that a click on the list lands before it disappears
+            self.entry.bind("<FocusOut>", lambda e: self.after(150, self._hide))
+
     def get_task(self):
         text = self.entry.get().strip()
         return text if text else None
+
+    def set_task(self, text):
+        self.entry.delete(0, "end")
+        self.entry.insert(0, text)
+
+    def _on_key(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Tab", "Escape"):
+            return
+        text = self.entry.get().strip()
+        suggestions = self._suggest(text) if text else []
+        # Nothing to add when the only suggestion is what is already typed
+        if suggestions == [text]:
+            suggestions = []
+        self._show(suggestions)
+
+    def _show(self, suggestions):
+        if suggestions == self._suggestions:
+            return
+        self._suggestions = suggestions
+        if not suggestions:
+            self._hide()
+            return
+        listbox = self._get_listbox()
+        listbox.delete(0, "end")
+        listbox.insert("end", *suggestions)
+        listbox.configure(height=len(suggestions))
+        listbox.place(in_=self.entry, x=0, rely=1, y=2, relwidth=1)
+        listbox.lift()
+
+    def _get_listbox(self):
+        if self._listbox is None:
+            mode = 1 if ctk.get_appearance_mode() == "Dark" else 0
+            # A child of the window, placed over whatever is below the entry
+            self._listbox = tk.Listbox(
+                self.winfo_toplevel(), activestyle="none", exportselection=False,
+                borderwidth=0, highlightthickness=1, font=("TkDefaultFont", 12),
+                bg=LIST_COLORS["bg"][mode], fg=LIST_COLORS["fg"][mode],
+                selectbackground=LIST_COLORS["select"][mode], selectforeground="white",
+            )
+            self._listbox.bind("<ButtonRelease-1>", self._on_click)
+        return self._listbox
+
+    def _hide(self):
+        self._suggestions = []
+        if self._listbox is not None:
+            self._listbox.place_forget()
+
+    def _move(self, step):
+        if not self._suggestions:
+            return None
+        selection = self._listbox.curselection()
+        index = selection[0] + step if selection else (0 if step > 0 else len(self._suggestions) - 1)
+        index = max(0, min(index, len(self._suggestions) - 1))
+        self._listbox.selection_clear(0, "end")
+        self._listbox.selection_set(index)
+        self._listbox.see(index)
+        return "break"
+
+    def _accept(self, event=None):
+        if not self._suggestions:
+            return None
+        selection = self._listbox.curselection()
+        self._fill(self._suggestions[selection[0] if selection else 0])
+        return "break"
+
+    def _on_click(self, event):
+        index = self._listbox.nearest(event.y)
+        if 0 <= index < len(self._suggestions):
+            self._fill(self._suggestions[index])
+
+    def _fill(self, label):
+        self.entry.delete(0, "end")
+        self.entry.insert(0, label)
+        self._hide()
+        self.entry.focus_set()
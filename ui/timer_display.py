@@ -1,5 +1,6 @@
 import customtkinter as ctk
 from timer_engine import SessionType
+from ui.render_stats import render_counter
 
 
 SESSION_LABELS = {
@@ -49,21 +50,35 @@ class TimerDisplay(ctk.CTkFrame):
         self.pomodoro_label.pack(pady=(0, 10))
 
         self._total_duration = 25 * 60
+        # Last value pushed to each widget, so unchanged fields are skipped
+        self._rendered = {}
 
     def update_display(self, remaining, session_type, total_duration, completed_count):
         minutes = remaining // 60
         seconds = remaining % 60
-        self.time_label.configure(text=f"{minutes:02d}:{seconds:02d}")
+        self._configure(self.time_label, text=f"{minutes:02d}:{seconds:02d}")
 
         label = SESSION_LABELS.get(session_type, "WORK SESSION")
         color = SESSION_COLORS.get(session_type, "#e74c3c")
-        self.session_label.configure(text=label, text_color=color)
-        self.progress_bar.configure(progress_color=color)
+        self._configure(self.session_label, text=label, text_color=color)
+        self._configure(self.progress_bar, progress_color=color)
 
         self._total_duration = total_duration
-        if total_duration > 0:
-            self.progress_bar.set(remaining / total_duration)
+        progress = remaining / total_duration if total_duration > 0 else 0
+        if self._rendered.get("progress") != progress:
+            self._rendered["progress"] = progress
+            self.progress_bar.set(progress)
+            render_counter.count("configure")
         else:
-            self.progress_bar.set(0)
+            render_counter.count("configure_skipped")
 
-        self.pomodoro_label.configure(text=f"Pomodoro #{completed_count}")
+        self._configure(self.pomodoro_label, text=f"Pomodoro #{completed_count}")
+
+    def _configure(self, widget, **options):
+        key = id(widget)
+        if self._rendered.get(key) == options:
+            render_counter.count("configure_skipped")
+            return
+        self._rendered[key] = options
+        widget.configure(**options)
+        render_counter.count("configure")